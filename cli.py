@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+QuizLM - headless batch quiz generation
+
+Generates quizzes for every source document matched by the given
+directories, globs or files, for each requested difficulty and style.
+Progress goes to stderr; a JSON summary is printed to stdout. Stage results
+are checkpointed in a journal, so re-running an interrupted batch resumes
+where it stopped.
+
+Examples:
+    python cli.py data/source_documents
+    python cli.py "notes/**/*.pdf" -d Easy -d Hard -s split -s full -j 8
+"""
+
+from contextlib import redirect_stdout
+from pathlib import Path
+import argparse
+import json
+import sys
+
+from config import Config
+from logic.batch_journal import BatchJournal
+from logic.batch_runner import BatchRunner, collect_sources
+from logic.metrics import get_metrics, serve_metrics
+
+
+DIFFICULTIES = {"easy": "Easy", "medium": "Medium", "hard": "Hard"}
+QUIZ_STYLES = {
+    "split": "Split Page",
+    "split page": "Split Page",
+    "full": "Full Page",
+    "full page": "Full Page",
+}
+
+
+def _choice(options: dict, label: str):
+    """argparse type that maps case-insensitive aliases to canonical names"""
+    def parse(value: str) -> str:
+        key = value.strip().lower()
+        if key not in options:
+            raise argparse.ArgumentTypeError(
+                f"invalid {label} '{value}' (choose from {', '.join(sorted(set(options)))})"
+            )
+        return options[key]
+    return parse
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Generate quizzes from a directory or glob of source documents"
+    )
+    parser.add_argument(
+        "sources", nargs="+",
+        help="Source directories, glob patterns or files (PDF, DOCX, TXT, PNG, JPG)"
+    )
+    parser.add_argument(
+        "-d", "--difficulty", action="append", type=_choice(DIFFICULTIES, "difficulty"),
+        help="Difficulty to generate; repeat for several (default: Medium)"
+    )
+    parser.add_argument(
+        "-s", "--style", action="append", type=_choice(QUIZ_STYLES, "style"),
+        help="Layout style: split or full; repeat for several (default: split)"
+    )
+    parser.add_argument(
+        "-j", "--concurrency", type=int, default=4,
+        help="Concurrent jobs per stage (default: 4)"
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true",
+        help="Search source directories recursively"
+    )
+    parser.add_argument(
+        "--skip-existing", action="store_true",
+        help="Skip quizzes whose PDF already exists instead of reporting them as failed"
+    )
+    parser.add_argument(
+        "--journal", type=Path,
+        help="Checkpoint journal for resuming interrupted batches "
+             "(default: data/batch_journal.sqlite)"
+    )
+    parser.add_argument(
+        "--no-journal", action="store_true",
+        help="Run without a checkpoint journal"
+    )
+    parser.add_argument(
+        "--summary", type=Path,
+        help="Also write the JSON summary to this file"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """Batch entry point; returns 0 if every quiz succeeded"""
+    args = parse_args(argv)
+
+    sources = collect_sources(args.sources, recursive=args.recursive)
+    if not sources:
+        print("No supported source documents found", file=sys.stderr)
+        return 1
+
+    # Keep stdout for the summary; everything the pipeline prints is progress
+    with redirect_stdout(sys.stderr):
+        try:
+            config = Config()
+            if config.metrics_port:
+                serve_metrics(config.metrics_port, config.metrics_host)
+            journal = None
+            if not args.no_journal:
+                journal = BatchJournal(args.journal or config.data_dir / "batch_journal.sqlite")
+            runner = BatchRunner(
+                config,
+                concurrency=args.concurrency,
+                skip_existing=args.skip_existing,
+                journal=journal
+            )
+        except Exception as e:
+            print(f"Error: {e}")
+            return 1
+
+        try:
+            summary = runner.run(
+                sources,
+                list(dict.fromkeys(args.difficulty or ["Medium"])),
+                list(dict.fromkeys(args.style or ["Split Page"]))
+            )
+        finally:
+            if journal is not None:
+                journal.close()
+            if config.metrics_file:
+                try:
+                    get_metrics().write_file(config.metrics_file)
+                except OSError as e:
+                    print(f"Warning: Could not write metrics to {config.metrics_file}: {e}")
+
+    output = json.dumps(summary, indent=2)
+    print(output)
+    if args.summary:
+        args.summary.write_text(output + "\n")
+
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
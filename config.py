@@ -27,13 +27,67 @@ class Config:
         self._create_directories()
 
         # LLM Configuration
-        self.llm_provider = os.getenv("QUIZLM_LLM_PROVIDER", "claude")  # claude, openai, or grok
+        self.llm_provider = os.getenv("QUIZLM_LLM_PROVIDER", "claude")  # claude, openai, grok, or stub
+        # Seconds the offline "stub" provider waits per call, to simulate LLM latency
+        self.stub_llm_delay = float(os.getenv("QUIZLM_STUB_DELAY", "0"))
+        # Seconds an LLM request may take (a caller's deadline can shorten it)
+        self.llm_timeout = float(os.getenv("QUIZLM_LLM_TIMEOUT", "120"))
 
         # API Keys
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.grok_api_key = os.getenv("GROK_API_KEY")
 
+        # OCR Configuration (DPI is picked per page within these bounds)
+        self.ocr_min_dpi = int(os.getenv("QUIZLM_OCR_MIN_DPI", "150"))
+        self.ocr_max_dpi = int(os.getenv("QUIZLM_OCR_MAX_DPI", "300"))
+        self.ocr_probe_dpi = int(os.getenv("QUIZLM_OCR_PROBE_DPI", "72"))
+        self.ocr_engine = os.getenv("QUIZLM_OCR_ENGINE", "auto")  # auto, tesserocr, or pytesseract
+        # Seconds OCR or rasterizing of one page may take (0 = unlimited)
+        self.ocr_timeout = float(os.getenv("QUIZLM_OCR_TIMEOUT", "120"))
+
+        # PDF Configuration: quizzes longer than this many pages are written
+        # in batches of this size to bound memory (0 = always render in one go)
+        self.pdf_stream_pages = int(os.getenv("QUIZLM_PDF_STREAM_PAGES", "50"))
+
+        # Quiz font family (default: the trained style's font, else Helvetica).
+        # TrueType files are looked up in fonts_dir, then the system font folders
+        self.quiz_font = os.getenv("QUIZLM_QUIZ_FONT")
+        self.fonts_dir = Path(os.getenv("QUIZLM_FONTS_DIR", str(self.data_dir / "fonts")))
+
+        # Generation pipeline: documents longer than chunk_chars are split into
+        # chunks that are extracted, sent to the LLM and built concurrently
+        self.pipeline_chunk_chars = int(os.getenv("QUIZLM_CHUNK_CHARS", "20000"))
+        self.pipeline_queue_size = int(os.getenv("QUIZLM_PIPELINE_QUEUE", "2"))
+        self.selection_workers = int(os.getenv("QUIZLM_SELECTION_WORKERS", "2"))
+
+        # Reuse quizzes generated from identical inputs (indexed in data/quiz_cache.sqlite)
+        self.quiz_cache_enabled = os.getenv("QUIZLM_QUIZ_CACHE", "1").lower() not in ("0", "false", "no")
+
+        # Record a trace of each generation's stages to data/traces
+        # (<quiz>.trace.json for chrome://tracing, <quiz>.summary.json)
+        self.trace_enabled = os.getenv("QUIZLM_TRACE", "0").lower() in ("1", "true", "yes")
+        self.traces_dir = Path(os.getenv("QUIZLM_TRACES_DIR", str(self.data_dir / "traces")))
+
+        # Metrics (OpenMetrics text): rewritten after each generation when a
+        # file is set; served at http://127.0.0.1:<port>/metrics when a port is set
+        metrics_file = os.getenv("QUIZLM_METRICS_FILE")
+        self.metrics_file = Path(metrics_file) if metrics_file else None
+        self.metrics_host = os.getenv("QUIZLM_METRICS_HOST", "127.0.0.1")
+        self.metrics_port = int(os.getenv("QUIZLM_METRICS_PORT", "0"))
+
+        # Preview thumbnail resolution (pages are cached by content in data/preview_cache)
+        self.preview_dpi = int(os.getenv("QUIZLM_PREVIEW_DPI", "50"))
+
+        # Local quiz service (serve.py): listen address, concurrent generations
+        # and how many jobs may wait in the queue before new ones are refused
+        self.service_host = os.getenv("QUIZLM_SERVICE_HOST", "127.0.0.1")
+        self.service_port = int(os.getenv("QUIZLM_SERVICE_PORT", "8765"))
+        self.service_workers = int(os.getenv("QUIZLM_SERVICE_WORKERS", "2"))
+        self.service_max_queue = int(os.getenv("QUIZLM_SERVICE_MAX_QUEUE", "100"))
+        # Default deadline for a service job, in seconds (0 = none)
+        self.service_job_timeout = float(os.getenv("QUIZLM_SERVICE_JOB_TIMEOUT", "600"))
+
         # Validate configuration
         self._validate_config()
 
@@ -0,0 +1,31 @@
+"""
+Shared pytest fixtures
+"""
+
+import pytest
+
+from config import Config
+
+
+SAMPLE_TEXT = "\n\n".join(
+    f"Paragraph {i}: Mitochondria produce ATP through cellular respiration, while "
+    "chloroplasts use chlorophyll to capture light energy during photosynthesis. "
+    "Enzymes catalyze these reactions inside the cell."
+    for i in range(8)
+)
+
+
+@pytest.fixture
+def stub_config(tmp_path):
+    """Config using the offline stub LLM provider, writing only under tmp_path"""
+    config = Config()
+    config.llm_provider = "stub"
+    config.stub_llm_delay = 0.0
+    config.data_dir = tmp_path / "data"
+    config.quizzes_dir = config.data_dir / "quizzes"
+    config.quizzes_dir.mkdir(parents=True)
+    config.trace_enabled = False
+    config.traces_dir = config.data_dir / "traces"
+    config.metrics_file = None
+    config.service_job_timeout = 60
+    return config
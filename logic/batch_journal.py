@@ -0,0 +1,197 @@
+"""
+Batch job journal - checkpoints each document's stage results in SQLite so
+an interrupted batch can resume without repeating finished work (in
+particular, paid LLM calls)
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Tuple
+import json
+import sqlite3
+import threading
+import zlib
+
+from .quiz_artifact import source_hash
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    source TEXT PRIMARY KEY,
+    source_mtime REAL NOT NULL,
+    source_size INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    content BLOB NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS selections (
+    content_hash TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    word_selection TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (content_hash, difficulty, selector)
+);
+CREATE TABLE IF NOT EXISTS quizzes (
+    quiz_name TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    quiz_style TEXT NOT NULL,
+    quiz_data TEXT NOT NULL,
+    output_path TEXT,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+class BatchJournal:
+    """
+    SQLite checkpoint journal for batch generation
+
+    Stage results are committed as soon as they are produced. Extractions
+    are keyed by source path and invalidated when the file's size or
+    modification time changes; selections are keyed by content hash,
+    difficulty and word selector (provider, model and prompt version), so
+    identical documents share one LLM call and a change of model is never
+    served an old model's selection.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open (or create) a journal
+
+        Args:
+            path: SQLite database file
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Selections journaled before they were keyed by selector cannot be
+        # attributed to a model, so they are dropped
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(selections)")]
+        if columns and "selector" not in columns:
+            self._conn.execute("DROP TABLE selections")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get_extraction(self, source: Path) -> Optional[Tuple[str, str]]:
+        """
+        Get the journaled text of a source if the file is unchanged
+
+        Returns:
+            Tuple of (content, content hash), or None
+        """
+        stat = source.stat()
+        row = self._fetchone(
+            "SELECT source_mtime, source_size, content_hash, content FROM extractions WHERE source = ?",
+            (str(source.resolve()),)
+        )
+        if row is None or row[0] != stat.st_mtime or row[1] != stat.st_size:
+            return None
+        return zlib.decompress(row[3]).decode("utf-8"), row[2]
+
+    def record_extraction(self, source: Path, content: str) -> str:
+        """Journal a source's extracted text; returns its content hash"""
+        stat = source.stat()
+        content_hash = source_hash(content)
+        self._execute(
+            "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                str(source.resolve()),
+                stat.st_mtime,
+                stat.st_size,
+                content_hash,
+                zlib.compress(content.encode("utf-8")),
+                _now()
+            )
+        )
+        return content_hash
+
+    def get_selection(self, content_hash: str, difficulty: str, selector: str) -> Optional[dict]:
+        """Get an LLM word selection journaled for the same content, difficulty and selector"""
+        row = self._fetchone(
+            "SELECT word_selection FROM selections WHERE content_hash = ? AND difficulty = ? AND selector = ?",
+            (content_hash, difficulty, selector)
+        )
+        return json.loads(row[0]) if row else None
+
+    def record_selection(self, content_hash: str, difficulty: str, selector: str, word_selection: dict):
+        """Journal an LLM word selection"""
+        self._execute(
+            "INSERT OR REPLACE INTO selections VALUES (?, ?, ?, ?, ?)",
+            (content_hash, difficulty, selector, json.dumps(word_selection), _now())
+        )
+
+    def get_quiz(self, quiz_name: str, content_hash: str, difficulty: str, quiz_style: str) -> Optional[dict]:
+        """
+        Get a journaled quiz built from the same content, difficulty and style
+
+        Returns:
+            Dict with quiz_data and output_path (None until rendered), or None
+        """
+        row = self._fetchone(
+            "SELECT quiz_data, output_path FROM quizzes "
+            "WHERE quiz_name = ? AND content_hash = ? AND difficulty = ? AND quiz_style = ?",
+            (quiz_name, content_hash, difficulty, quiz_style)
+        )
+        if row is None:
+            return None
+        return {"quiz_data": json.loads(row[0]), "output_path": row[1]}
+
+    def get_quiz_record(self, quiz_name: str) -> Optional[dict]:
+        """
+        Get a journaled quiz by name, whatever its source content
+
+        Only a cheap first filter: use get_quiz() to check that the quiz was
+        built from the same content, difficulty and style.
+
+        Returns:
+            Dict with content_hash and output_path (None until rendered), or None
+        """
+        row = self._fetchone(
+            "SELECT content_hash, output_path FROM quizzes WHERE quiz_name = ?", (quiz_name,)
+        )
+        if row is None:
+            return None
+        return {"content_hash": row[0], "output_path": row[1]}
+
+    def record_quiz(self, quiz_name: str, content_hash: str, difficulty: str, quiz_style: str, quiz_data: dict):
+        """Journal a built (not yet rendered) quiz"""
+        self._execute(
+            "INSERT OR REPLACE INTO quizzes VALUES (?, ?, ?, ?, ?, NULL, ?)",
+            (quiz_name, content_hash, difficulty, quiz_style, json.dumps(quiz_data), _now())
+        )
+
+    def record_render(self, quiz_name: str, output_path: Path):
+        """Mark a journaled quiz as rendered"""
+        self._execute(
+            "UPDATE quizzes SET output_path = ?, updated_at = ? WHERE quiz_name = ?",
+            (str(output_path), _now(), quiz_name)
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _fetchone(self, sql: str, params: tuple):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _execute(self, sql: str, params: tuple):
+        # Each checkpoint is committed immediately so a crash loses at most
+        # the stage that was running
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+
+def _now() -> str:
+    return datetime.now().isoformat()
@@ -0,0 +1,230 @@
+"""
+Batch rendering - lay out and render many quizzes across a process pool and
+optionally assemble them into one print-ready booklet
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+import io
+import os
+import time
+
+from .font_registry import get_font_registry
+from .layout_renderers import PDFRenderer, StreamingPDFRenderer
+from .pdf_page_writer import PDFPageWriter
+from .quiz_layout import QuizLayoutEngine
+
+
+# One layout engine per worker process, so word width caches are reused
+# across all the quizzes a worker renders
+_worker_engine: Optional[QuizLayoutEngine] = None
+
+
+def _get_worker_engine() -> QuizLayoutEngine:
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = QuizLayoutEngine()
+    return _worker_engine
+
+
+def _render_job(job: Dict) -> Dict:
+    """
+    Lay out and render a single quiz (runs in a worker process)
+
+    Args:
+        job: Dict with quiz_data, quiz_name, output_path, optional quiz_style,
+            font, font_dirs and pages_per_part
+
+    Returns:
+        Result dict with quiz_name, title, output_path, pages, seconds and
+        error (None on success)
+    """
+    start = time.perf_counter()
+    result = {
+        "quiz_name": job["quiz_name"],
+        "title": job["quiz_name"],
+        "output_path": str(job["output_path"]),
+        "pages": 0,
+        "seconds": 0.0,
+        "error": None
+    }
+
+    try:
+        for font_dir in job.get("font_dirs") or []:
+            get_font_registry().add_font_dir(font_dir)
+
+        layout = _get_worker_engine().layout_quiz(
+            job["quiz_data"],
+            job["quiz_name"],
+            job.get("quiz_style", "Split Page"),
+            font=job.get("font")
+        )
+
+        output_path = Path(job["output_path"])
+        if not output_path.parent.is_dir():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Long quizzes are streamed so a worker's memory stays bounded
+        pages_per_part = job.get("pages_per_part") or 0
+        if pages_per_part and len(layout.pages) > pages_per_part:
+            StreamingPDFRenderer(pages_per_part).render(layout, output_path)
+        else:
+            PDFRenderer().render(layout, output_path)
+
+        result["title"] = layout.title
+        result["pages"] = len(layout.pages)
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class BatchRenderer:
+    """Renders many quizzes in parallel and assembles booklets"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        tasks_per_worker: int = 20,
+        pages_per_part: int = 50,
+        font_dirs: Optional[List[Path]] = None
+    ):
+        """
+        Initialize batch renderer
+
+        Args:
+            max_workers: Worker processes (default: CPU count; 1 renders in-process)
+            tasks_per_worker: Quizzes a worker renders before it is replaced,
+                which keeps long-running workers from accumulating memory
+            pages_per_part: Quizzes longer than this are streamed to disk in
+                batches of this many pages (0 disables)
+            font_dirs: Extra directories workers search for TrueType fonts
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self.pages_per_part = pages_per_part
+        self.font_dirs = [str(font_dir) for font_dir in font_dirs or []]
+
+    def render_quizzes(self, jobs: List[Dict]) -> List[Dict]:
+        """
+        Render quizzes to PDF files in parallel
+
+        Args:
+            jobs: Dicts with quiz_data, quiz_name, output_path and optional
+                quiz_style and font
+
+        Returns:
+            One result dict per job, in job order (failures have "error" set)
+        """
+        jobs = [
+            dict(job, pages_per_part=self.pages_per_part, font_dirs=self.font_dirs)
+            for job in jobs
+        ]
+
+        if self.max_workers == 1 or len(jobs) <= 1:
+            results = [_render_job(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(self.max_workers, len(jobs)),
+                max_tasks_per_child=self.tasks_per_worker
+            ) as executor:
+                results = list(executor.map(_render_job, jobs))
+
+        failed = [result for result in results if result["error"]]
+        total_pages = sum(result["pages"] for result in results)
+        print(f"Rendered {len(results) - len(failed)}/{len(results)} quizzes ({total_pages} pages)")
+        for result in failed:
+            print(f"  Failed: {result['quiz_name']}: {result['error']}")
+
+        return results
+
+    def assemble_booklet(
+        self,
+        results: List[Dict],
+        output_path: Path,
+        title: str = "Quiz Booklet",
+        duplex: bool = False,
+        font: Optional[str] = None
+    ) -> Path:
+        """
+        Merge rendered quizzes into one booklet with a table of contents
+
+        Quiz files are appended one at a time, so memory is bounded by the
+        largest single quiz rather than the whole booklet.
+
+        Args:
+            results: Results from render_quizzes() (failed entries are skipped)
+            output_path: Where to save the booklet PDF
+            title: Booklet title (contents heading and document title)
+            duplex: Start every quiz on a right-hand (odd) page for double-sided printing
+            font: Font family for the contents pages
+
+        Returns:
+            Path to the booklet
+        """
+        rendered = [result for result in results if not result["error"]]
+        if not rendered:
+            raise ValueError("No rendered quizzes to assemble into a booklet")
+
+        engine = _get_worker_engine()
+
+        # Contents page count does not depend on the page numbers it lists
+        contents_pages = len(engine.layout_contents(
+            [(result["title"], 0) for result in rendered], title, font
+        ).pages)
+
+        # Plan where each quiz starts, including any blank padding pages
+        entries = []
+        padded = []
+        next_page = contents_pages + 1
+        for result in rendered:
+            pad = duplex and next_page % 2 == 0
+            if pad:
+                next_page += 1
+            padded.append(pad)
+            entries.append((result["title"], next_page))
+            next_page += result["pages"]
+
+        contents = engine.layout_contents(entries, title, font)
+        contents_pdf = io.BytesIO()
+        PDFRenderer().render(contents, contents_pdf)
+
+        if not output_path.parent.is_dir():
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with PDFPageWriter(output_path, title=title) as writer:
+            writer.add_pdf(contents_pdf.getvalue())
+            for result, pad in zip(rendered, padded):
+                if pad:
+                    writer.add_blank_page(contents.page_width, contents.page_height)
+                writer.add_pdf(Path(result["output_path"]).read_bytes())
+
+        print(f"Booklet saved: {output_path} ({next_page - 1} pages)")
+        return output_path
+
+    def render_booklet(
+        self,
+        jobs: List[Dict],
+        output_path: Path,
+        title: str = "Quiz Booklet",
+        duplex: bool = False,
+        font: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Render quizzes in parallel and assemble them into a booklet
+
+        Args:
+            jobs: Same as render_quizzes()
+            output_path: Where to save the booklet PDF
+            title: Booklet title
+            duplex: Start every quiz on an odd page
+            font: Font family for the contents pages
+
+        Returns:
+            Per-quiz results from render_quizzes()
+        """
+        results = self.render_quizzes(jobs)
+        self.assemble_booklet(results, output_path, title=title, duplex=duplex, font=font)
+        return results
@@ -0,0 +1,368 @@
+"""
+Headless batch generation - run many sources through extraction, word
+selection and rendering with bounded parallelism
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import glob
+import threading
+import time
+
+from .batch_journal import BatchJournal
+from .document_processor import SUPPORTED_EXTENSIONS
+from .metrics import GENERATION_SECONDS, GENERATIONS, STAGE_SECONDS
+from .quiz_artifact import source_hash
+from .quiz_generator import QuizGenerator
+from config import Config
+
+
+STAGES = ("extract", "select", "build", "render")
+
+# Batch job status -> quizlm_generations_total outcome
+_OUTCOMES = {"ok": "done", "failed": "failed", "skipped": "skipped"}
+
+
+def collect_sources(patterns: Iterable[str], recursive: bool = False) -> List[Path]:
+    """
+    Expand directories, globs and file paths into a list of source documents
+
+    Args:
+        patterns: Directories, glob patterns or file paths
+        recursive: Also search subdirectories of directories
+
+    Returns:
+        Supported source files in a stable order, without duplicates
+    """
+    sources: List[Path] = []
+    seen = set()
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = sorted(path.rglob("*") if recursive else path.iterdir())
+        elif glob.has_magic(pattern):
+            candidates = sorted(Path(match) for match in glob.glob(pattern, recursive=True))
+        else:
+            candidates = [path]
+
+        for candidate in candidates:
+            if not candidate.is_file() or candidate.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            resolved = candidate.resolve()
+            if resolved not in seen:
+                seen.add(resolved)
+                sources.append(candidate)
+
+    return sources
+
+
+class BatchRunner:
+    """Generates quizzes for sources x difficulties x styles"""
+
+    def __init__(
+        self,
+        config: Config,
+        concurrency: int = 4,
+        skip_existing: bool = False,
+        generator: Optional[QuizGenerator] = None,
+        journal: Optional[BatchJournal] = None
+    ):
+        """
+        Initialize batch runner
+
+        Args:
+            config: Application configuration
+            concurrency: Maximum concurrent jobs per stage (extraction, LLM
+                selection, building, rendering); stages of different sources overlap
+            skip_existing: Skip quizzes whose PDF already exists instead of failing them
+            generator: Quiz generator to use (default: a new one for config)
+            journal: Checkpoint journal; finished stages recorded there are
+                skipped, so a restarted batch resumes where it stopped
+        """
+        self.config = config
+        self.concurrency = max(1, concurrency)
+        self.skip_existing = skip_existing
+        self.generator = generator or QuizGenerator(config)
+        self.journal = journal
+        self._stage_limits = {stage: threading.Semaphore(self.concurrency) for stage in STAGES}
+
+    def plan(
+        self,
+        sources: List[Path],
+        difficulties: List[str],
+        quiz_styles: List[str]
+    ) -> List[Dict]:
+        """
+        List the quizzes a batch will produce, in summary order
+
+        Quiz names are the source file stem plus the difficulty and/or style
+        when more than one of them was requested.
+        """
+        jobs = []
+        used_names = set()
+
+        for source in sources:
+            for difficulty in difficulties:
+                for quiz_style in quiz_styles:
+                    name = source.stem
+                    if len(difficulties) > 1:
+                        name += f"_{difficulty.lower()}"
+                    if len(quiz_styles) > 1:
+                        name += f"_{quiz_style.lower().replace(' ', '_')}"
+
+                    # Same-named files from different folders get a numeric suffix
+                    quiz_name = name
+                    counter = 2
+                    while quiz_name in used_names:
+                        quiz_name = f"{name}_{counter}"
+                        counter += 1
+                    used_names.add(quiz_name)
+
+                    jobs.append({
+                        "source": str(source),
+                        "quiz_name": quiz_name,
+                        "difficulty": difficulty,
+                        "quiz_style": quiz_style
+                    })
+
+        return jobs
+
+    def run(
+        self,
+        sources: List[Path],
+        difficulties: List[str],
+        quiz_styles: List[str]
+    ) -> Dict:
+        """
+        Generate every quiz in the batch
+
+        Each source is extracted once and each (source, difficulty) pair is
+        sent to the LLM once; every style is rendered from that selection.
+        Failures are recorded per quiz and do not stop the batch. With a
+        journal, each quiz's "resumed" list names the stages that were
+        served from an earlier run.
+
+        Args:
+            sources: Source documents
+            difficulties: Difficulties to generate (Easy, Medium, Hard)
+            quiz_styles: Layout styles to render (Split Page, Full Page)
+
+        Returns:
+            Machine-readable summary dict with per-quiz status, timings and errors
+        """
+        started_at = datetime.now()
+        start = time.perf_counter()
+
+        jobs = self.plan(sources, difficulties, quiz_styles)
+        by_source: Dict[str, List[Dict]] = {}
+        for job in jobs:
+            by_source.setdefault(job["source"], []).append(job)
+
+        # Twice as many sources in flight as per-stage slots keeps every stage
+        # busy while bounding how much extracted text is held in memory
+        with ThreadPoolExecutor(max_workers=self.concurrency * 2) as executor:
+            list(executor.map(self._run_source, by_source.values()))
+
+        counts = {status: 0 for status in ("ok", "failed", "skipped")}
+        for job in jobs:
+            counts[job["status"]] += 1
+
+        return {
+            "started_at": started_at.isoformat(),
+            "seconds": round(time.perf_counter() - start, 3),
+            "concurrency": self.concurrency,
+            "total": len(jobs),
+            "succeeded": counts["ok"],
+            "failed": counts["failed"],
+            "skipped": counts["skipped"],
+            "selections": self.generator.selection_flight.stats(),
+            "quizzes": jobs
+        }
+
+    def _run_source(self, jobs: List[Dict]):
+        """Run every quiz of one source, recording results on the job dicts"""
+        for job in jobs:
+            job.update(status=None, output_path=None, error=None, stage=None, timings={}, resumed=[])
+
+        try:
+            self._process_source(jobs)
+        finally:
+            self._record_metrics(jobs)
+
+    def _process_source(self, jobs: List[Dict]):
+        """Extract, select, build and render the quizzes of one source"""
+        source = Path(jobs[0]["source"])
+
+        # Journaled text is only reused while the file is unchanged
+        cached = None
+        if self.journal is not None:
+            try:
+                cached = self.journal.get_extraction(source)
+            except OSError:
+                cached = None
+
+        pending = []
+        for job in jobs:
+            output_path = self.config.quizzes_dir / f"{job['quiz_name']}.pdf"
+            # PDFs this batch wrote itself are checked against the journal below;
+            # anything else already in the quizzes folder is left alone
+            if output_path.exists() and not self._is_journaled(job, output_path):
+                self._refuse_existing(job, output_path)
+                continue
+            pending.append(job)
+
+        if not pending:
+            return
+
+        if cached:
+            content, content_hash = cached
+            for job in pending:
+                job["resumed"].append("extract")
+        else:
+            try:
+                with self._stage("extract", pending):
+                    content = self.generator.extract_content(source, None)
+                if self.journal is not None:
+                    content_hash = self.journal.record_extraction(source, content)
+                else:
+                    content_hash = source_hash(content)
+            except Exception as e:
+                for job in pending:
+                    self._fail(job, "extract", e)
+                return
+
+        # An existing PDF is only resumed if the journal rendered it from this
+        # very content, difficulty and style; otherwise it is not overwritten
+        for job in list(pending):
+            output_path = self.config.quizzes_dir / f"{job['quiz_name']}.pdf"
+            if output_path.exists() and not self._is_journaled(job, output_path, content_hash):
+                self._refuse_existing(job, output_path)
+                pending.remove(job)
+
+        selector = self.generator.word_selector.selector_id
+        for difficulty in dict.fromkeys(job["difficulty"] for job in pending):
+            group = [job for job in pending if job["difficulty"] == difficulty]
+
+            try:
+                word_selection = None
+                if self.journal is not None:
+                    word_selection = self.journal.get_selection(content_hash, difficulty, selector)
+
+                if word_selection is not None:
+                    for job in group:
+                        job["resumed"].append("select")
+                else:
+                    with self._stage("select", group):
+                        word_selection = self.generator.select_words(content, difficulty)
+                    if self.journal is not None:
+                        self.journal.record_selection(content_hash, difficulty, selector, word_selection)
+            except Exception as e:
+                for job in group:
+                    self._fail(job, "select", e)
+                continue
+
+            for job in group:
+                stage = "build"
+                try:
+                    journaled = None
+                    if self.journal is not None:
+                        journaled = self.journal.get_quiz(
+                            job["quiz_name"], content_hash, difficulty, job["quiz_style"]
+                        )
+
+                    if journaled is not None and journaled["output_path"]:
+                        if Path(journaled["output_path"]).exists():
+                            job["resumed"].extend(["build", "render"])
+                            job.update(status="ok", output_path=journaled["output_path"])
+                            continue
+
+                    if journaled is not None:
+                        quiz_data = journaled["quiz_data"]
+                        job["resumed"].append("build")
+                    else:
+                        with self._stage("build", [job]):
+                            quiz_data = self.generator.build_quiz_data(
+                                job["quiz_name"], content, word_selection, difficulty
+                            )
+                        if self.journal is not None:
+                            self.journal.record_quiz(
+                                job["quiz_name"], content_hash, difficulty, job["quiz_style"], quiz_data
+                            )
+
+                    stage = "render"
+                    with self._stage("render", [job]):
+                        output_path = self.generator.render_quiz(
+                            job["quiz_name"], quiz_data, content, word_selection,
+                            difficulty, job["quiz_style"]
+                        )
+                    if self.journal is not None:
+                        self.journal.record_render(job["quiz_name"], output_path)
+                    # Batches do not look quizzes up in the cache (the journal
+                    # handles reruns), so indexing one is not a miss
+                    self.generator.cache_quiz(
+                        job["quiz_name"], content, difficulty, job["quiz_style"], source,
+                        count_miss=False
+                    )
+
+                    job.update(status="ok", output_path=str(output_path))
+                except Exception as e:
+                    self._fail(job, stage, e)
+
+    def _is_journaled(self, job: Dict, output_path: Path, content_hash: Optional[str] = None) -> bool:
+        """
+        Whether an existing PDF was written by a journaled run of this batch
+
+        A quiz journaled as built but not as rendered counts too: the run was
+        stopped after (or while) writing its PDF, which is re-rendered.
+        Without a content hash only the quiz name is checked; with one, the
+        journaled quiz must also match the content, difficulty and style.
+        """
+        if self.journal is None:
+            return False
+        if content_hash is None:
+            journaled = self.journal.get_quiz_record(job["quiz_name"])
+        else:
+            journaled = self.journal.get_quiz(
+                job["quiz_name"], content_hash, job["difficulty"], job["quiz_style"]
+            )
+        return journaled is not None and journaled["output_path"] in (None, str(output_path))
+
+    def _refuse_existing(self, job: Dict, output_path: Path):
+        """Skip or fail a quiz whose PDF exists but was not rendered by this batch"""
+        if self.skip_existing:
+            job.update(status="skipped", output_path=str(output_path))
+        else:
+            self._fail(job, "render", f"Quiz '{job['quiz_name']}' already exists")
+
+    @contextmanager
+    def _stage(self, stage: str, jobs: List[Dict]):
+        """Hold one of the stage's slots and record its duration on the jobs"""
+        with self._stage_limits[stage]:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                elapsed = time.perf_counter() - start
+                STAGE_SECONDS.observe(elapsed, stage=stage)
+                seconds = round(elapsed, 3)
+                for job in jobs:
+                    job["timings"][stage] = seconds
+
+    def _record_metrics(self, jobs: List[Dict]):
+        """Count each finished quiz by outcome, as generate_quiz() does"""
+        for job in jobs:
+            if job["status"] == "ok" and len(job["resumed"]) == len(STAGES):
+                # Already rendered by an earlier run
+                GENERATIONS.inc(outcome="resumed")
+                continue
+            GENERATIONS.inc(outcome=_OUTCOMES.get(job["status"], "failed"))
+            if job["status"] == "ok":
+                GENERATION_SECONDS.observe(sum(job["timings"].values()))
+
+    def _fail(self, job: Dict, stage: str, error):
+        job.update(status="failed", stage=stage, error=str(error))
+        print(f"  Failed: {job['quiz_name']} ({stage}): {error}")
@@ -0,0 +1,190 @@
+"""
+Cancellation tokens - stop or time-limit long-running work
+
+A CancelToken is a threading.Event that also counts as set once its
+deadline has passed, so code that already polls a cancel event (the
+generation pipeline, OCR and render loops) honours deadlines for free.
+Blocking calls that cannot poll - LLM requests, OCR and PDF rasterizing
+subprocesses - are given the token's remaining time as their timeout.
+LLM requests are also awaited through call_cancellable(), so an explicit
+cancel stops waiting on them at once; a page being OCRed or rasterized is
+still waited for, bounded by the OCR timeout.
+"""
+
+from typing import Any, Callable, Optional
+import threading
+import time
+
+
+# Longest a wait() sleeps before re-checking the deadline and parent token
+_POLL_INTERVAL = 0.1
+
+
+class GenerationCancelled(Exception):
+    """Raised when quiz generation (or training) is cancelled by the caller"""
+
+    def __init__(self, message: str = "Cancelled", stage: Optional[str] = None):
+        super().__init__(message)
+        # Stage that was running when the work stopped (e.g. "extract", "select")
+        self.stage = stage
+
+
+class DeadlineExceeded(GenerationCancelled):
+    """Raised when work runs past its deadline"""
+
+
+class CancelToken(threading.Event):
+    """Cancel event with an optional deadline, linked to an optional parent event"""
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional[threading.Event] = None):
+        """
+        Create a token
+
+        Args:
+            timeout: Seconds from now until the token expires (None: no deadline)
+            parent: Event whose cancellation also cancels this token; a parent
+                token's earlier deadline is inherited
+        """
+        super().__init__()
+        self.parent = parent
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+        parent_deadline = getattr(parent, "deadline", None)
+        if parent_deadline is not None and (self.deadline is None or parent_deadline < self.deadline):
+            self.deadline = parent_deadline
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def is_set(self) -> bool:
+        return (
+            super().is_set()
+            or self.expired
+            or (self.parent is not None and self.parent.is_set())
+        )
+
+    def cancel(self):
+        """Cancel the token (same as set())"""
+        self.set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline, or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def timeout(self, default: Optional[float] = None, stage: Optional[str] = None) -> Optional[float]:
+        """
+        Timeout for a blocking call: the smaller of default and the time remaining
+
+        Args:
+            default: The call's own timeout (None or 0: unlimited)
+            stage: Stage being run, reported if the token is already cancelled
+
+        Raises:
+            GenerationCancelled: If the token is already cancelled or expired
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if default is None or default <= 0:
+            return remaining
+        return min(default, remaining)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        end = time.monotonic() + timeout if timeout is not None else None
+        while not self.is_set():
+            step = _POLL_INTERVAL
+            if end is not None:
+                step = min(step, end - time.monotonic())
+                if step <= 0:
+                    return False
+            super().wait(step)
+        return True
+
+    def check(self, stage: Optional[str] = None):
+        """
+        Raise if the token is cancelled or expired
+
+        Args:
+            stage: Stage being run, reported on the exception
+        """
+        if self.is_set():
+            raise self.error(stage)
+
+    def error(self, stage: Optional[str] = None) -> GenerationCancelled:
+        """The exception describing why work stopped"""
+        where = f" during {stage}" if stage else ""
+        if self.expired:
+            return DeadlineExceeded(f"Deadline exceeded{where}", stage)
+        return GenerationCancelled(f"Cancelled{where}", stage)
+
+
+def check_cancelled(cancel: Optional[threading.Event], stage: Optional[str] = None):
+    """Raise GenerationCancelled if a (possibly plain) cancel event is set"""
+    if cancel is None or not cancel.is_set():
+        return
+    if isinstance(cancel, CancelToken):
+        raise cancel.error(stage)
+    raise GenerationCancelled(f"Cancelled during {stage}" if stage else "Cancelled", stage)
+
+
+def call_cancellable(
+    fn: Callable[[], Any],
+    cancel: Optional[threading.Event],
+    stage: Optional[str] = None
+) -> Any:
+    """
+    Run a blocking call, giving up on it as soon as cancel is set
+
+    The call runs on a daemon helper thread while the caller polls cancel.
+    A cancelled caller returns at once; the abandoned call finishes or hits
+    its own timeout in the background and its result is discarded.
+
+    Args:
+        fn: The blocking call
+        cancel: Cancel event or CancelToken (None: just call fn)
+        stage: Stage being run, reported on the exception
+
+    Returns:
+        What fn returned
+
+    Raises:
+        Whatever fn raised, or GenerationCancelled once cancel is set
+    """
+    if cancel is None:
+        return fn()
+
+    outcome = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            outcome["result"] = fn()
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    threading.Thread(target=run, name="quizlm-cancellable", daemon=True).start()
+    while not done.wait(_POLL_INTERVAL):
+        check_cancelled(cancel, stage)
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def timeout_for(
+    cancel: Optional[threading.Event],
+    default: Optional[float] = None,
+    stage: Optional[str] = None
+) -> Optional[float]:
+    """Timeout for a blocking call made on behalf of a (possibly plain) cancel event"""
+    if isinstance(cancel, CancelToken):
+        return cancel.timeout(default, stage)
+    check_cancelled(cancel, stage)
+    return default
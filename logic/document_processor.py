@@ -2,9 +2,16 @@
 Document processing - extract text from various file formats
 """
 
+from contextlib import closing
 from pathlib import Path
-from typing import Union
-import mimetypes
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+import codecs
+import mmap
+import re
+import threading
+import time
+import zipfile
 
 # Import document processing libraries
 try:
@@ -12,67 +19,170 @@ try:
 except ImportError:
     PyPDF2 = None
 
-try:
-    from docx import Document
-except ImportError:
-    Document = None
-
 try:
     from PIL import Image
-    import pytesseract
 except ImportError:
     Image = None
-    pytesseract = None
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
 except ImportError:
     convert_from_path = None
+    pdfinfo_from_path = None
 
+from .cancellation import GenerationCancelled, check_cancelled, timeout_for
+from .ocr_engine import OCREngine, create_ocr_engine
+from .metrics import OCR_PAGE_SECONDS
+from .ocr_preprocessor import OCRPreprocessor
+from .tracing import span
 from config import Config
 
 
+# WordprocessingML element tags used by the streaming DOCX extractor
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = f"{_W_NS}body"
+_W_P = f"{_W_NS}p"
+_W_R = f"{_W_NS}r"
+_W_T = f"{_W_NS}t"
+_W_TAB = f"{_W_NS}tab"
+_W_BR = f"{_W_NS}br"
+_W_CR = f"{_W_NS}cr"
+_W_TBL = f"{_W_NS}tbl"
+_W_TR = f"{_W_NS}tr"
+_W_TC = f"{_W_NS}tc"
+
+# Plain text ingestion: bytes sniffed for the encoding, bytes decoded per
+# step, and the longest paragraph buffered before it is cut at a line break
+_TEXT_SNIFF_SIZE = 64 * 1024
+_TEXT_BLOCK_SIZE = 1024 * 1024
+_MAX_TEXT_PARAGRAPH = 64 * 1024
+_PARAGRAPH_BREAK = re.compile(r'\n[ \t\f\v]*\n\s*')
+
+# File types process_document() can read
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt', '.png', '.jpg', '.jpeg')
+
+
 class DocumentProcessor:
     """Processes various document formats to extract text content"""
 
     def __init__(self, config: Config):
         self.config = config
+        self.ocr_engine = None
+        self._ocr_engine_lock = threading.Lock()
+        self.ocr_preprocessor = None
+        if Image is not None:
+            self.ocr_preprocessor = OCRPreprocessor(
+                min_dpi=config.ocr_min_dpi,
+                max_dpi=config.ocr_max_dpi,
+                probe_dpi=config.ocr_probe_dpi
+            )
 
-    def process_document(self, file_path: Path) -> str:
+    def process_document(
+        self,
+        file_path: Path,
+        cancel: Optional[threading.Event] = None,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Process a document and extract its text content
 
         Args:
             file_path: Path to document file
+            cancel: Cancel event or CancelToken (see iter_document())
+            progress: Receives status messages (see iter_document())
 
         Returns:
             Extracted text content
         """
+        return "\n\n".join(unit["text"] for unit in self.iter_document(file_path, cancel, progress))
+
+    def iter_document(
+        self,
+        file_path: Path,
+        cancel: Optional[threading.Event] = None,
+        progress: Optional[Callable[[str], None]] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream text units from a document as they are extracted
+
+        Units are yielded page by page (PDF, OCR) or paragraph by paragraph
+        (DOCX, TXT) so downstream stages can start before extraction finishes.
+
+        Args:
+            file_path: Path to document file
+            cancel: Cancel event or CancelToken, checked between units; a
+                token's remaining time also bounds each OCR and rasterizing call
+            progress: Receives status messages such as per-page OCR results
+                and warnings (default: print them)
+
+        Yields:
+            Dictionary with:
+                - text: Extracted text of this unit
+                - source: Extraction path ("pdf", "ocr", "docx", "text", "image")
+                - page: 1-based page number (None when not paged)
+                - paragraph: 1-based paragraph number (None when page-level)
+                - cell: (table, row, column), 1-based, for DOCX table cells
+                - ocr: OCR stats for OCR'd units (dpi/scale, seconds, confidence)
+        """
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Determine file type
-        mime_type, _ = mimetypes.guess_type(str(file_path))
         suffix = file_path.suffix.lower()
+        report = progress or print
 
-        # Process based on file type
+        # Dispatch based on file type
         if suffix == '.pdf':
-            return self._process_pdf(file_path)
+            units = self._iter_pdf(file_path, cancel, report)
         elif suffix == '.docx':
-            return self._process_docx(file_path)
+            units = self._iter_docx(file_path)
         elif suffix == '.txt':
-            return self._process_text(file_path)
+            units = self._iter_text(file_path, report)
         elif suffix in ['.png', '.jpg', '.jpeg']:
-            return self._process_image(file_path)
+            units = self._iter_image(file_path, cancel, report)
         else:
             raise ValueError(f"Unsupported file type: {suffix}")
 
-    def _process_pdf(self, file_path: Path) -> str:
-        """Extract text from PDF file (with OCR fallback for scanned PDFs)"""
+        if cancel is None:
+            return units
+        return self._until_cancelled(units, cancel)
+
+    def _until_cancelled(self, units: Iterator[Dict], cancel: threading.Event) -> Iterator[Dict]:
+        """Stop extraction (closing the underlying reader) once cancel is set"""
+        with closing(units):
+            for unit in units:
+                check_cancelled(cancel, "extract")
+                yield unit
+
+    def _text_unit(
+        self,
+        text: str,
+        source: str,
+        page: Optional[int] = None,
+        paragraph: Optional[int] = None,
+        cell: Optional[Tuple[int, int, int]] = None,
+        ocr: Optional[Dict] = None
+    ) -> Dict:
+        """Build a text unit dict with its source location"""
+        return {
+            "text": text,
+            "source": source,
+            "page": page,
+            "paragraph": paragraph,
+            "cell": cell,
+            "ocr": ocr
+        }
+
+    def _iter_pdf(
+        self,
+        file_path: Path,
+        cancel: Optional[threading.Event],
+        report: Callable[[str], None]
+    ) -> Iterator[Dict]:
+        """Stream page text from PDF file (with OCR fallback for scanned PDFs)"""
         if PyPDF2 is None:
             raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
 
-        text_parts = []
+        pages_with_text = 0
 
         try:
             # First, try standard text extraction
@@ -83,26 +193,31 @@ class DocumentProcessor:
                     raise ValueError("PDF file has no pages")
 
                 for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    page_text = page.extract_text()
+                    with span("extract.page", page=page_num + 1) as page_span:
+                        page_text = reader.pages[page_num].extract_text()
+                        page_span.set(chars=len(page_text or ""))
 
                     if page_text and page_text.strip():
-                        text_parts.append(page_text)
+                        pages_with_text += 1
+                        yield self._text_unit(page_text, "pdf", page=page_num + 1)
                     else:
-                        print(f"Warning: Page {page_num + 1} has no extractable text")
+                        report(f"Warning: Page {page_num + 1} has no extractable text")
 
         except Exception as e:
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
 
         # If no text extracted, try OCR fallback
-        if not text_parts:
-            print("No text found in PDF. Attempting OCR on scanned pages...")
-            return self._process_pdf_with_ocr(file_path)
-
-        return "\n\n".join(text_parts)
-
-    def _process_pdf_with_ocr(self, file_path: Path) -> str:
-        """Extract text from scanned PDF using OCR"""
+        if pages_with_text == 0:
+            report("No text found in PDF. Attempting OCR on scanned pages...")
+            yield from self._iter_pdf_with_ocr(file_path, cancel, report)
+
+    def _iter_pdf_with_ocr(
+        self,
+        file_path: Path,
+        cancel: Optional[threading.Event],
+        report: Callable[[str], None]
+    ) -> Iterator[Dict]:
+        """Stream page text from scanned PDF using OCR"""
         if convert_from_path is None:
             raise ImportError(
                 "pdf2image not installed. Install with: pip install pdf2image\n"
@@ -112,78 +227,349 @@ class DocumentProcessor:
                 "  - Windows: Download from https://github.com/oschwartz10612/poppler-windows"
             )
 
-        if Image is None or pytesseract is None:
-            raise ImportError(
-                "PIL/pytesseract not installed. "
-                "Install with: pip install Pillow pytesseract\n"
-                "Note: Tesseract OCR must also be installed:\n"
-                "  - macOS: brew install tesseract\n"
-                "  - Ubuntu/Debian: apt-get install tesseract-ocr\n"
-                "  - Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki"
-            )
+        if Image is None:
+            raise ImportError("Pillow not installed. Install with: pip install Pillow")
+        self._get_ocr_engine()
 
-        text_parts = []
+        total_chars = 0
 
         try:
-            print(f"Converting PDF pages to images for OCR...")
-            # Convert PDF pages to images
-            images = convert_from_path(file_path, dpi=300)
-            print(f"Processing {len(images)} page(s) with OCR...")
-
-            # OCR each page
-            for page_num, image in enumerate(images, start=1):
-                print(f"  OCR processing page {page_num}...")
-                page_text = pytesseract.image_to_string(image)
+            report("Converting PDF pages to images for OCR...")
+            num_pages = pdfinfo_from_path(file_path, timeout=self._ocr_timeout(cancel))["Pages"]
+            report(f"Processing {num_pages} page(s) with OCR...")
+
+            # Rasterize and recognize one page at a time so each page is
+            # yielded as soon as it is ready instead of after the whole file
+            for page_num in range(1, num_pages + 1):
+                check_cancelled(cancel, "extract")
+
+                # Measure text size on a cheap probe, then rasterize only as
+                # finely as that text needs. Each poppler call is killed if it
+                # runs past the OCR timeout or the caller's deadline
+                with span("ocr.rasterize", page=page_num) as raster_span:
+                    probe = convert_from_path(
+                        file_path, dpi=self.ocr_preprocessor.probe_dpi,
+                        first_page=page_num, last_page=page_num, grayscale=True,
+                        timeout=self._ocr_timeout(cancel)
+                    )[0]
+                    dpi = self.ocr_preprocessor.choose_dpi(probe)
+                    image = convert_from_path(
+                        file_path, dpi=dpi,
+                        first_page=page_num, last_page=page_num, grayscale=True,
+                        timeout=self._ocr_timeout(cancel)
+                    )[0]
+                    raster_span.set(dpi=dpi)
+
+                page_text, ocr_stats = self._recognize(image, cancel=cancel)
+                ocr_stats["dpi"] = dpi
+                report(
+                    f"  OCR page {page_num}: {dpi} dpi, {ocr_stats['seconds']:.2f}s, "
+                    f"confidence {ocr_stats['confidence']:.1f}"
+                )
 
                 if page_text and page_text.strip():
-                    text_parts.append(page_text)
+                    total_chars += len(page_text)
+                    yield self._text_unit(page_text, "ocr", page=page_num, ocr=ocr_stats)
                 else:
-                    print(f"  Warning: No text extracted from page {page_num}")
+                    report(f"  Warning: No text extracted from page {page_num}")
 
+        except GenerationCancelled:
+            raise
         except Exception as e:
+            # A call killed by the caller's deadline is reported as such
+            check_cancelled(cancel, "extract")
             raise ValueError(
                 f"Failed to OCR PDF. Make sure poppler and tesseract are installed.\n"
                 f"Error: {str(e)}"
             )
 
-        if not text_parts:
+        if total_chars == 0:
             raise ValueError(
                 "PDF contains no extractable text even with OCR. "
                 "The pages may be blank or the image quality may be too poor."
             )
 
-        print(f"OCR completed successfully. Extracted {len(''.join(text_parts))} characters.")
-        return "\n\n".join(text_parts)
+        report(f"OCR completed successfully. Extracted {total_chars} characters.")
 
-    def _process_docx(self, file_path: Path) -> str:
-        """Extract text from Word document"""
-        if Document is None:
-            raise ImportError("python-docx not installed. Install with: pip install python-docx")
+    def _iter_docx(self, file_path: Path) -> Iterator[Dict]:
+        """
+        Stream paragraph and table-cell text from Word document
 
-        doc = Document(str(file_path))
+        Reads word/document.xml straight out of the zip with an incremental
+        parser instead of building the python-docx object tree, so memory
+        stays flat regardless of document size. Body paragraphs and table
+        cells are yielded in document order.
+        """
+        paragraph_num = 0
+        table_num = 0
+        # One entry per open table: [table_num, row, column]
+        table_stack = []
+        # Text collected so far for each open table cell (tables can nest)
+        cell_stack = []
+        # Runs of each open paragraph (text boxes can nest paragraphs)
+        paragraph_stack = []
+        # Open w:r elements of each open paragraph; w:tab also defines tab
+        # stops in paragraph properties, so it is only text inside a run
+        run_depths = []
+        depth = 0
+        body = None
 
-        text_parts = []
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_parts.append(paragraph.text)
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                with archive.open("word/document.xml") as xml_file:
+                    for event, elem in ElementTree.iterparse(xml_file, events=("start", "end")):
+                        tag = elem.tag
+
+                        if event == "start":
+                            depth += 1
+                            if tag == _W_BODY:
+                                body = elem
+                            elif tag == _W_P:
+                                paragraph_stack.append([])
+                                run_depths.append(0)
+                            elif tag == _W_R and run_depths:
+                                run_depths[-1] += 1
+                            elif tag == _W_TBL:
+                                table_num += 1
+                                table_stack.append([table_num, 0, 0])
+                            elif tag == _W_TR and table_stack:
+                                table_stack[-1][1] += 1
+                                table_stack[-1][2] = 0
+                            elif tag == _W_TC and table_stack:
+                                table_stack[-1][2] += 1
+                                cell_stack.append([])
+                            continue
+
+                        depth -= 1
+
+                        if tag == _W_T and paragraph_stack:
+                            paragraph_stack[-1].append(elem.text or "")
+                        elif tag == _W_TAB and run_depths and run_depths[-1]:
+                            paragraph_stack[-1].append("\t")
+                        elif tag in (_W_BR, _W_CR) and run_depths and run_depths[-1]:
+                            paragraph_stack[-1].append("\n")
+                        elif tag == _W_R and run_depths:
+                            run_depths[-1] -= 1
+                        elif tag == _W_P and paragraph_stack:
+                            run_depths.pop()
+                            text = "".join(paragraph_stack.pop())
+                            if cell_stack:
+                                cell_stack[-1].append(text)
+                            elif text.strip():
+                                paragraph_num += 1
+                                yield self._text_unit(text, "docx", paragraph=paragraph_num)
+                        elif tag == _W_TC and cell_stack:
+                            text = "\n".join(part for part in cell_stack.pop() if part.strip())
+                            if cell_stack:
+                                # A nested table's cell reads as part of its enclosing cell
+                                cell_stack[-1].append(text)
+                            elif text:
+                                yield self._text_unit(
+                                    text, "docx", cell=tuple(table_stack[-1])
+                                )
+                        elif tag == _W_TBL and table_stack:
+                            table_stack.pop()
+
+                        # Drop parsed content so memory does not grow with the document
+                        if tag in (_W_P, _W_TC, _W_TBL):
+                            elem.clear()
+                        if body is not None and depth == 2:
+                            body.clear()
+
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+            raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
+
+    def _iter_text(self, file_path: Path, report: Callable[[str], None]) -> Iterator[Dict]:
+        """
+        Stream paragraphs from plain text file
 
-        return "\n\n".join(text_parts)
+        The file is memory-mapped and decoded incrementally in blocks, so
+        multi-hundred-megabyte transcripts are never held in memory whole.
+        The encoding is sniffed from a prefix (BOM, then UTF-8, then
+        Windows-1252/Latin-1) instead of assuming UTF-8.
+        """
+        if file_path.stat().st_size == 0:
+            return
+
+        paragraph_num = 0
+        buffer = ""
+
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                encoding, offset = self._sniff_encoding(data[:_TEXT_SNIFF_SIZE])
+                decoder = codecs.getincrementaldecoder(encoding)()
+
+                while offset < len(data):
+                    block = data[offset:offset + _TEXT_BLOCK_SIZE]
+                    offset += len(block)
+                    final = offset >= len(data)
+
+                    pending, _ = decoder.getstate()
+                    try:
+                        text = decoder.decode(block, final=final)
+                    except UnicodeDecodeError:
+                        # Prefix looked like UTF-8 but the rest of the file is not;
+                        # re-decode from the failed block with the single-byte fallback
+                        report(f"Warning: {file_path.name} is not valid {encoding}, "
+                               f"decoding the rest as latin-1")
+                        encoding = "latin-1"
+                        decoder = codecs.getincrementaldecoder(encoding)()
+                        text = decoder.decode(pending + block, final=final)
+
+                    # Hold back a trailing CR in case its LF starts the next block
+                    buffer += text
+                    if buffer.endswith("\r") and not final:
+                        buffer, carry = buffer[:-1], "\r"
+                    else:
+                        carry = ""
+                    buffer = buffer.replace("\r\n", "\n").replace("\r", "\n")
 
-    def _process_text(self, file_path: Path) -> str:
-        """Read plain text file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+                    paragraphs, buffer = self._split_paragraphs(buffer)
+                    buffer += carry
+                    for paragraph in paragraphs:
+                        paragraph_num += 1
+                        yield self._text_unit(paragraph, "text", paragraph=paragraph_num)
 
-    def _process_image(self, file_path: Path) -> str:
-        """Extract text from image using OCR"""
-        if Image is None or pytesseract is None:
-            raise ImportError(
-                "PIL/pytesseract not installed. "
-                "Install with: pip install Pillow pytesseract"
-            )
+        paragraph = buffer.strip("\n")
+        if paragraph.strip():
+            paragraph_num += 1
+            yield self._text_unit(paragraph, "text", paragraph=paragraph_num)
+
+    def _sniff_encoding(self, prefix: bytes) -> Tuple[str, int]:
+        """
+        Guess a text file's encoding from its first bytes
+
+        Args:
+            prefix: Leading bytes of the file
+
+        Returns:
+            Tuple of (codec name, number of BOM bytes to skip)
+        """
+        for bom, encoding in (
+            (codecs.BOM_UTF8, "utf-8"),
+            (codecs.BOM_UTF32_LE, "utf-32-le"),
+            (codecs.BOM_UTF32_BE, "utf-32-be"),
+            (codecs.BOM_UTF16_LE, "utf-16-le"),
+            (codecs.BOM_UTF16_BE, "utf-16-be"),
+        ):
+            if prefix.startswith(bom):
+                return encoding, len(bom)
+
+        try:
+            # Not final: the prefix may end in the middle of a multi-byte character
+            codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+            return "utf-8", 0
+        except UnicodeDecodeError:
+            pass
+
+        try:
+            prefix.decode("cp1252")
+            return "cp1252", 0
+        except UnicodeDecodeError:
+            return "latin-1", 0
+
+    def _split_paragraphs(self, text: str) -> Tuple[List[str], str]:
+        """
+        Split complete paragraphs off the front of a decoded text buffer
+
+        Args:
+            text: Decoded text with normalized newlines
+
+        Returns:
+            Tuple of (complete non-empty paragraphs, unfinished remainder)
+        """
+        paragraphs = []
+        start = 0
+        for match in _PARAGRAPH_BREAK.finditer(text):
+            paragraph = text[start:match.start()].strip("\n")
+            if paragraph.strip():
+                paragraphs.append(paragraph)
+            start = match.end()
+
+        remainder = text[start:]
+
+        # Logs and transcripts may never have a blank line; cut overlong
+        # paragraphs at a line break so the buffer stays bounded
+        while len(remainder) > _MAX_TEXT_PARAGRAPH:
+            cut = remainder.rfind("\n", 0, _MAX_TEXT_PARAGRAPH)
+            if cut <= 0:
+                cut = _MAX_TEXT_PARAGRAPH
+            paragraph = remainder[:cut].strip("\n")
+            if paragraph.strip():
+                paragraphs.append(paragraph)
+            remainder = remainder[cut:]
+
+        return paragraphs, remainder
+
+    def _iter_image(
+        self,
+        file_path: Path,
+        cancel: Optional[threading.Event],
+        report: Callable[[str], None]
+    ) -> Iterator[Dict]:
+        """Stream text from image using OCR (a single page-level unit)"""
+        if Image is None:
+            raise ImportError("Pillow not installed. Install with: pip install Pillow")
 
         image = Image.open(file_path)
-        text = pytesseract.image_to_string(image)
+        scale = self.ocr_preprocessor.choose_scale(image)
+        text, ocr_stats = self._recognize(image, scale=scale, cancel=cancel)
+        ocr_stats["scale"] = scale
+        report(
+            f"OCR {file_path.name}: scale {scale:.2f}, {ocr_stats['seconds']:.2f}s, "
+            f"confidence {ocr_stats['confidence']:.1f}"
+        )
+
+        yield self._text_unit(text, "image", page=1, ocr=ocr_stats)
+
+    def _recognize(
+        self,
+        image,
+        scale: float = 1.0,
+        cancel: Optional[threading.Event] = None
+    ) -> Tuple[str, Dict]:
+        """
+        Preprocess and OCR a single page image
 
-        return text
+        Args:
+            image: Page image
+            scale: Resampling factor applied before recognition
+            cancel: Cancel event or CancelToken; recognition is aborted once
+                the OCR timeout or the token's deadline is reached
 
+        Returns:
+            Tuple of (recognized text, stats dict with seconds and confidence)
+        """
+        start = time.perf_counter()
+
+        with span("ocr.preprocess", scale=scale):
+            prepared = self.ocr_preprocessor.prepare(image, scale=scale)
+        with span("ocr.recognize", engine=self._get_ocr_engine().name) as ocr_span:
+            try:
+                text, confidence = self._get_ocr_engine().recognize(prepared, timeout=self._ocr_timeout(cancel))
+            except Exception:
+                check_cancelled(cancel, "extract")
+                raise
+            ocr_span.set(chars=len(text), confidence=round(confidence, 1))
+
+        seconds = time.perf_counter() - start
+        OCR_PAGE_SECONDS.observe(seconds, engine=self._get_ocr_engine().name)
+        stats = {
+            "seconds": round(seconds, 3),
+            "confidence": round(confidence, 1),
+            "engine": self._get_ocr_engine().name
+        }
+
+        return text, stats
+
+    def _ocr_timeout(self, cancel: Optional[threading.Event]) -> Optional[float]:
+        """Seconds one OCR or rasterizing call may take (None: unlimited)"""
+        return timeout_for(cancel, self.config.ocr_timeout or None, "extract")
+
+    def _get_ocr_engine(self) -> OCREngine:
+        """Get the shared OCR engine, creating it on first use"""
+        if self.ocr_engine is None:
+            with self._ocr_engine_lock:
+                if self.ocr_engine is None:
+                    self.ocr_engine = create_ocr_engine(self.config.ocr_engine)
+        return self.ocr_engine
@@ -0,0 +1,221 @@
+"""
+Font registry - resolves font families to registered PDF faces
+
+TrueType files are parsed once per process and shared by every layout and
+render. ReportLab embeds only the glyphs a document actually uses, so custom
+fonts add little to the size of a quiz PDF.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import sys
+import threading
+
+try:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+except ImportError:
+    pdfmetrics = None
+    TTFont = None
+
+
+DEFAULT_FONT = "Helvetica"
+
+# Built-in PDF fonts need no embedding: family -> (regular, bold)
+_STANDARD_FAMILIES = {
+    "helvetica": ("Helvetica", "Helvetica-Bold"),
+    "arial": ("Helvetica", "Helvetica-Bold"),
+    "times": ("Times-Roman", "Times-Bold"),
+    "times-roman": ("Times-Roman", "Times-Bold"),
+    "courier": ("Courier", "Courier-Bold"),
+}
+
+# File name patterns tried for each face, e.g. Verdana.ttf / verdanab.ttf
+_REGULAR_PATTERNS = ("{}.ttf", "{}-Regular.ttf", "{}Regular.ttf", "{} Regular.ttf")
+_BOLD_PATTERNS = ("{}-Bold.ttf", "{}Bold.ttf", "{} Bold.ttf", "{}bd.ttf", "{}b.ttf")
+
+# Word widths kept per face and size before the table is cleared; a
+# long-running service would otherwise keep every token it ever measured
+MAX_CACHED_WIDTHS = 50000
+
+
+def _system_font_dirs() -> List[Path]:
+    """Platform font directories searched after any configured ones"""
+    if sys.platform == "win32":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        return [Path(windir) / "Fonts"]
+    if sys.platform == "darwin":
+        return [
+            Path.home() / "Library" / "Fonts",
+            Path("/Library/Fonts"),
+            Path("/System/Library/Fonts"),
+        ]
+    return [
+        Path.home() / ".fonts",
+        Path.home() / ".local" / "share" / "fonts",
+        Path("/usr/local/share/fonts"),
+        Path("/usr/share/fonts"),
+    ]
+
+
+class FontRegistry:
+    """Process-wide cache of parsed fonts and their width tables"""
+
+    def __init__(self, font_dirs: Optional[Iterable[Path]] = None):
+        """
+        Initialize font registry
+
+        Args:
+            font_dirs: Directories searched for TrueType files before the
+                system font directories
+        """
+        if pdfmetrics is None:
+            raise ImportError("reportlab not installed. Install with: pip install reportlab")
+
+        self._font_dirs: List[Path] = [Path(d) for d in font_dirs or []]
+        self._file_index: Optional[Dict[str, Path]] = None
+        self._families: Dict[str, Tuple[str, str]] = {}
+        self._files: Dict[str, str] = {}
+        self._width_caches: Dict[Tuple[str, float], Dict[str, float]] = {}
+        self._lock = threading.RLock()
+
+    def add_font_dir(self, path: Path):
+        """Search a directory for font files ahead of the system font directories"""
+        path = Path(path)
+        with self._lock:
+            if path in self._font_dirs:
+                return
+            self._font_dirs.append(path)
+            self._file_index = None
+            # Families that fell back to Helvetica may be found now
+            for family, faces in list(self._families.items()):
+                if faces == _STANDARD_FAMILIES["helvetica"] and family not in _STANDARD_FAMILIES:
+                    del self._families[family]
+
+    def resolve(self, family: Optional[str]) -> Tuple[str, str]:
+        """
+        Get the registered (regular, bold) face names for a font family
+
+        TrueType families are looked up in the font directories and parsed
+        on first use; later calls are a dictionary lookup. Unknown families
+        fall back to Helvetica with a warning.
+
+        Args:
+            family: Font family name, e.g. "Verdana" (None = Helvetica)
+
+        Returns:
+            Tuple of (regular face name, bold face name)
+        """
+        family = (family or DEFAULT_FONT).strip()
+        key = family.lower()
+        faces = self._families.get(key)
+        if faces is not None:
+            return faces
+
+        with self._lock:
+            faces = self._families.get(key)
+            if faces is None:
+                faces = self._load_family(family)
+                self._families[key] = faces
+            return faces
+
+    def register_file(self, face_name: str, path: str):
+        """
+        Register a TrueType face under a name (no-op if already registered)
+
+        Args:
+            face_name: Name used in layouts, e.g. "Verdana-Bold"
+            path: Path to the .ttf file
+        """
+        if face_name in self._files:
+            return
+
+        with self._lock:
+            if face_name in self._files:
+                return
+            if face_name not in pdfmetrics.getRegisteredFontNames():
+                # Parsing is the expensive part; it happens once per process
+                pdfmetrics.registerFont(TTFont(face_name, str(path)))
+            self._files[face_name] = str(path)
+
+    def font_files(self, face_names: Iterable[str]) -> Tuple[Tuple[str, str], ...]:
+        """(face name, file path) pairs for the TrueType faces among face_names"""
+        return tuple(
+            (name, self._files[name])
+            for name in sorted(set(face_names))
+            if name in self._files
+        )
+
+    def width_cache(self, face_name: str, font_size: float) -> Dict[str, float]:
+        """Shared word width table for a face and size (cleared once it grows past MAX_CACHED_WIDTHS)"""
+        key = (face_name, font_size)
+        widths = self._width_caches.get(key)
+        if widths is None:
+            widths = self._width_caches.setdefault(key, {})
+        elif len(widths) > MAX_CACHED_WIDTHS:
+            # Clearing in place keeps tables already handed out valid
+            widths.clear()
+        return widths
+
+    def _load_family(self, family: str) -> Tuple[str, str]:
+        """Find and register a family's faces"""
+        standard = _STANDARD_FAMILIES.get(family.lower())
+        if standard:
+            return standard
+
+        regular_path = self._find_face(family, _REGULAR_PATTERNS)
+        if regular_path is None:
+            print(f"Warning: Font '{family}' not found, using {DEFAULT_FONT}")
+            return _STANDARD_FAMILIES["helvetica"]
+
+        regular = family
+        self.register_file(regular, str(regular_path))
+
+        # Families without a bold file use the regular face for headings
+        bold_path = self._find_face(family, _BOLD_PATTERNS)
+        if bold_path is None:
+            return regular, regular
+
+        bold = f"{family}-Bold"
+        self.register_file(bold, str(bold_path))
+        return regular, bold
+
+    def _find_face(self, family: str, patterns: Tuple[str, ...]) -> Optional[Path]:
+        """Look up a font file by the usual naming patterns (case-insensitive)"""
+        index = self._get_file_index()
+        names = [family, family.replace(" ", "")]
+        for pattern in patterns:
+            for name in names:
+                path = index.get(pattern.format(name).lower())
+                if path is not None:
+                    return path
+        return None
+
+    def _get_file_index(self) -> Dict[str, Path]:
+        """Map lowercase file names to paths; earlier directories win"""
+        if self._file_index is None:
+            index: Dict[str, Path] = {}
+            for font_dir in self._font_dirs + _system_font_dirs():
+                if not font_dir.is_dir():
+                    continue
+                for root, _, files in os.walk(font_dir):
+                    for name in files:
+                        if name.lower().endswith(".ttf"):
+                            index.setdefault(name.lower(), Path(root) / name)
+            self._file_index = index
+        return self._file_index
+
+
+_registry: Optional[FontRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_font_registry() -> FontRegistry:
+    """Get the process-wide font registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FontRegistry()
+    return _registry
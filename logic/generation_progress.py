@@ -0,0 +1,193 @@
+"""
+Progress reporting for quiz generation
+
+Each generate_quiz() call gets its own ProgressTracker, so concurrent calls
+never share progress state. The tracker turns stage activity into event
+dicts for the caller's callback (or prints their messages when there is no
+callback) and collects per-stage timings and LLM token usage for the
+GenerationResult.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import threading
+import time
+
+from .tracing import span
+
+
+# Share of overall progress each stage accounts for
+STAGE_WEIGHTS = {"extract": 20, "select": 55, "build": 10, "render": 15}
+
+
+@dataclass
+class GenerationResult:
+    """Everything generate_quiz() produced"""
+
+    quiz_name: str
+    pdf_path: Path
+    artifact_path: Optional[Path]
+    metadata_path: Path
+    metadata: dict
+    timings: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    token_usage: Dict[str, int] = field(default_factory=dict)
+    reused_from: Optional[str] = None
+    trace_path: Optional[Path] = None
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form"""
+        return {
+            "quiz_name": self.quiz_name,
+            "pdf_path": str(self.pdf_path),
+            "artifact_path": str(self.artifact_path) if self.artifact_path else None,
+            "metadata_path": str(self.metadata_path),
+            "metadata": self.metadata,
+            "timings": dict(self.timings),
+            "total_seconds": self.total_seconds,
+            "token_usage": dict(self.token_usage),
+            "reused_from": self.reused_from,
+            "trace_path": str(self.trace_path) if self.trace_path else None
+        }
+
+
+class ProgressTracker:
+    """
+    Progress of one quiz generation
+
+    Events passed to the callback are dicts with:
+        - quiz_name: Quiz being generated
+        - type: "stage" (a unit of stage work finished), "message" or "done"
+        - stage: Stage the event belongs to (extract, select, build, render)
+        - percent: Overall progress, 0-100, never decreasing
+        - message: Human-readable text, or None
+        - elapsed: Seconds since generation started
+        - timings: Seconds spent in each stage so far
+        - tokens: LLM token usage so far (input_tokens, output_tokens)
+
+    Callbacks may be called from pipeline worker threads.
+    """
+
+    def __init__(self, quiz_name: str, callback: Optional[Callable[[dict], None]] = None):
+        """
+        Initialize tracker
+
+        Args:
+            quiz_name: Quiz being generated
+            callback: Receives each event; None prints event messages instead
+        """
+        self.quiz_name = quiz_name
+        self.callback = callback
+        self.start = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+        self.tokens = {"input_tokens": 0, "output_tokens": 0}
+
+        self._lock = threading.Lock()
+        self._done = {stage: 0 for stage in STAGE_WEIGHTS}
+        self._total_chunks: Optional[int] = None
+        self._percent = 0
+        self._stage = "extract"
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Add the time spent in the block to the stage's timing (and trace it as a span)"""
+        with self._lock:
+            self._stage = stage
+        start = time.perf_counter()
+        try:
+            with span(stage) as stage_span:
+                yield stage_span
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_time(self, stage: str, seconds: float):
+        """
+        Add time spent in a stage
+
+        Chunks of a document are in different stages at once, so stage
+        totals can add up to more than the wall-clock time.
+        """
+        with self._lock:
+            self.timings[stage] = round(self.timings.get(stage, 0.0) + seconds, 4)
+
+    def advance(self, stage: str, message: Optional[str] = None):
+        """Record one finished unit (chunk) of a stage"""
+        with self._lock:
+            self._done[stage] += 1
+            self._stage = stage
+        self._emit("stage", stage, message)
+
+    def set_total_chunks(self, total: int):
+        """Called once extraction knows how many chunks the document has"""
+        with self._lock:
+            self._total_chunks = max(1, total)
+
+    def add_tokens(self, usage: Optional[dict]):
+        """Add an LLM call's token usage"""
+        if not usage:
+            return
+        with self._lock:
+            for key in self.tokens:
+                self.tokens[key] += int(usage.get(key, 0) or 0)
+
+    def message(self, text: str, stage: Optional[str] = None):
+        """Report a human-readable status line"""
+        self._emit("message", stage, text)
+
+    def reporter(self, stage: str) -> Callable[[str], None]:
+        """Callback that reports status lines as messages of one stage"""
+        return lambda text: self.message(text, stage)
+
+    def finish(self, message: Optional[str] = None):
+        """Report completion"""
+        with self._lock:
+            self._percent = 100
+        self._emit("done", "render", message)
+
+    @property
+    def stage(self) -> str:
+        """Stage most recently started or advanced"""
+        with self._lock:
+            return self._stage
+
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self.start, 4)
+
+    def _emit(self, event_type: str, stage: Optional[str], message: Optional[str]):
+        with self._lock:
+            stage = stage or self._stage
+            self._percent = max(self._percent, self._compute_percent())
+            event = {
+                "quiz_name": self.quiz_name,
+                "type": event_type,
+                "stage": stage,
+                "percent": self._percent,
+                "message": message,
+                "elapsed": self.elapsed(),
+                "timings": dict(self.timings),
+                "tokens": dict(self.tokens)
+            }
+
+        if self.callback is not None:
+            self.callback(event)
+        elif message:
+            print(message)
+
+    def _compute_percent(self) -> int:
+        """Weighted completion of every stage (caller holds the lock)"""
+        extracted = self._done["extract"]
+        if self._total_chunks is None:
+            # Chunk count not known yet: assume one more chunk is coming
+            total = extracted + 1
+            fractions = {"extract": extracted / total}
+        else:
+            total = self._total_chunks
+            fractions = {"extract": 1.0}
+
+        fractions["select"] = min(1.0, self._done["select"] / total)
+        fractions["build"] = min(1.0, self._done["build"] / total)
+        fractions["render"] = 1.0 if self._done["render"] else 0.0
+
+        return int(sum(STAGE_WEIGHTS[stage] * fractions[stage] for stage in STAGE_WEIGHTS))
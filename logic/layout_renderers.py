@@ -0,0 +1,311 @@
+"""
+Output backends that draw a precomputed QuizLayout
+
+Renderers do no measuring or pagination of their own, so the same layout
+can be emitted as PDF, HTML or plain text without being recomputed.
+"""
+
+from dataclasses import replace
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Union
+import html
+import io
+import threading
+
+try:
+    from reportlab.pdfgen import canvas
+except ImportError:
+    canvas = None
+
+from .cancellation import check_cancelled
+from .font_registry import get_font_registry
+from .metrics import PDF_PAGES_RENDERED
+from .pdf_page_writer import PDFPageWriter
+from .tracing import span
+from .quiz_layout import QuizLayout, TextBox
+
+
+class PDFRenderer:
+    """Draws a layout onto a ReportLab canvas"""
+
+    extension = ".pdf"
+
+    def __init__(self):
+        if canvas is None:
+            raise ImportError("reportlab not installed. Install with: pip install reportlab")
+
+    def render(
+        self,
+        layout: QuizLayout,
+        output: Union[Path, BinaryIO],
+        cancel: Optional[threading.Event] = None
+    ):
+        """
+        Render a layout to PDF
+
+        Args:
+            layout: Paginated quiz
+            output: File path or writable binary stream
+            cancel: Checked before each page (raises GenerationCancelled)
+        """
+        self._render(layout, output, cancel, _font_names(layout))
+
+    def _render(
+        self,
+        layout: QuizLayout,
+        output: Union[Path, BinaryIO],
+        cancel: Optional[threading.Event],
+        font_names: List[str]
+    ):
+        """Render a layout, registering font_names with the PDF in that order"""
+        # Layouts computed in another process name fonts this one may not
+        # have loaded yet; each file is parsed at most once per process
+        fonts = get_font_registry()
+        for face_name, path in layout.fonts:
+            fonts.register_file(face_name, path)
+
+        target = str(output) if isinstance(output, Path) else output
+        c = canvas.Canvas(target, pagesize=(layout.page_width, layout.page_height))
+
+        # Fonts get their resource names (F1, F2, ...) in this order, so every
+        # part of a streamed document has the same font resources and shared
+        # forms and fonts are written to the output once. The text object is
+        # never drawn.
+        fonts_in_order = c.beginText()
+        for font_name in font_names:
+            fonts_in_order.setFont(font_name, 1)
+
+        # Page furniture is emitted once as form XObjects and only
+        # referenced from each page's content stream
+        for name, boxes in layout.templates:
+            c.beginForm(name)
+            self._draw_boxes(c, boxes)
+            c.endForm()
+
+        for page_num, page in enumerate(layout.pages):
+            check_cancelled(cancel, "render")
+            with span("render.page", page=page_num + 1, boxes=len(page.boxes)):
+                if page_num > 0:
+                    c.showPage()
+
+                for name in page.templates:
+                    c.doForm(name)
+                self._draw_boxes(c, page.boxes)
+
+        with span("render.save", pages=len(layout.pages)):
+            c.save()
+        PDF_PAGES_RENDERED.inc(len(layout.pages))
+
+    def _draw_boxes(self, c, boxes):
+        """Draw boxes onto the canvas's current page or form"""
+        text = None
+        current_font = None
+
+        for box in boxes:
+            if isinstance(box, TextBox):
+                # Consecutive lines share one text object instead of one each
+                if text is None:
+                    text = c.beginText()
+                    current_font = None
+                font = (box.font_name, box.font_size)
+                if font != current_font:
+                    text.setFont(*font)
+                    current_font = font
+                text.setTextOrigin(box.x, box.y)
+                text.textOut(box.text)
+            else:
+                if text is not None:
+                    c.drawText(text)
+                    text = None
+                c.setStrokeColorRGB(*box.color)
+                c.setLineWidth(box.line_width)
+                c.line(box.x1, box.y1, box.x2, box.y2)
+
+        if text is not None:
+            c.drawText(text)
+
+
+class StreamingPDFRenderer(PDFRenderer):
+    """
+    Renders long layouts to PDF a batch of pages at a time
+
+    Each batch is drawn into a small in-memory PDF and its pages are appended
+    to the output straight away, so peak memory is bounded by the batch size
+    rather than by the length of the document.
+    """
+
+    def __init__(self, pages_per_part: int = 20):
+        """
+        Initialize streaming PDF renderer
+
+        Args:
+            pages_per_part: Pages drawn per batch before they are flushed
+        """
+        super().__init__()
+        self.pages_per_part = max(1, pages_per_part)
+
+    def render(
+        self,
+        layout: QuizLayout,
+        output: Union[Path, BinaryIO],
+        cancel: Optional[threading.Event] = None
+    ):
+        """
+        Render a layout to PDF incrementally
+
+        Args:
+            layout: Paginated quiz
+            output: File path or writable binary stream
+            cancel: Checked before each page (raises GenerationCancelled)
+        """
+        font_names = _font_names(layout)
+        with PDFPageWriter(output, title=layout.title) as writer:
+            for start in range(0, len(layout.pages), self.pages_per_part):
+                part = replace(layout, pages=layout.pages[start:start + self.pages_per_part])
+                with span("render.part", first_page=start + 1, pages=len(part.pages)):
+                    buffer = io.BytesIO()
+                    self._render(part, buffer, cancel, font_names)
+                    writer.add_pdf(buffer.getvalue())
+
+
+class HTMLRenderer:
+    """Emits a layout as a standalone HTML document with one block per page"""
+
+    extension = ".html"
+
+    def render(self, layout: QuizLayout, output: Union[Path, BinaryIO]):
+        """
+        Render a layout to HTML
+
+        Args:
+            layout: Paginated quiz
+            output: File path or writable binary stream
+        """
+        _write(output, self.render_string(layout).encode("utf-8"))
+
+    def render_string(self, layout: QuizLayout) -> str:
+        """Render a layout to an HTML string"""
+        width = layout.page_width
+        height = layout.page_height
+
+        parts = [
+            "<!DOCTYPE html>",
+            "<html>",
+            "<head>",
+            '<meta charset="utf-8">',
+            f"<title>{html.escape(layout.title)}</title>",
+            "<style>",
+            "body { background: #ddd; margin: 0; padding: 12pt; }",
+            f".page {{ position: relative; width: {width}pt; height: {height}pt; "
+            "background: #fff; margin: 0 auto 12pt; overflow: hidden; }",
+            ".page span { position: absolute; white-space: pre; }",
+            ".page div { position: absolute; }",
+            "</style>",
+            "</head>",
+            "<body>",
+        ]
+
+        for page in layout.pages:
+            parts.append('<div class="page">')
+            for box in layout.page_boxes(page):
+                if isinstance(box, TextBox):
+                    # Positions are baselines measured from the bottom of the page
+                    top = height - box.y - box.font_size * 0.8
+                    weight = "bold" if box.font_name.endswith("Bold") else "normal"
+                    family = box.font_name
+                    if family.endswith("-Bold"):
+                        family = family[:-len("-Bold")]
+                    parts.append(
+                        f'<span class="{box.role}" style="left: {box.x:.2f}pt; top: {top:.2f}pt; '
+                        f"font: {weight} {box.font_size}pt '{family}', Helvetica, Arial, sans-serif;\">"
+                        f"{html.escape(box.text)}</span>"
+                    )
+                else:
+                    left = min(box.x1, box.x2)
+                    top = height - max(box.y1, box.y2)
+                    rgb = ", ".join(str(round(channel * 255)) for channel in box.color)
+                    parts.append(
+                        f'<div style="left: {left:.2f}pt; top: {top:.2f}pt; '
+                        f'width: {max(abs(box.x2 - box.x1), box.line_width):.2f}pt; '
+                        f'height: {max(abs(box.y2 - box.y1), box.line_width):.2f}pt; '
+                        f'background: rgb({rgb});"></div>'
+                    )
+            parts.append("</div>")
+
+        parts.extend(["</body>", "</html>", ""])
+        return "\n".join(parts)
+
+
+class TextRenderer:
+    """Emits a layout as plain text, one form-feed separated block per page"""
+
+    extension = ".txt"
+
+    # Approximate width of one character column in points (11pt Helvetica)
+    column_width = 5.5
+
+    def render(self, layout: QuizLayout, output: Union[Path, BinaryIO]):
+        """
+        Render a layout to plain text
+
+        Args:
+            layout: Paginated quiz
+            output: File path or writable binary stream
+        """
+        _write(output, self.render_string(layout).encode("utf-8"))
+
+    def render_string(self, layout: QuizLayout) -> str:
+        """Render a layout to a plain text string"""
+        pages = []
+
+        for page in layout.pages:
+            texts = [box for box in layout.page_boxes(page) if isinstance(box, TextBox)]
+            if not texts:
+                pages.append("")
+                continue
+
+            left = min(box.x for box in texts)
+
+            # Boxes sharing a baseline become one line, placed by column
+            rows: Dict[float, List[TextBox]] = {}
+            for box in texts:
+                rows.setdefault(box.y, []).append(box)
+
+            lines = []
+            for y in sorted(rows, reverse=True):
+                line = ""
+                for box in sorted(rows[y], key=lambda b: b.x):
+                    column = int(round((box.x - left) / self.column_width))
+                    if line:
+                        column = max(column, len(line) + 2)
+                    line = line.ljust(column) + box.text
+                lines.append(line)
+
+            pages.append("\n".join(lines))
+
+        return "\n\f".join(pages) + "\n"
+
+
+def _font_names(layout: QuizLayout) -> List[str]:
+    """Fonts a layout draws text in, in order of first use"""
+    names = {}
+    for boxes in [boxes for _, boxes in layout.templates] + [page.boxes for page in layout.pages]:
+        for box in boxes:
+            if isinstance(box, TextBox):
+                names.setdefault(box.font_name, None)
+    return list(names)
+
+
+def _write(output: Union[Path, BinaryIO], data: bytes):
+    """Write rendered bytes to a path or binary stream"""
+    if isinstance(output, Path):
+        output.write_bytes(data)
+    else:
+        output.write(data)
+
+
+RENDERERS = {
+    "pdf": PDFRenderer,
+    "html": HTMLRenderer,
+    "text": TextRenderer,
+}
@@ -6,6 +6,8 @@ from pathlib import Path
 from typing import Dict, List, Optional
 import base64
 import json
+import threading
+import time
 
 try:
     from anthropic import Anthropic
@@ -23,6 +25,8 @@ except ImportError:
     httpx = None
 
 from config import Config
+from .cancellation import call_cancellable, check_cancelled, timeout_for
+from .metrics import record_llm_request
 
 
 class LLMClient:
@@ -44,20 +48,33 @@ class LLMClient:
         if self.provider == "claude":
             if Anthropic is None:
                 raise ImportError("anthropic not installed. Install with: pip install anthropic")
-            client_kwargs = {"api_key": config.anthropic_api_key}
+            client_kwargs = {"api_key": config.anthropic_api_key, "timeout": config.llm_timeout or None}
             if http_client:
                 client_kwargs["http_client"] = http_client
             self.client = Anthropic(**client_kwargs)
         elif self.provider == "openai":
             if OpenAI is None:
                 raise ImportError("openai not installed. Install with: pip install openai")
-            client_kwargs = {"api_key": config.openai_api_key}
+            client_kwargs = {"api_key": config.openai_api_key, "timeout": config.llm_timeout or None}
             if http_client:
                 client_kwargs["http_client"] = http_client
             self.client = OpenAI(**client_kwargs)
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
+    def _client_for(self, cancel: Optional[threading.Event]):
+        """
+        Client and request timeout for a call made on behalf of cancel
+
+        Raises:
+            GenerationCancelled: If cancel is already set or past its deadline
+        """
+        timeout = timeout_for(cancel, self.config.llm_timeout or None, "analyze")
+        if getattr(cancel, "deadline", None) is not None:
+            # A retried request would run past the deadline
+            return self.client.with_options(max_retries=0), timeout
+        return self.client, timeout
+
     def _extract_json_from_response(self, text: str) -> dict:
         """Extract and parse JSON from LLM response text.
 
@@ -85,12 +102,13 @@ class LLMClient:
 
         return json.loads(text)
 
-    def analyze_quiz_image(self, image_path: Path) -> dict:
+    def analyze_quiz_image(self, image_path: Path, cancel: Optional[threading.Event] = None) -> dict:
         """
         Analyze a handwritten quiz image to extract style information
 
         Args:
             image_path: Path to quiz image
+            cancel: Cancel event or CancelToken; its deadline bounds the request
 
         Returns:
             Dictionary with style analysis
@@ -122,8 +140,33 @@ Return your analysis as a structured JSON with these keys:
 
 Be specific and detailed. This information will be used to generate new quizzes in the same style."""
 
+        client, timeout = self._client_for(cancel)
+        start = time.perf_counter()
+        try:
+            analysis_text, usage, retries = call_cancellable(
+                lambda: self._request_analysis(client, timeout, prompt, media_type, image_data),
+                cancel, "analyze"
+            )
+        except Exception:
+            record_llm_request(self.provider, time.perf_counter() - start, ok=False)
+            # A request abandoned at the deadline is reported as cancellation
+            check_cancelled(cancel, "analyze")
+            raise
+        record_llm_request(self.provider, time.perf_counter() - start, usage, retries)
+
+        # Try to parse as JSON, fallback to text
+        try:
+            return self._extract_json_from_response(analysis_text)
+        except json.JSONDecodeError:
+            # Return as raw text if not valid JSON
+            return {"raw_analysis": analysis_text}
+
+    def _request_analysis(self, client, timeout: Optional[float], prompt: str, media_type: str, image_data: str):
+        """Send the style analysis request and return (response text, token usage, client retries)"""
         if self.provider == "claude":
-            response = self.client.messages.create(
+            # The raw response also reports how often the client retried
+            raw = client.messages.with_raw_response.create(
+                timeout=timeout,
                 model="claude-3-haiku-20240307",  # Using Haiku - upgrade account for Sonnet/Opus
                 max_tokens=4000,
                 messages=[{
@@ -145,10 +188,16 @@ Be specific and detailed. This information will be used to generate new quizzes
                 }]
             )
 
-            analysis_text = response.content[0].text
+            response = raw.parse()
+            usage = {
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens
+            }
+            return response.content[0].text, usage, getattr(raw, "retries_taken", 0)
 
         elif self.provider == "openai":
-            response = self.client.chat.completions.create(
+            raw = client.chat.completions.with_raw_response.create(
+                timeout=timeout,
                 model="gpt-4o",
                 messages=[{
                     "role": "user",
@@ -168,14 +217,12 @@ Be specific and detailed. This information will be used to generate new quizzes
                 max_tokens=2000
             )
 
-            analysis_text = response.choices[0].message.content
-
-        # Try to parse as JSON, fallback to text
-        try:
-            return self._extract_json_from_response(analysis_text)
-        except json.JSONDecodeError:
-            # Return as raw text if not valid JSON
-            return {"raw_analysis": analysis_text}
+            response = raw.parse()
+            usage = {
+                "input_tokens": response.usage.prompt_tokens,
+                "output_tokens": response.usage.completion_tokens
+            }
+            return response.choices[0].message.content, usage, getattr(raw, "retries_taken", 0)
 
     def generate_quiz_content(
         self,
@@ -0,0 +1,352 @@
+"""
+Metrics - counters, gauges and histograms exported as OpenMetrics text
+
+The logic modules update the process-wide metrics defined at the bottom of
+this module. get_metrics().render() produces the OpenMetrics exposition,
+which can be written to a file for a textfile collector (write_file()) or
+served on a local port for a scraper (serve_metrics(); the quiz service
+also answers GET /metrics).
+"""
+
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import tempfile
+import threading
+
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Upper bounds (seconds) for latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+class _Metric(ABC):
+    """A metric family: one value (or histogram) per combination of label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {', '.join(self.labelnames) or '(none)'}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of the exposition"""
+
+    def render(self) -> str:
+        lines = [
+            f"# TYPE {self.name} {self.kind}",
+            f"# HELP {self.name} {self.documentation}"
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (exported with a _total suffix)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets, with count and sum"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state["counts"]) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, {"counts": list(s["counts"]), "sum": s["sum"]}) for key, s in self._values.items())
+
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (("le", _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metric families and their OpenMetrics exposition"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect: Callable[[], None]):
+        """Call collect() before each export, e.g. to refresh gauges from live state"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def remove_collector(self, collect: Callable[[], None]):
+        with self._lock:
+            if collect in self._collectors:
+                self._collectors.remove(collect)
+
+    def render(self) -> str:
+        """OpenMetrics text exposition of every metric"""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collect in collectors:
+            collect()
+        return "\n".join(metric.render() for metric in metrics) + "\n# EOF\n"
+
+    def write_file(self, path: Path):
+        """Atomically replace path with the current exposition (for textfile collectors)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(temp_name, path)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    return _registry
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves GET /metrics"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(
+    port: int,
+    host: str = "127.0.0.1",
+    registry: Optional[MetricsRegistry] = None
+) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics on a background thread
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        host: Address to listen on (localhost by default)
+        registry: Metrics to serve (default: the process-wide registry)
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or _registry
+    threading.Thread(target=server.serve_forever, name="quizlm-metrics", daemon=True).start()
+    return server
+
+
+# QuizLM metrics, updated by the logic modules
+
+GENERATIONS = _registry.counter(
+    "quizlm_generations",
+    "Quiz generations by outcome (done, reused, cancelled, timed_out, failed; batches also skipped, resumed)",
+    ("outcome",)
+)
+GENERATION_SECONDS = _registry.histogram(
+    "quizlm_generation_seconds", "Time of a quiz generation (for batch quizzes, the sum of their stage times)"
+)
+STAGE_SECONDS = _registry.histogram(
+    "quizlm_stage_seconds", "Time a quiz generation spent in each stage", ("stage",)
+)
+LLM_REQUESTS = _registry.counter(
+    "quizlm_llm_requests", "LLM requests by provider and outcome (ok, error)", ("provider", "outcome")
+)
+LLM_REQUEST_SECONDS = _registry.histogram(
+    "quizlm_llm_request_seconds", "LLM request latency, including client retries", ("provider",)
+)
+LLM_TOKENS = _registry.counter(
+    "quizlm_llm_tokens", "LLM tokens used by provider and direction (input, output)", ("provider", "direction")
+)
+LLM_RETRIES = _registry.counter(
+    "quizlm_llm_retries", "LLM requests retried by the client after a transient error", ("provider",)
+)
+SELECTIONS_COALESCED = _registry.counter(
+    "quizlm_selections_coalesced", "Word selections served by joining an identical in-flight request"
+)
+OCR_PAGE_SECONDS = _registry.histogram(
+    "quizlm_ocr_page_seconds", "OCR time per page (count/sum gives pages per second)", ("engine",)
+)
+CACHE_REQUESTS = _registry.counter(
+    "quizlm_cache_requests", "Cache lookups by cache (quiz, preview) and result (hit, miss)", ("cache", "result")
+)
+PDF_PAGES_RENDERED = _registry.counter(
+    "quizlm_pdf_pages_rendered", "PDF pages drawn"
+)
+
+
+def record_llm_request(
+    provider: str,
+    seconds: float,
+    usage: Optional[dict] = None,
+    retries: int = 0,
+    ok: bool = True
+):
+    """Update the LLM request, latency, token and retry metrics for one request"""
+    LLM_REQUESTS.inc(provider=provider, outcome="ok" if ok else "error")
+    LLM_REQUEST_SECONDS.observe(seconds, provider=provider)
+    if retries:
+        LLM_RETRIES.inc(retries, provider=provider)
+    for direction in ("input", "output"):
+        tokens = int((usage or {}).get(f"{direction}_tokens", 0) or 0)
+        if tokens:
+            LLM_TOKENS.inc(tokens, provider=provider, direction=direction)
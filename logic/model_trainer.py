@@ -8,12 +8,14 @@ import json
 import shutil
 from datetime import datetime
 import tempfile
+import threading
 
 try:
     from pdf2image import convert_from_path
 except ImportError:
     convert_from_path = None
 
+from .cancellation import CancelToken, GenerationCancelled, check_cancelled, timeout_for
 from .llm_client import LLMClient
 from config import Config
 
@@ -62,12 +64,23 @@ class ModelTrainer:
         ]
         return sorted(images)
 
-    def train_model(self):
+    def train_model(self, cancel_event: Optional[threading.Event] = None, timeout: Optional[float] = None):
         """
         Analyze training images to extract style information
         Uses vision LLM to understand the quiz format and style
         Supports both image files and PDFs (each page analyzed separately)
+
+        Args:
+            cancel_event: Set from another thread to abandon training; may be
+                a CancelToken carrying a deadline
+            timeout: Seconds training may take in total (None: no deadline)
+
+        Raises:
+            GenerationCancelled: If cancelled (DeadlineExceeded if the deadline
+                passed) before the new style was saved; the existing model is
+                left unchanged and the exception's stage says what was running
         """
+        cancel = CancelToken(timeout, parent=cancel_event)
         training_files = self.get_training_images()
 
         if not training_files:
@@ -79,27 +92,31 @@ class ModelTrainer:
         # Analyze each training image/PDF with vision LLM
         style_analyses = []
         for file_path in training_files:
+            check_cancelled(cancel, "analyze")
             if file_path.suffix.lower() == '.pdf':
                 # Handle PDF: convert each page to image and analyze
-                pdf_analyses = self._analyze_pdf_pages(file_path)
+                pdf_analyses = self._analyze_pdf_pages(file_path, cancel)
                 style_analyses.extend(pdf_analyses)
             else:
                 # Handle regular image
-                analysis = self.llm_client.analyze_quiz_image(file_path)
+                analysis = self.llm_client.analyze_quiz_image(file_path, cancel)
                 style_analyses.append(analysis)
 
         # Aggregate style information
         aggregated_style = self._aggregate_style_info(style_analyses)
+        check_cancelled(cancel, "save")
 
         # Save style information
         self._save_style_info(aggregated_style)
 
-    def _analyze_pdf_pages(self, pdf_path: Path) -> List[dict]:
+    def _analyze_pdf_pages(self, pdf_path: Path, cancel: Optional[threading.Event] = None) -> List[dict]:
         """
         Convert PDF pages to images and analyze each page
 
         Args:
             pdf_path: Path to PDF file
+            cancel: Cancel event or CancelToken; its deadline also bounds the
+                conversion and each page's LLM request
 
         Returns:
             List of analyses, one per page
@@ -121,8 +138,13 @@ class ModelTrainer:
 
             # Convert PDF pages to images
             try:
-                images = convert_from_path(pdf_path, dpi=200)
+                images = convert_from_path(
+                    pdf_path, dpi=200, timeout=timeout_for(cancel, self.config.ocr_timeout or None, "convert")
+                )
+            except GenerationCancelled:
+                raise
             except Exception as e:
+                check_cancelled(cancel, "convert")
                 raise ValueError(
                     f"Failed to convert PDF to images. Make sure poppler is installed.\n"
                     f"Error: {str(e)}"
@@ -130,17 +152,21 @@ class ModelTrainer:
 
             # Save and analyze each page
             for page_num, image in enumerate(images, start=1):
+                check_cancelled(cancel, "analyze")
+
                 # Save page as temporary PNG
                 page_image_path = temp_path / f"page_{page_num}.png"
                 image.save(page_image_path, 'PNG')
 
                 # Analyze the page
                 try:
-                    analysis = self.llm_client.analyze_quiz_image(page_image_path)
+                    analysis = self.llm_client.analyze_quiz_image(page_image_path, cancel)
                     # Add metadata about source
                     analysis['source_file'] = pdf_path.name
                     analysis['page_number'] = page_num
                     analyses.append(analysis)
+                except GenerationCancelled:
+                    raise
                 except Exception as e:
                     print(f"Warning: Failed to analyze page {page_num} of {pdf_path.name}: {e}")
                     continue
@@ -0,0 +1,227 @@
+"""
+OCR engines - recognize text in page images
+
+The default engine drives libtesseract in-process through tesserocr, keeping
+a bounded pool of initialized recognizers that threads share and passing
+images in memory.
+pytesseract (one tesseract subprocess per call) is the fallback.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import os
+import threading
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+
+class OCREngine(ABC):
+    """Base class for OCR backends"""
+
+    name = "base"
+
+    @abstractmethod
+    def recognize(self, image, timeout: Optional[float] = None) -> Tuple[str, float]:
+        """
+        Recognize text in a preprocessed page image
+
+        Args:
+            image: PIL image
+            timeout: Seconds after which recognition is aborted (None: unlimited).
+                This is the only bound on a call: recognition cannot be
+                interrupted by a cancel event, which callers check between pages
+
+        Returns:
+            Tuple of (recognized text, mean word confidence 0-100)
+
+        Raises:
+            TimeoutError: If recognition took longer than timeout
+        """
+
+    def close(self):
+        """Release any resources held by the engine"""
+
+
+class TesserocrEngine(OCREngine):
+    """In-process tesseract with a bounded pool of long-lived recognizers"""
+
+    name = "tesserocr"
+
+    def __init__(self, lang: str = "eng", max_apis: Optional[int] = None):
+        """
+        Initialize engine
+
+        Args:
+            lang: Tesseract language code
+            max_apis: Most recognizers (each holding a loaded language model)
+                kept at once; further threads wait for a free one
+                (default: number of CPUs)
+        """
+        if tesserocr is None:
+            raise ImportError("tesserocr not installed. Install with: pip install tesserocr")
+
+        self.lang = lang
+        self.max_apis = max(1, max_apis or os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(self.max_apis)
+        self._apis: List = []
+        self._idle: List = []
+        self._lock = threading.Lock()
+
+        # Load the language model now so a broken install fails fast
+        with self._checkout():
+            pass
+
+    def recognize(self, image, timeout: Optional[float] = None) -> Tuple[str, float]:
+        with self._checkout(timeout) as api:
+            # SetImage hands the pixel buffer straight to libtesseract - no temp files
+            api.SetImage(image)
+            if timeout is not None:
+                # libtesseract polls this deadline while recognizing and gives up
+                # cleanly, leaving the recognizer reusable
+                if not api.Recognize(max(1, int(timeout * 1000))):
+                    api.Clear()
+                    raise TimeoutError(f"OCR timed out after {timeout:.1f}s")
+            text = api.GetUTF8Text()
+            confidence = float(api.MeanTextConf())
+            api.Clear()
+
+        return text, confidence
+
+    def close(self):
+        with self._lock:
+            for api in self._apis:
+                api.End()
+            self._apis = []
+            self._idle = []
+
+    @contextmanager
+    def _checkout(self, timeout: Optional[float] = None):
+        """
+        Borrow a recognizer from the pool, loading a new one if none is idle
+
+        Short-lived threads (each generation extracts on its own thread)
+        return their recognizer here, so the number of loaded language
+        models never exceeds max_apis.
+
+        Raises:
+            TimeoutError: If no recognizer became free within timeout
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"OCR timed out after {timeout:.1f}s waiting for a free recognizer")
+        try:
+            with self._lock:
+                api = self._idle.pop() if self._idle else None
+            if api is None:
+                api = tesserocr.PyTessBaseAPI(lang=self.lang)
+                with self._lock:
+                    self._apis.append(api)
+            try:
+                yield api
+            finally:
+                with self._lock:
+                    # Recognizers ended by close() are not handed out again
+                    if api in self._apis:
+                        self._idle.append(api)
+        finally:
+            self._slots.release()
+
+
+class PytesseractEngine(OCREngine):
+    """Fallback engine that runs the tesseract CLI through pytesseract"""
+
+    name = "pytesseract"
+
+    def __init__(self, lang: str = "eng"):
+        if pytesseract is None:
+            raise ImportError(
+                "pytesseract not installed. Install with: pip install pytesseract"
+            )
+
+        self.lang = lang
+
+    def recognize(self, image, timeout: Optional[float] = None) -> Tuple[str, float]:
+        try:
+            # pytesseract kills the tesseract process once the timeout passes
+            data = pytesseract.image_to_data(
+                image, lang=self.lang, output_type=pytesseract.Output.DICT,
+                timeout=timeout or 0
+            )
+        except RuntimeError as e:
+            if "timeout" in str(e).lower():
+                raise TimeoutError(f"OCR timed out after {timeout:.1f}s") from e
+            raise
+
+        # One tesseract pass gives both the words and their confidences
+        lines = []
+        confidences = []
+        current_line = None
+        current_paragraph = None
+        for i, word in enumerate(data["text"]):
+            if not word or not word.strip():
+                continue
+
+            paragraph_key = (data["block_num"][i], data["par_num"][i])
+            line_key = paragraph_key + (data["line_num"][i],)
+            if line_key != current_line:
+                if current_paragraph is not None and paragraph_key != current_paragraph:
+                    lines.append("")
+                lines.append(word)
+                current_line = line_key
+                current_paragraph = paragraph_key
+            else:
+                lines[-1] += " " + word
+
+            confidence = float(data["conf"][i])
+            if confidence >= 0:
+                confidences.append(confidence)
+
+        mean_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+
+        return "\n".join(lines), mean_confidence
+
+
+def create_ocr_engine(engine: Optional[str] = None, lang: str = "eng") -> OCREngine:
+    """
+    Create an OCR engine
+
+    Args:
+        engine: "tesserocr", "pytesseract", or None/"auto" to use the fastest
+            engine that is installed
+        lang: Tesseract language code
+
+    Returns:
+        Initialized OCR engine
+    """
+    if engine == "tesserocr":
+        return TesserocrEngine(lang=lang)
+    if engine == "pytesseract":
+        return PytesseractEngine(lang=lang)
+    if engine not in (None, "", "auto"):
+        raise ValueError(f"Unsupported OCR engine: {engine}")
+
+    if tesserocr is not None:
+        try:
+            return TesserocrEngine(lang=lang)
+        except Exception as e:
+            print(f"Warning: tesserocr unavailable ({e}), falling back to pytesseract")
+
+    if pytesseract is not None:
+        return PytesseractEngine(lang=lang)
+
+    raise ImportError(
+        "No OCR engine installed. "
+        "Install with: pip install tesserocr (or pip install pytesseract)\n"
+        "Note: Tesseract OCR must also be installed:\n"
+        "  - macOS: brew install tesseract\n"
+        "  - Ubuntu/Debian: apt-get install tesseract-ocr\n"
+        "  - Windows: Download from https://github.com/UB-Mannheim/tesseract/wiki"
+    )
@@ -0,0 +1,247 @@
+"""
+OCR preprocessing - pick a rasterization resolution from a low-res probe
+and clean up page images before they are handed to tesseract
+"""
+
+from typing import List, Optional, Tuple
+import statistics
+
+try:
+    from PIL import Image, ImageChops, ImageOps
+except ImportError:
+    Image = None
+    ImageChops = None
+    ImageOps = None
+
+
+# Columns inked in more than this share of rows are page edges or vertical
+# rules, not text, and are left out of the line-height estimate
+RULE_COLUMN_FRACTION = 0.5
+
+# Ink runs taller than this share of the page are figures or merged blocks,
+# not text lines
+MAX_LINE_FRACTION = 0.1
+
+# Never shrink an image below half size for OCR
+MIN_SCALE = 0.5
+
+
+class OCRPreprocessor:
+    """Estimates text size and prepares page images for OCR"""
+
+    def __init__(
+        self,
+        min_dpi: int = 150,
+        max_dpi: int = 300,
+        probe_dpi: int = 72,
+        target_line_height: int = 32,
+        margin_padding: int = 10
+    ):
+        """
+        Initialize OCR preprocessor
+
+        Args:
+            min_dpi: Lowest resolution a page will be rasterized at
+            max_dpi: Highest resolution a page will be rasterized at
+            probe_dpi: Resolution of the cheap probe used to measure text size
+            target_line_height: Text line height (pixels) tesseract should see
+            margin_padding: Blank pixels kept around the cropped text block
+        """
+        if Image is None:
+            raise ImportError("Pillow not installed. Install with: pip install Pillow")
+
+        self.min_dpi = min_dpi
+        self.max_dpi = max_dpi
+        self.probe_dpi = probe_dpi
+        self.target_line_height = target_line_height
+        self.margin_padding = margin_padding
+
+    def choose_dpi(self, probe_image) -> int:
+        """
+        Pick the rasterization DPI for a page from its low-res probe
+
+        Large, clean fonts reach the target line height at a lower DPI, which
+        makes both rasterization and recognition much cheaper.
+
+        Args:
+            probe_image: The page rasterized at probe_dpi
+
+        Returns:
+            DPI to rasterize the page at for OCR (rounded up to a multiple of 50)
+        """
+        line_height = self.estimate_line_height(probe_image)
+        if not line_height:
+            return self.max_dpi
+
+        dpi = self.target_line_height * self.probe_dpi / line_height
+        dpi = int(-(-dpi // 50) * 50)
+
+        return max(self.min_dpi, min(self.max_dpi, dpi))
+
+    def choose_scale(self, image) -> float:
+        """
+        Pick a resampling factor for an image that is already rasterized
+
+        Args:
+            image: Page image at its native resolution
+
+        Returns:
+            Factor to resize the image by before OCR (1.0 = leave as is)
+        """
+        line_height = self.estimate_line_height(image)
+        if not line_height:
+            return 1.0
+
+        scale = self.target_line_height / line_height
+
+        # Only resample when it clearly pays off; never blow up more than 2x
+        # or shrink below MIN_SCALE
+        if 0.75 <= scale <= 1.5:
+            return 1.0
+        return max(MIN_SCALE, min(scale, 2.0))
+
+    def estimate_line_height(self, image) -> Optional[float]:
+        """
+        Estimate the typical text line height of a page in pixels
+
+        Uses the horizontal projection profile of the binarized page: each
+        run of consecutive rows containing ink is treated as one text line.
+        Page edges and vertical rules are masked out first, and runs too tall
+        to be a line of text are ignored.
+
+        Args:
+            image: Page image (any mode)
+
+        Returns:
+            Median line height in pixels, or None if no text lines were found
+        """
+        binary = self.binarize(self.to_grayscale(image))
+        heights = [end - start for start, end in self._ink_row_runs(binary)]
+
+        # Ignore specks and rules that are only a pixel or two tall, and
+        # figures or blocks too tall to be a line
+        max_height = max(3, binary.size[1] * MAX_LINE_FRACTION)
+        heights = [height for height in heights if 3 <= height <= max_height]
+        if not heights:
+            return None
+
+        return float(statistics.median(heights))
+
+    def prepare(self, image, scale: float = 1.0):
+        """
+        Grayscale, binarize and crop a page image for recognition
+
+        Args:
+            image: Page image (any mode)
+            scale: Resampling factor from choose_scale()
+
+        Returns:
+            Preprocessed image in "L" mode with ink=0 and paper=255
+        """
+        gray = self.to_grayscale(image)
+
+        if scale != 1.0:
+            width, height = gray.size
+            gray = gray.resize(
+                (max(1, int(width * scale)), max(1, int(height * scale))),
+                Image.LANCZOS
+            )
+
+        return self.crop_margins(self.binarize(gray))
+
+    def to_grayscale(self, image):
+        """Convert an image to 8-bit grayscale"""
+        if image.mode == "L":
+            return image
+        return image.convert("L")
+
+    def binarize(self, gray):
+        """Threshold a grayscale image using Otsu's method"""
+        threshold = self._otsu_threshold(gray.histogram())
+        return gray.point(lambda value: 255 if value > threshold else 0)
+
+    def crop_margins(self, binary):
+        """Crop blank margins around the text block, keeping a little padding"""
+        bbox = ImageOps.invert(binary).getbbox()
+        if bbox is None:
+            return binary
+
+        left, top, right, bottom = bbox
+        pad = self.margin_padding
+        width, height = binary.size
+
+        return binary.crop((
+            max(0, left - pad),
+            max(0, top - pad),
+            min(width, right + pad),
+            min(height, bottom + pad)
+        ))
+
+    def _ink_row_runs(self, binary) -> List[Tuple[int, int]]:
+        """Find [start, end) row ranges that contain ink, ignoring vertical rules"""
+        ink = ImageOps.invert(binary)
+        width, height = ink.size
+
+        # A column inked down most of the page (scanner edge, border, rule)
+        # would join every row into one run, so blank such columns out
+        columns = ink.convert("F").resize((width, 1), Image.BOX).getdata()
+        rules = [x for x, mean in enumerate(columns) if mean > 255 * RULE_COLUMN_FRACTION]
+        if rules:
+            mask = Image.new("L", (width, 1), 255)
+            for x in rules:
+                mask.putpixel((x, 0), 0)
+            ink = ImageChops.multiply(ink, mask.resize((width, height), Image.NEAREST))
+
+        # Averaging every row of the inverted page down to a single float
+        # pixel gives the projection profile; any ink pixel makes it non-zero
+        profile = ink.convert("F").resize((1, height), Image.BOX).getdata()
+
+        runs = []
+        start = None
+        for row, mean in enumerate(profile):
+            has_ink = mean > 0
+            if has_ink and start is None:
+                start = row
+            elif not has_ink and start is not None:
+                runs.append((start, row))
+                start = None
+
+        if start is not None:
+            runs.append((start, len(profile)))
+
+        return runs
+
+    def _otsu_threshold(self, histogram: List[int]) -> int:
+        """Compute the Otsu threshold of a 256-bin grayscale histogram"""
+        total = sum(histogram)
+        if total == 0:
+            return 127
+
+        sum_all = sum(value * count for value, count in enumerate(histogram))
+        sum_background = 0
+        weight_background = 0
+        best_threshold = 127
+        best_variance = 0.0
+
+        for value, count in enumerate(histogram):
+            weight_background += count
+            if weight_background == 0:
+                continue
+
+            weight_foreground = total - weight_background
+            if weight_foreground == 0:
+                break
+
+            sum_background += value * count
+            mean_background = sum_background / weight_background
+            mean_foreground = (sum_all - sum_background) / weight_foreground
+
+            variance = (
+                weight_background * weight_foreground
+                * (mean_background - mean_foreground) ** 2
+            )
+            if variance > best_variance:
+                best_variance = variance
+                best_threshold = value
+
+        return best_threshold
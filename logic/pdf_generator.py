@@ -4,19 +4,21 @@ Creates PDF with quiz on left, answers on right
 """
 
 from pathlib import Path
-from typing import Dict, List
-from datetime import datetime
+from typing import BinaryIO, Optional, Union
+import io
+import json
+import threading
 
 try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib.units import inch
     from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
 except ImportError:
     canvas = None
 
+from .cancellation import GenerationCancelled, check_cancelled
+from .font_registry import get_font_registry
+from .quiz_layout import QuizLayout, QuizLayoutEngine
+from .layout_renderers import RENDERERS, StreamingPDFRenderer
+from .tracing import span
 from config import Config
 
 
@@ -29,13 +31,21 @@ class PDFGenerator:
         if canvas is None:
             raise ImportError("reportlab not installed. Install with: pip install reportlab")
 
+        get_font_registry().add_font_dir(config.fonts_dir)
+        self.layout_engine = QuizLayoutEngine()
+
+        # Font recorded by the trained style model, keyed by file mtime
+        self._style_font = (None, None)
+
     def create_quiz_pdf(
         self,
         quiz_data: dict,
         output_path: Path,
         quiz_name: str,
-        quiz_style: str = "Split Page"
-    ):
+        quiz_style: str = "Split Page",
+        font: Optional[str] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> QuizLayout:
         """
         Create a PDF quiz sheet
 
@@ -44,267 +54,173 @@ class PDFGenerator:
             output_path: Where to save PDF
             quiz_name: Name of the quiz
             quiz_style: Layout style ("Split Page" or "Full Page")
+            font: Font family (default: see default_font())
+            cancel: Cancel event or CancelToken checked while drawing pages
+
+        Returns:
+            The computed layout, reusable with render_layout() for other formats
         """
-        # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        layout = self.layout_quiz(quiz_data, quiz_name, quiz_style, font)
+        self.render_layout(layout, output_path, cancel=cancel)
+        return layout
 
-        if quiz_style == "Full Page":
-            self._create_full_page_quiz(quiz_data, output_path, quiz_name)
-        else:
-            self._create_split_page_quiz(quiz_data, output_path, quiz_name)
+    def layout_quiz(
+        self,
+        quiz_data: dict,
+        quiz_name: str,
+        quiz_style: str = "Split Page",
+        font: Optional[str] = None,
+        generated_on: Optional[str] = None
+    ) -> QuizLayout:
+        """
+        Measure and paginate a quiz without drawing it
 
-    def _create_split_page_quiz(
+        Args:
+            quiz_data: Quiz content from LLM
+            quiz_name: Name of the quiz
+            quiz_style: Layout style ("Split Page" or "Full Page")
+            font: Font family (default: see default_font())
+            generated_on: Date printed in the footer (defaults to today)
+
+        Returns:
+            Immutable, serializable page model of the quiz
+        """
+        with span("render.layout", quiz_style=quiz_style) as layout_span:
+            layout = self.layout_engine.layout_quiz(
+                quiz_data,
+                quiz_name,
+                quiz_style,
+                generated_on=generated_on,
+                font=font or self.default_font()
+            )
+            layout_span.set(pages=len(layout.pages))
+        return layout
+
+    def default_font(self) -> Optional[str]:
+        """
+        Font family used when none is given
+
+        QUIZLM_QUIZ_FONT wins; otherwise the font recorded by the trained
+        style model (data/models/style_info.json); otherwise Helvetica.
+        """
+        if self.config.quiz_font:
+            return self.config.quiz_font
+
+        style_file = self.config.models_dir / "style_info.json"
+        try:
+            mtime = style_file.stat().st_mtime
+        except OSError:
+            return None
+
+        # Only re-read the style file after the model has been retrained
+        cached_mtime, font = self._style_font
+        if cached_mtime != mtime:
+            try:
+                with open(style_file, 'r') as f:
+                    font = json.load(f).get("font")
+            except (OSError, ValueError):
+                font = None
+            self._style_font = (mtime, font)
+
+        return font
+
+    def create_quiz_bytes(
         self,
         quiz_data: dict,
-        output_path: Path,
-        quiz_name: str
-    ):
-        """Create a split-page quiz (quiz on left, answers on right)"""
-        # Create canvas
-        c = canvas.Canvas(str(output_path), pagesize=letter)
-        width, height = letter
-
-        # Set up fonts
-        c.setFont("Helvetica", 11)
-
-        # Margins
-        margin = 0.5 * inch
-        center_x = width / 2
-
-        # Starting Y position
-        y_pos = height - margin
-
-        # Title
-        title = quiz_data.get("quiz_title", quiz_name)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(margin, y_pos, title)
-        y_pos -= 30
-
-        # Draw center line
-        c.setStrokeColor(colors.lightgrey)
-        c.setLineWidth(0.5)
-        c.line(center_x, margin, center_x, height - margin)
-
-        # Quiz section label
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(margin, y_pos, "QUIZ")
-        c.drawString(center_x + 10, y_pos, "ANSWERS")
-        y_pos -= 20
-
-        # Reset to normal font
-        c.setFont("Helvetica", 11)
-
-        # Process paragraphs (new format) or fallback to questions (old format)
-        paragraphs = quiz_data.get("paragraphs", [])
-        answer_key = quiz_data.get("answer_key", [])
-
-        if not paragraphs:  # Fallback to old question format
-            paragraphs = [{"text": q.get("text", ""), "section_heading": None}
-                         for q in quiz_data.get("questions", [])]
-            answer_key = [{"answer": q.get("answer", ""), "context": ""}
-                         for q in quiz_data.get("questions", [])]
-
-        answer_index = 0
-
-        for para in paragraphs:
-            # Section heading if present
-            if para.get("section_heading"):
-                c.setFont("Helvetica-Bold", 12)
-                if y_pos < margin + 70:
-                    c.showPage()
-                    y_pos = height - margin
-                    c.setStrokeColor(colors.lightgrey)
-                    c.setLineWidth(0.5)
-                    c.line(center_x, margin, center_x, height - margin)
-                    c.setStrokeColor(colors.black)
-
-                c.drawString(margin, y_pos, para["section_heading"])
-                y_pos -= 20
-                c.setFont("Helvetica", 11)
-
-            # Word wrap for left side (quiz text)
-            left_width = center_x - margin - 15
-            quiz_text = para["text"]
-            wrapped_quiz = self._wrap_text(quiz_text, left_width, c, 11)
-
-            # Count blanks in this paragraph
-            blank_count = quiz_text.count("___")
-
-            # Draw quiz text
-            start_y = y_pos
-            for line in wrapped_quiz:
-                if y_pos < margin + 30:
-                    c.showPage()
-                    y_pos = height - margin
-                    c.setFont("Helvetica", 11)
-                    c.setStrokeColor(colors.lightgrey)
-                    c.setLineWidth(0.5)
-                    c.line(center_x, margin, center_x, height - margin)
-                    c.setStrokeColor(colors.black)
-                    start_y = y_pos
-
-                c.drawString(margin, y_pos, line)
-                y_pos -= 14
-
-            # Draw corresponding answers on right side
-            answer_y = start_y
-            for _ in range(blank_count):
-                if answer_index < len(answer_key):
-                    if answer_y < margin + 30:
-                        # Continue on next page
-                        break
-                    answer = answer_key[answer_index]["answer"]
-                    c.drawString(center_x + 10, answer_y, answer)
-                    answer_y -= 14
-                    answer_index += 1
-
-            # Extra space between paragraphs
-            y_pos -= 8
-
-        # Footer
-        c.setFont("Helvetica", 8)
-        footer_text = f"Generated by QuizLM on {datetime.now().strftime('%Y-%m-%d')}"
-        c.drawString(margin, margin - 20, footer_text)
-
-        # Save PDF
-        c.save()
-
-    def _create_full_page_quiz(
+        quiz_name: str,
+        quiz_style: str = "Split Page",
+        output_format: str = "pdf",
+        font: Optional[str] = None
+    ) -> bytes:
+        """
+        Render a quiz entirely in memory
+
+        Args:
+            quiz_data: Quiz content from LLM
+            quiz_name: Name of the quiz
+            quiz_style: Layout style ("Split Page" or "Full Page")
+            output_format: "pdf", "html" or "text"
+            font: Font family (default: see default_font())
+
+        Returns:
+            The rendered document
+        """
+        return self.create_quiz_stream(
+            quiz_data, quiz_name, quiz_style, output_format, font
+        ).getvalue()
+
+    def create_quiz_stream(
         self,
         quiz_data: dict,
-        output_path: Path,
-        quiz_name: str
-    ):
-        """Create a full-page quiz with answers on separate pages at the end"""
-        # Create canvas
-        c = canvas.Canvas(str(output_path), pagesize=letter)
-        width, height = letter
-
-        # Set up fonts
-        c.setFont("Helvetica", 11)
-
-        # Margins
-        margin = 0.5 * inch
-        full_width = width - (2 * margin)
-
-        # Starting Y position
-        y_pos = height - margin
-
-        # Title
-        title = quiz_data.get("quiz_title", quiz_name)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(margin, y_pos, title)
-        y_pos -= 30
-
-        # Quiz section label
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(margin, y_pos, "QUIZ")
-        y_pos -= 20
-
-        # Reset to normal font
-        c.setFont("Helvetica", 11)
-
-        # Process paragraphs (new format) or fallback to questions (old format)
-        paragraphs = quiz_data.get("paragraphs", [])
-        answer_key = quiz_data.get("answer_key", [])
-
-        if not paragraphs:  # Fallback to old question format
-            paragraphs = [{"text": q.get("text", ""), "section_heading": None}
-                         for q in quiz_data.get("questions", [])]
-            answer_key = [{"answer": q.get("answer", ""), "context": ""}
-                         for q in quiz_data.get("questions", [])]
-
-        # Render quiz pages
-        for para in paragraphs:
-            # Section heading if present
-            if para.get("section_heading"):
-                c.setFont("Helvetica-Bold", 12)
-                if y_pos < margin + 70:
-                    c.showPage()
-                    y_pos = height - margin
-
-                c.drawString(margin, y_pos, para["section_heading"])
-                y_pos -= 20
-                c.setFont("Helvetica", 11)
-
-            # Word wrap for full width
-            quiz_text = para["text"]
-            wrapped_quiz = self._wrap_text(quiz_text, full_width, c, 11)
-
-            # Draw quiz text
-            for line in wrapped_quiz:
-                if y_pos < margin + 30:
-                    c.showPage()
-                    y_pos = height - margin
-                    c.setFont("Helvetica", 11)
-
-                c.drawString(margin, y_pos, line)
-                y_pos -= 14
-
-            # Extra space between paragraphs
-            y_pos -= 10
-
-        # Footer on quiz pages
-        c.setFont("Helvetica", 8)
-        footer_text = f"Generated by QuizLM on {datetime.now().strftime('%Y-%m-%d')}"
-        c.drawString(margin, margin - 20, footer_text)
-
-        # Start answer key on new page
-        c.showPage()
-        y_pos = height - margin
-
-        # Answer key title
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(margin, y_pos, "ANSWER KEY")
-        y_pos -= 30
-
-        # Reset to normal font
-        c.setFont("Helvetica", 11)
-
-        # Create answer text as flowing paragraphs with 4 spaces between words
-        # No numbers, no context - just the words
-        answer_words = [ans.get("answer", "") for ans in answer_key]
-        answer_paragraph = "    ".join(answer_words)  # 4 spaces between each word
-
-        # Wrap the paragraph to page width
-        wrapped_answers = self._wrap_text(answer_paragraph, full_width, c, 11)
-
-        # Render the answer paragraph
-        for line in wrapped_answers:
-            if y_pos < margin + 30:
-                c.showPage()
-                y_pos = height - margin
-                c.setFont("Helvetica", 11)
-
-            c.drawString(margin, y_pos, line)
-            y_pos -= 14
-
-        # Footer on answer page
-        c.setFont("Helvetica", 8)
-        c.drawString(margin, margin - 20, footer_text)
-
-        # Save PDF
-        c.save()
-
-    def _wrap_text(self, text: str, max_width: float, canvas_obj, font_size: int = 11) -> List[str]:
-        """Wrap text to fit within max_width"""
-        words = text.split()
-        lines = []
-        current_line = []
-
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            text_width = canvas_obj.stringWidth(test_line, "Helvetica", font_size)
-
-            if text_width <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
+        quiz_name: str,
+        quiz_style: str = "Split Page",
+        output_format: str = "pdf",
+        font: Optional[str] = None
+    ) -> io.BytesIO:
+        """
+        Render a quiz into an in-memory stream, positioned at the start
 
-        if current_line:
-            lines.append(' '.join(current_line))
+        Same arguments as create_quiz_bytes(); useful for streaming a
+        response without touching the filesystem.
+        """
+        layout = self.layout_quiz(quiz_data, quiz_name, quiz_style, font)
+        buffer = io.BytesIO()
+        self.render_layout(layout, buffer, output_format)
+        buffer.seek(0)
+        return buffer
 
-        return lines
+    def render_layout(
+        self,
+        layout: QuizLayout,
+        output: Union[Path, BinaryIO],
+        output_format: Optional[str] = None,
+        pages_per_part: Optional[int] = None,
+        cancel: Optional[threading.Event] = None
+    ):
+        """
+        Draw a precomputed layout to a file or binary stream
 
+        Args:
+            layout: Layout from layout_quiz() (or QuizLayout.from_dict())
+            output: Where to save the output - a file path or writable binary stream
+            output_format: "pdf", "html" or "text" (default: from the file suffix, else PDF)
+            pages_per_part: Stream PDF output in batches of this many pages to
+                bound memory (default: config.pdf_stream_pages; 0 disables)
+            cancel: Checked before each PDF page; a partly written output file
+                is deleted when rendering is cancelled
+        """
+        if isinstance(output, Path):
+            if output_format is None:
+                output_format = {".html": "html", ".htm": "html", ".txt": "text"}.get(
+                    output.suffix.lower(), "pdf"
+                )
+
+            # Ensure output directory exists
+            if not output.parent.is_dir():
+                output.parent.mkdir(parents=True, exist_ok=True)
+
+        output_format = output_format or "pdf"
+        if output_format not in RENDERERS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        if pages_per_part is None:
+            pages_per_part = self.config.pdf_stream_pages
+
+        try:
+            if output_format != "pdf":
+                check_cancelled(cancel, "render")
+                RENDERERS[output_format]().render(layout, output)
+            elif pages_per_part and len(layout.pages) > pages_per_part:
+                StreamingPDFRenderer(pages_per_part).render(layout, output, cancel)
+            else:
+                RENDERERS[output_format]().render(layout, output, cancel)
+        except GenerationCancelled:
+            if isinstance(output, Path):
+                output.unlink(missing_ok=True)
+            raise
+
+    def render_layout_bytes(self, layout: QuizLayout, output_format: str = "pdf") -> bytes:
+        """Draw a precomputed layout in memory and return the document bytes"""
+        buffer = io.BytesIO()
+        self.render_layout(layout, buffer, output_format)
+        return buffer.getvalue()
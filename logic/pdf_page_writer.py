@@ -0,0 +1,221 @@
+"""
+Incremental PDF writer - appends the pages of small PDFs to one output file
+as they are produced, so a long document never has to be held in memory
+"""
+
+from hashlib import sha1
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Set, Union
+
+try:
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import (
+        ArrayObject,
+        DictionaryObject,
+        EncodedStreamObject,
+        IndirectObject,
+        NameObject,
+        StreamObject,
+    )
+except ImportError:
+    PdfReader = None
+
+
+# Small shared objects (fonts, resource dicts, page furniture forms) up to
+# this size are deduplicated across parts
+_DEDUPE_MAX_BYTES = 4096
+
+_CATALOG_ID = 1
+_PAGES_ID = 2
+
+
+class PDFPageWriter:
+    """
+    Streams pages from part PDFs into a single output PDF
+
+    Objects are copied one at a time with their encoded stream data left
+    untouched, so page content is byte-identical to the parts. Only the
+    xref offsets and the list of page ids are kept until close().
+    """
+
+    def __init__(self, output: Union[Path, BinaryIO], title: Optional[str] = None):
+        """
+        Open a streaming PDF writer
+
+        Args:
+            output: File path or writable binary stream (need not be seekable)
+            title: Document title recorded in the info dictionary
+        """
+        if PdfReader is None:
+            raise ImportError("PyPDF2 not installed. Install with: pip install PyPDF2")
+
+        self._owns_stream = isinstance(output, Path)
+        self._stream = open(output, "wb") if self._owns_stream else output
+        self._title = title
+        self._position = 0
+        self._offsets: List[int] = [0, 0, 0]  # Ids 1 and 2 are written at close()
+        self._page_ids: List[int] = []
+        self._dedupe: Dict[bytes, int] = {}
+
+        self._write(b"%PDF-1.3\n%\xe2\xe3\xcf\xd3\n")
+
+    def add_pdf(self, data: bytes):
+        """
+        Append every page of a complete PDF
+
+        Args:
+            data: The part PDF's bytes
+        """
+        reader = PdfReader(BytesIO(data))
+        id_map: Dict[int, int] = {}
+        in_progress: Set[int] = set()
+
+        for page in reader.pages:
+            page_id = self._allocate_id()
+            body = self._copy_dict(page, reader, id_map, in_progress, skip_parent=True)
+            body[NameObject("/Parent")] = IndirectObject(_PAGES_ID, 0, None)
+            self._write_object(page_id, _serialize(body))
+            self._page_ids.append(page_id)
+
+    def add_blank_page(self, width: float, height: float):
+        """Append an empty page (e.g. so the next section starts on a right-hand page)"""
+        page_id = self._allocate_id()
+        self._write_object(
+            page_id,
+            f"<< /MediaBox [ 0 0 {width:g} {height:g} ] /Parent {_PAGES_ID} 0 R "
+            f"/Resources << >> /Type /Page >>".encode("latin-1")
+        )
+        self._page_ids.append(page_id)
+
+    @property
+    def page_count(self) -> int:
+        """Number of pages written so far"""
+        return len(self._page_ids)
+
+    def close(self):
+        """Write the page tree, catalog and cross-reference table"""
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(
+            _PAGES_ID,
+            f"<< /Count {len(self._page_ids)} /Kids [ {kids} ] /Type /Pages >>".encode("latin-1")
+        )
+        self._write_object(_CATALOG_ID, f"<< /Pages {_PAGES_ID} 0 R /Type /Catalog >>".encode("latin-1"))
+
+        info_id = self._allocate_id()
+        info = "<< /Producer (QuizLM)"
+        if self._title:
+            info += " /Title " + _pdf_string(self._title)
+        self._write_object(info_id, (info + " >>").encode("latin-1"))
+
+        xref_position = self._position
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets[1:])
+        lines.append(
+            f"trailer\n<< /Info {info_id} 0 R /Root {_CATALOG_ID} 0 R /Size {len(self._offsets)} >>\n"
+            f"startxref\n{xref_position}\n%%EOF\n"
+        )
+        self._write("".join(lines).encode("latin-1"))
+
+        if self._owns_stream:
+            self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._owns_stream:
+            self._stream.close()
+
+    def _copy_indirect(self, ref, reader, id_map: Dict[int, int], in_progress: Set[int]) -> int:
+        """Copy a referenced object (children first) and return its new id"""
+        if ref.idnum in id_map:
+            return id_map[ref.idnum]
+        if ref.idnum in in_progress:
+            raise ValueError(f"Unsupported reference cycle through object {ref.idnum}")
+
+        in_progress.add(ref.idnum)
+        obj = reader.get_object(ref)
+        copied = self._copy_value(obj, reader, id_map, in_progress)
+        data = _serialize(copied)
+        in_progress.discard(ref.idnum)
+
+        # Fonts and furniture forms are identical in every part; write them once.
+        # Page content streams are left out so the table does not grow per page
+        is_page_content = isinstance(obj, StreamObject) and obj.get("/Subtype") != "/Form"
+        key = None
+        if not is_page_content and len(data) <= _DEDUPE_MAX_BYTES:
+            key = sha1(data).digest()
+        if key is not None and key in self._dedupe:
+            new_id = self._dedupe[key]
+        else:
+            new_id = self._allocate_id()
+            self._write_object(new_id, data)
+            if key is not None:
+                self._dedupe[key] = new_id
+
+        id_map[ref.idnum] = new_id
+        return new_id
+
+    def _copy_value(self, value, reader, id_map: Dict[int, int], in_progress: Set[int]):
+        """Copy a direct value, renumbering any indirect references inside it"""
+        if isinstance(value, IndirectObject):
+            return IndirectObject(self._copy_indirect(value, reader, id_map, in_progress), 0, None)
+        if isinstance(value, StreamObject):
+            stream = EncodedStreamObject()
+            stream.update(self._copy_dict(value, reader, id_map, in_progress))
+            # Keep the encoded bytes exactly as the part wrote them
+            stream._data = value._data
+            return stream
+        if isinstance(value, DictionaryObject):
+            return self._copy_dict(value, reader, id_map, in_progress)
+        if isinstance(value, ArrayObject):
+            return ArrayObject(
+                self._copy_value(item, reader, id_map, in_progress) for item in value
+            )
+        return value
+
+    def _copy_dict(
+        self,
+        value,
+        reader,
+        id_map: Dict[int, int],
+        in_progress: Set[int],
+        skip_parent: bool = False
+    ) -> DictionaryObject:
+        """Copy a dictionary's raw (unresolved) entries"""
+        copied = DictionaryObject()
+        for key, item in dict.items(value):
+            if skip_parent and key == "/Parent":
+                continue
+            if key == "/Length":
+                continue  # Recomputed from the stream data when written
+            copied[key] = self._copy_value(item, reader, id_map, in_progress)
+        return copied
+
+    def _allocate_id(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets) - 1
+
+    def _write_object(self, object_id: int, data: bytes):
+        self._offsets[object_id] = self._position
+        self._write(f"{object_id} 0 obj\n".encode("latin-1") + data + b"\nendobj\n")
+
+    def _write(self, data: bytes):
+        self._stream.write(data)
+        self._position += len(data)
+
+
+def _serialize(obj) -> bytes:
+    """Serialize a PDF object to bytes"""
+    buffer = BytesIO()
+    obj.write_to_stream(buffer, None)
+    return buffer.getvalue()
+
+
+def _pdf_string(value: str) -> str:
+    """Encode a literal PDF string"""
+    escaped = value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return "(" + escaped.encode("latin-1", "replace").decode("latin-1") + ")"
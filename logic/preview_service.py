@@ -0,0 +1,178 @@
+"""
+Live quiz preview - page thumbnails cached by page content
+
+Each page of a layout is hashed from what is drawn on it. Pages whose hash
+already has a thumbnail are reused as they are; only new or changed pages are
+rendered and rasterized, so tweaking difficulty, the word list or the style
+re-renders just the pages that actually differ.
+"""
+
+from dataclasses import replace
+from hashlib import sha1
+from pathlib import Path
+from typing import Callable, List, Optional
+import io
+import os
+import time
+
+try:
+    from pdf2image import convert_from_bytes
+except ImportError:
+    convert_from_bytes = None
+
+from .layout_renderers import PDFRenderer
+from .metrics import CACHE_REQUESTS
+from .pdf_generator import PDFGenerator
+from .quiz_layout import QuizLayout, PageLayout
+from config import Config
+
+
+class PreviewService:
+    """Renders quiz page thumbnails, reusing cached rasters of unchanged pages"""
+
+    def __init__(
+        self,
+        config: Config,
+        dpi: Optional[int] = None,
+        max_cached_pages: int = 2000,
+        rasterize: Optional[Callable[[bytes, int], List]] = None
+    ):
+        """
+        Initialize preview service
+
+        Args:
+            config: Application configuration
+            dpi: Thumbnail resolution (default: config.preview_dpi)
+            max_cached_pages: Thumbnails kept on disk before the oldest are pruned
+            rasterize: Function (pdf_bytes, dpi) -> list of PIL images
+                (default: pdf2image)
+        """
+        self.config = config
+        self.dpi = dpi or config.preview_dpi
+        self.max_cached_pages = max_cached_pages
+        self.cache_dir = config.data_dir / "preview_cache"
+        self.pdf_generator = PDFGenerator(config)
+
+        if rasterize is None:
+            if convert_from_bytes is None:
+                raise ImportError(
+                    "pdf2image not installed. Install with: pip install pdf2image\n"
+                    "Note: pdf2image requires poppler:\n"
+                    "  - macOS: brew install poppler\n"
+                    "  - Ubuntu/Debian: apt-get install poppler-utils\n"
+                    "  - Windows: Download from https://github.com/oschwartz10612/poppler-windows"
+                )
+            rasterize = lambda data, dpi: convert_from_bytes(data, dpi=dpi)
+        self._rasterize = rasterize
+
+    def preview(
+        self,
+        quiz_data: dict,
+        quiz_name: str,
+        quiz_style: str = "Split Page",
+        font: Optional[str] = None
+    ) -> dict:
+        """
+        Lay out a quiz and get a thumbnail for each page
+
+        Args:
+            quiz_data: Quiz content (paragraphs and answer key)
+            quiz_name: Name of the quiz
+            quiz_style: Layout style ("Split Page" or "Full Page")
+            font: Font family (default: the generator's default font)
+
+        Returns:
+            Same as preview_layout()
+        """
+        layout = self.pdf_generator.layout_quiz(quiz_data, quiz_name, quiz_style, font)
+        return self.preview_layout(layout)
+
+    def preview_layout(self, layout: QuizLayout) -> dict:
+        """
+        Get a thumbnail for each page of a layout
+
+        Args:
+            layout: Paginated quiz
+
+        Returns:
+            Dict with:
+                - pages: Thumbnail PNG path per page, in page order
+                - rendered: Number of pages that had to be rasterized
+                - cached: Number of pages served from the cache
+                - seconds: Time taken
+        """
+        start = time.perf_counter()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        paths = []
+        dirty: List[PageLayout] = []
+        dirty_paths: List[Path] = []
+        seen = set()
+        for page in layout.pages:
+            path = self.cache_dir / f"{self.page_key(layout, page)}.png"
+            paths.append(path)
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                # Mark as recently used so pruning drops stale pages first
+                os.utime(path)
+            except FileNotFoundError:
+                dirty.append(page)
+                dirty_paths.append(path)
+
+        if dirty:
+            # Changed pages are drawn together into one small PDF and rasterized in one go
+            buffer = io.BytesIO()
+            PDFRenderer().render(replace(layout, pages=tuple(dirty)), buffer)
+            images = self._rasterize(buffer.getvalue(), self.dpi)
+
+            for image, path in zip(images, dirty_paths):
+                # Write then rename, so a concurrent reader never sees half a file
+                temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                image.save(temp_path, format="PNG")
+                os.replace(temp_path, path)
+
+            self._prune()
+
+        CACHE_REQUESTS.inc(len(paths) - len(dirty), cache="preview", result="hit")
+        CACHE_REQUESTS.inc(len(dirty), cache="preview", result="miss")
+
+        return {
+            "pages": paths,
+            "rendered": len(dirty),
+            "cached": len(paths) - len(dirty),
+            "seconds": round(time.perf_counter() - start, 4)
+        }
+
+    def page_key(self, layout: QuizLayout, page: PageLayout) -> str:
+        """Hash of everything that affects how a page looks"""
+        # Boxes are frozen dataclasses, so their repr lists every field
+        content = repr((
+            layout.page_width,
+            layout.page_height,
+            self.dpi,
+            layout.fonts,
+            layout.page_boxes(page)
+        ))
+        return sha1(content.encode("utf-8")).hexdigest()
+
+    def clear(self):
+        """Delete all cached thumbnails"""
+        if self.cache_dir.is_dir():
+            for path in self.cache_dir.glob("*.png"):
+                path.unlink()
+
+    def _prune(self):
+        """Drop the least recently used thumbnails beyond max_cached_pages"""
+        thumbnails = list(self.cache_dir.glob("*.png"))
+        excess = len(thumbnails) - self.max_cached_pages
+        if excess <= 0:
+            return
+
+        thumbnails.sort(key=lambda path: path.stat().st_mtime)
+        for path in thumbnails[:excess]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
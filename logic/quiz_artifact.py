@@ -0,0 +1,104 @@
+"""
+Quiz artifacts - everything needed to redraw a generated quiz
+
+An artifact is saved next to each quiz PDF as <quiz name>.quiz.json.gz. It
+holds the source hash, the LLM word selection and the built quiz content, so
+a quiz can be re-rendered in another style or format without re-extracting
+the source or calling the LLM again.
+"""
+
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import List, Optional
+import gzip
+import json
+
+
+ARTIFACT_VERSION = 1
+ARTIFACT_SUFFIX = ".quiz.json.gz"
+
+
+def artifact_path(quizzes_dir: Path, quiz_name: str) -> Path:
+    """Where the artifact for a quiz is stored"""
+    return quizzes_dir / f"{quiz_name}{ARTIFACT_SUFFIX}"
+
+
+def source_hash(content: str) -> str:
+    """SHA-256 of the extracted source text"""
+    return sha256(content.encode("utf-8")).hexdigest()
+
+
+def build_artifact(
+    quiz_name: str,
+    content: str,
+    difficulty: str,
+    quiz_style: str,
+    word_selection: dict,
+    quizzes: List[dict],
+    generated_on: Optional[str] = None,
+    extra: Optional[dict] = None
+) -> dict:
+    """
+    Assemble an artifact
+
+    Args:
+        quiz_name: Name of the quiz
+        content: Extracted source text (only its hash is stored)
+        difficulty: Quiz difficulty
+        quiz_style: Layout style the quiz was first rendered in
+        word_selection: Phase 1 result from the LLM
+        quizzes: Quiz data dicts (paragraphs, answer key, metadata) - one,
+            or one per variant
+        generated_on: Date printed in the footer (defaults to today)
+        extra: Additional fields (e.g. variant seed)
+
+    Returns:
+        JSON-serializable artifact dict
+    """
+    artifact = {
+        "artifact_version": ARTIFACT_VERSION,
+        "name": quiz_name,
+        "source_hash": source_hash(content),
+        "source_length": len(content),
+        "difficulty": difficulty,
+        "quiz_style": quiz_style,
+        "generated_on": generated_on or datetime.now().strftime('%Y-%m-%d'),
+        "word_selection": word_selection,
+        "quizzes": quizzes
+    }
+    if extra:
+        artifact.update(extra)
+    return artifact
+
+
+def save_artifact(path: Path, artifact: dict):
+    """Write an artifact as compact gzipped JSON"""
+    data = json.dumps(artifact, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    # Write then rename so a crash never leaves a truncated artifact behind
+    temp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(temp_path, "wb") as f:
+        f.write(data)
+    temp_path.replace(path)
+
+
+def load_artifact(path: Path) -> dict:
+    """
+    Read an artifact written by save_artifact()
+
+    Raises:
+        FileNotFoundError: If the quiz has no artifact
+        ValueError: If the artifact is from an unsupported version
+    """
+    if not path.exists():
+        raise FileNotFoundError(f"No quiz artifact found at {path}")
+
+    with gzip.open(path, "rb") as f:
+        artifact = json.loads(f.read().decode("utf-8"))
+
+    version = artifact.get("artifact_version")
+    if version != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported quiz artifact version: {version}")
+
+    return artifact
@@ -3,9 +3,12 @@ Phase 2: Local deterministic quiz building
 Takes word selection from LLM and builds quiz with precise formatting
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
+import random
 import re
 
+from .tracing import span
+
 
 class QuizBuilder:
     """Builds fill-in-the-blank quizzes with precise formatting control"""
@@ -39,26 +42,92 @@ class QuizBuilder:
                 - answer_key: List of answer dicts with answer, blank, position
                 - metadata: Stats about the quiz
         """
+        occurrences = self._collect_occurrences(
+            source_text, words_to_blank, max_occurrences_per_word
+        )
+        with span("build.assemble", blanks=len(occurrences)):
+            return self._apply_blanks(source_text, occurrences)
+
+    def build_variants(
+        self,
+        source_text: str,
+        words_to_blank: List[Dict],
+        num_variants: int,
+        seed: int,
+        blank_fraction: float = 0.8,
+        max_occurrences_per_word: int = 2
+    ) -> List[Dict]:
+        """
+        Build several versions of a quiz from one word selection
+
+        The source text is scanned for the selected words once; each variant
+        then blanks its own seeded subset of those occurrences and picks its
+        own hint length per blank within the difficulty's range. The same
+        seed always reproduces the same variants.
+
+        Args:
+            source_text: The original text content
+            words_to_blank: List of word dicts from LLM (shared by all variants)
+            num_variants: Number of versions to build
+            seed: Base random seed
+            blank_fraction: Share of the candidate blanks each variant uses
+            max_occurrences_per_word: Maximum times to blank each word (default 2)
+
+        Returns:
+            List of build_quiz() results, each with metadata variant_id and variant_seed
+        """
+        occurrences = self._collect_occurrences(
+            source_text, words_to_blank, max_occurrences_per_word
+        )
+
+        variants = []
+        for index in range(num_variants):
+            variant_id = variant_label(index)
+            rng = random.Random(f"{seed}:{variant_id}")
+
+            count = max(1, round(len(occurrences) * blank_fraction)) if occurrences else 0
+            subset = rng.sample(occurrences, min(count, len(occurrences)))
+            subset.sort(key=lambda x: x['position'], reverse=True)
+
+            with span("build.assemble", blanks=len(subset), variant=variant_id):
+                result = self._apply_blanks(source_text, subset, rng)
+            result["metadata"]["variant_id"] = variant_id
+            result["metadata"]["variant_seed"] = seed
+            for answer in result["answer_key"]:
+                answer["variant_id"] = variant_id
+            variants.append(result)
+
+        return variants
+
+    def _collect_occurrences(
+        self,
+        source_text: str,
+        words_to_blank: List[Dict],
+        max_occurrences_per_word: int
+    ) -> List[Dict]:
+        """Find non-overlapping blank candidates, highest position first"""
         # Step 1: Collect ALL occurrences across ALL words
         all_occurrences = []
 
-        for word_info in words_to_blank:
-            word = word_info.get('word', '')
-            if not word:
-                continue
-
-            # Find all occurrences of this word in original text
-            occurrences = self._find_word_occurrences(source_text, word)
-
-            # Limit to max_occurrences_per_word
-            for position, matched_word in occurrences[:max_occurrences_per_word]:
-                all_occurrences.append({
-                    'position': position,
-                    'length': len(matched_word),
-                    'matched_word': matched_word,
-                    'word_info': word_info,
-                    'importance': word_info.get('importance', 0.5)
-                })
+        with span("build.match", words=len(words_to_blank)) as match_span:
+            for word_info in words_to_blank:
+                word = word_info.get('word', '')
+                if not word:
+                    continue
+
+                # Find all occurrences of this word in original text
+                occurrences = self._find_word_occurrences(source_text, word)
+
+                # Limit to max_occurrences_per_word
+                for position, matched_word in occurrences[:max_occurrences_per_word]:
+                    all_occurrences.append({
+                        'position': position,
+                        'length': len(matched_word),
+                        'matched_word': matched_word,
+                        'word_info': word_info,
+                        'importance': word_info.get('importance', 0.5)
+                    })
+            match_span.set(occurrences=len(all_occurrences))
 
         # Step 2: Sort by position (DESCENDING - highest position first)
         # This ensures we replace from end to beginning, avoiding position shifts
@@ -69,22 +138,33 @@ class QuizBuilder:
         filtered_occurrences = []
         occupied_ranges = []
 
-        for occ in all_occurrences:
-            pos = occ['position']
-            length = occ['length']
-            end_pos = pos + length
+        with span("build.overlap", candidates=len(all_occurrences)) as overlap_span:
+            for occ in all_occurrences:
+                pos = occ['position']
+                length = occ['length']
+                end_pos = pos + length
 
-            # Check if this position overlaps with any already-selected position
-            overlaps = False
-            for occupied_start, occupied_end in occupied_ranges:
-                if (pos < occupied_end and end_pos > occupied_start):
-                    overlaps = True
-                    break
+                # Check if this position overlaps with any already-selected position
+                overlaps = False
+                for occupied_start, occupied_end in occupied_ranges:
+                    if (pos < occupied_end and end_pos > occupied_start):
+                        overlaps = True
+                        break
 
-            if not overlaps:
-                filtered_occurrences.append(occ)
-                occupied_ranges.append((pos, end_pos))
+                if not overlaps:
+                    filtered_occurrences.append(occ)
+                    occupied_ranges.append((pos, end_pos))
+            overlap_span.set(kept=len(filtered_occurrences))
 
+        return filtered_occurrences
+
+    def _apply_blanks(
+        self,
+        source_text: str,
+        filtered_occurrences: List[Dict],
+        rng: Optional[random.Random] = None
+    ) -> Dict:
+        """Replace occurrences (highest position first) with blanks and build the result"""
         # Step 4: Replace from end to beginning (positions don't shift!)
         quiz_text = source_text
         answer_key = []
@@ -95,7 +175,7 @@ class QuizBuilder:
             word_info = occ['word_info']
 
             # Generate the blank with hint letters
-            blank = self._generate_blank_with_hint(matched_word)
+            blank = self._generate_blank_with_hint(matched_word, rng)
 
             # Replace in quiz text (positions are still valid since we work backwards)
             before = quiz_text[:position]
@@ -153,7 +233,7 @@ class QuizBuilder:
         return occurrences
 
 
-    def _generate_blank_with_hint(self, word: str) -> str:
+    def _generate_blank_with_hint(self, word: str, rng: Optional[random.Random] = None) -> str:
         """
         Generate a blank with hint letters based on difficulty
 
@@ -161,6 +241,8 @@ class QuizBuilder:
 
         Args:
             word: The word to create a blank for
+            rng: When given (quiz variants), the hint share is drawn from the
+                difficulty's range instead of fixed, so versions differ
 
         Returns:
             String with hint letters + underscores (e.g., "mi__________________________")
@@ -170,10 +252,12 @@ class QuizBuilder:
         # Determine hint letter count based on difficulty
         if self.difficulty == "Easy":
             # Show first 40-50% of letters (min 1, max 4)
-            hint_count = max(1, min(4, (word_length * 45) // 100))
+            percent = rng.randint(40, 50) if rng else 45
+            hint_count = max(1, min(4, (word_length * percent) // 100))
         elif self.difficulty == "Medium":
             # Show first 25-30% of letters (min 1, max 3)
-            hint_count = max(1, min(3, (word_length * 27) // 100))
+            percent = rng.randint(25, 30) if rng else 27
+            hint_count = max(1, min(3, (word_length * percent) // 100))
         else:  # Hard
             # Show first letter only, unless word is very short
             if word_length <= 3:
@@ -253,3 +337,13 @@ class QuizBuilder:
                 })
 
         return paragraphs
+
+
+def variant_label(index: int) -> str:
+    """Variant ID for a 0-based index: A, B, ..., Z, AA, AB, ..."""
+    label = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return label
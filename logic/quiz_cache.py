@@ -0,0 +1,160 @@
+"""
+Quiz cache - finds an existing quiz generated from identical inputs
+
+Quizzes are indexed by source content hash, difficulty, style, font and the
+word selector (provider, model and prompt version). Generating a quiz whose
+inputs match an indexed one reuses that quiz's artifact instead of
+extracting, calling the LLM and building again. Reused copies are indexed
+too, so the inputs stay cached while any copy exists. Source files are also
+indexed by a hash of their bytes, so an unchanged document is recognised
+before it is extracted.
+"""
+
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+import sqlite3
+import threading
+
+from .metrics import CACHE_REQUESTS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quizzes (
+    content_hash TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    quiz_style TEXT NOT NULL,
+    font TEXT NOT NULL,
+    selector TEXT NOT NULL,
+    quiz_name TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (content_hash, difficulty, quiz_style, font, selector, quiz_name)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    file_hash TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class QuizCache:
+    """SQLite index of generated quizzes by their inputs, with hit/miss counts"""
+
+    def __init__(self, path: Path):
+        """
+        Open (or create) a cache index
+
+        Args:
+            path: SQLite database file
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _migrate(self):
+        """Re-key an index from before copies were indexed (one quiz per set of inputs)"""
+        columns = {row[1]: row[5] for row in self._conn.execute("PRAGMA table_info(quizzes)")}
+        if not columns or columns.get("quiz_name"):
+            return
+        self._conn.execute("ALTER TABLE quizzes RENAME TO quizzes_old")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute("INSERT INTO quizzes SELECT * FROM quizzes_old")
+        self._conn.execute("DROP TABLE quizzes_old")
+
+    def content_hash_for_file(self, source_file: Path) -> Optional[str]:
+        """Content hash previously extracted from a file with identical bytes"""
+        digest = file_hash(source_file)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash FROM sources WHERE file_hash = ?", (digest,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def lookup(self, content_hash: str, difficulty: str, quiz_style: str, font: str, selector: str) -> Optional[str]:
+        """Name of the newest existing quiz generated from identical inputs"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT quiz_name FROM quizzes WHERE content_hash = ? AND difficulty = ? "
+                "AND quiz_style = ? AND font = ? AND selector = ? ORDER BY created_at DESC",
+                (content_hash, difficulty, quiz_style, font, selector)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record(
+        self,
+        quiz_name: str,
+        content_hash: str,
+        difficulty: str,
+        quiz_style: str,
+        font: str,
+        selector: str,
+        source_file: Optional[Path] = None
+    ):
+        """Index a generated quiz (and the file it was extracted from)"""
+        source_hash = file_hash(source_file) if source_file else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quizzes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, difficulty, quiz_style, font, selector, quiz_name, datetime.now().isoformat())
+            )
+            if source_hash:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?)", (source_hash, content_hash)
+                )
+            self._conn.commit()
+
+    def invalidate(self, quiz_name: str):
+        """Forget a quiz, e.g. because its files were deleted"""
+        with self._lock:
+            self._conn.execute("DELETE FROM quizzes WHERE quiz_name = ?", (quiz_name,))
+            self._conn.commit()
+
+    def count(self, hit: bool):
+        """Record whether a generation request was served from the cache"""
+        name = "hits" if hit else "misses"
+        CACHE_REQUESTS.inc(cache="quiz", result="hit" if hit else "miss")
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO stats VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                (name,)
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Indexed quizzes, hits, misses and hit rate"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            entries = self._conn.execute("SELECT COUNT(*) FROM quizzes").fetchone()[0]
+
+        hits = counts.get("hits", 0)
+        misses = counts.get("misses", 0)
+        return {
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
@@ -5,14 +5,28 @@ Phase 2: Local code builds quiz with precise formatting
 """
 
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
+import copy
 import json
+import random
+import threading
 
+from .cancellation import CancelToken, DeadlineExceeded, GenerationCancelled
 from .document_processor import DocumentProcessor
+from .generation_progress import GenerationResult, ProgressTracker
 from .word_selector import WordSelector
-from .quiz_builder import QuizBuilder
+from .quiz_builder import QuizBuilder, variant_label
 from .pdf_generator import PDFGenerator
+from .pdf_page_writer import PDFPageWriter
+from .layout_renderers import RENDERERS
+from .quiz_artifact import artifact_path, build_artifact, load_artifact, save_artifact, source_hash
+from .quiz_cache import QuizCache
+from .quiz_layout import QuizLayout
+from .quiz_pipeline import QuizPipeline
+from .metrics import GENERATION_SECONDS, GENERATIONS, SELECTIONS_COALESCED, STAGE_SECONDS, get_metrics
+from .single_flight import SingleFlight
+from .tracing import Trace, activate, span
 from config import Config
 
 
@@ -24,6 +38,17 @@ class QuizGenerator:
         self.doc_processor = DocumentProcessor(config)
         self.word_selector = WordSelector(config, proxies=proxies)
         self.pdf_generator = PDFGenerator(config)
+        # Identical selections requested concurrently (e.g. the same handout
+        # submitted by several users) share one LLM call
+        self.selection_flight = SingleFlight()
+        self.quiz_cache = None
+        if config.quiz_cache_enabled:
+            self.quiz_cache = QuizCache(config.data_dir / "quiz_cache.sqlite")
+
+        # Names of quizzes being generated right now, so concurrent calls
+        # cannot both claim the same name
+        self._active_names = set()
+        self._names_lock = threading.Lock()
 
     def generate_quiz(
         self,
@@ -31,35 +56,626 @@ class QuizGenerator:
         source_file: Optional[Path] = None,
         source_text: Optional[str] = None,
         difficulty: str = "Medium",
-        quiz_style: str = "Split Page"
-    ) -> Path:
+        quiz_style: str = "Split Page",
+        cancel_event: Optional[threading.Event] = None,
+        progress: Optional[Callable[[dict], None]] = None,
+        timeout: Optional[float] = None
+    ) -> GenerationResult:
         """
         Generate a quiz from source material
 
+        If a quiz was already generated from identical inputs, it is reused
+        (see reuse_cached_quiz()). Otherwise long documents are split into
+        chunks that flow through extraction, word selection and building
+        concurrently (see QuizPipeline).
+
+        Safe to call from several threads at once; each call keeps its own
+        progress state.
+
         Args:
             quiz_name: Unique name for the quiz
             source_file: Path to source document (PDF, DOCX, image, text)
             source_text: Raw text content (alternative to source_file)
             difficulty: Quiz difficulty (Easy, Medium, Hard)
             quiz_style: Quiz layout style (Split Page, Full Page)
+            cancel_event: Set from another thread to abandon generation; may
+                be a CancelToken carrying a deadline
+            progress: Called with an event dict as generation advances (see
+                ProgressTracker); without it, progress messages are printed
+            timeout: Seconds generation may take in total (None: no deadline)
 
         Returns:
-            Path to generated PDF quiz
+            GenerationResult with the output paths, metadata, per-stage
+            durations and LLM token usage (and trace_path when tracing is
+            enabled with QUIZLM_TRACE)
+
+        Raises:
+            GenerationCancelled: If cancelled (DeadlineExceeded if the
+                deadline passed); its stage says what was running. An LLM
+                request is abandoned at once, OCR and rendering stop at the
+                next page, and partial output is removed.
         """
         # Validate inputs
         if not source_file and not source_text:
             raise ValueError("Either source_file or source_text must be provided")
 
-        # Check for duplicate names
+        # Check for duplicate names, including quizzes other threads are generating
+        self._reserve_names([quiz_name])
+
+        tracker = ProgressTracker(quiz_name, progress)
+        cancel = CancelToken(timeout, parent=cancel_event)
+        trace = Trace(quiz_name) if self.config.trace_enabled else None
+        outcome = "failed"
+        try:
+            with activate(trace), span("generate", difficulty=difficulty, quiz_style=quiz_style):
+                result = self.reuse_cached_quiz(
+                    quiz_name, difficulty, quiz_style,
+                    content=source_text, source_file=source_file, progress=tracker, cancel=cancel
+                )
+                if result is None:
+                    result = self._generate_new(
+                        quiz_name, source_file, source_text, difficulty, quiz_style, cancel, tracker
+                    )
+            outcome = "reused" if result.reused_from else "done"
+        except GenerationCancelled as e:
+            outcome = "timed_out" if isinstance(e, DeadlineExceeded) else "cancelled"
+            if e.stage is None:
+                e.stage = tracker.stage
+            raise
+        finally:
+            self._release_names([quiz_name])
+            if trace is not None:
+                trace_path = self._save_trace(trace)
+            self._record_metrics(outcome, tracker)
+
+        if trace is not None:
+            result.trace_path = trace_path
+        return result
+
+    def _generate_new(
+        self,
+        quiz_name: str,
+        source_file: Optional[Path],
+        source_text: Optional[str],
+        difficulty: str,
+        quiz_style: str,
+        cancel: CancelToken,
+        tracker: ProgressTracker
+    ) -> GenerationResult:
+        """Extract, select, build and render a quiz that is not in the cache"""
+        # Extraction, Phase 1 (LLM word selection) and Phase 2 (building)
+        pipeline = QuizPipeline(
+            self,
+            chunk_chars=self.config.pipeline_chunk_chars,
+            queue_size=self.config.pipeline_queue_size,
+            selection_workers=self.config.selection_workers,
+            cancel_event=cancel,
+            progress=tracker
+        )
+        content, word_selection, quiz_data = pipeline.run(
+            quiz_name, source_file, source_text, difficulty
+        )
+
+        with tracker.timed("render"):
+            output_path, metadata = self._write_quiz(
+                quiz_name, quiz_data, content, word_selection, difficulty, quiz_style, cancel
+            )
+        tracker.advance("render")
+        # The pipeline re-chunks pasted text, so it is indexed by the text
+        # the caller passed, which is what the next lookup will hash
+        self.cache_quiz(
+            quiz_name, source_text if source_text is not None else content,
+            difficulty, quiz_style, source_file
+        )
+
+        tracker.finish()
+        return self._result(quiz_name, output_path, metadata, tracker)
+
+    def _find_cached_quiz(
+        self,
+        content: Optional[str],
+        source_file: Optional[Path],
+        difficulty: str,
+        quiz_style: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached quiz generated from identical inputs
+
+        Returns:
+            Tuple of (cached quiz name or None, content hash or None if unknown)
+        """
+        content_hash = None
+        if content is not None:
+            content_hash = source_hash(content)
+        elif source_file is not None:
+            try:
+                content_hash = self.quiz_cache.content_hash_for_file(Path(source_file))
+            except OSError:
+                content_hash = None
+        if content_hash is None:
+            return None, None
+
+        cached_name = self.quiz_cache.lookup(
+            content_hash, difficulty, quiz_style, self._cache_font(), self.word_selector.selector_id
+        )
+        return cached_name, content_hash
+
+    def _record_metrics(self, outcome: str, tracker: ProgressTracker):
+        """Count a finished generation and its stage times (and refresh the metrics file)"""
+        GENERATIONS.inc(outcome=outcome)
+        GENERATION_SECONDS.observe(tracker.elapsed())
+        for stage, seconds in dict(tracker.timings).items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+
+        if self.config.metrics_file:
+            try:
+                get_metrics().write_file(self.config.metrics_file)
+            except OSError as e:
+                print(f"Warning: Could not write metrics to {self.config.metrics_file}: {e}")
+
+    def _save_trace(self, trace: Trace) -> Optional[Path]:
+        """Write a generation's trace and summary to the traces directory"""
+        try:
+            return trace.save(self.config.traces_dir)
+        except OSError as e:
+            print(f"Warning: Could not save trace for '{trace.name}': {e}")
+            return None
+
+    def reuse_cached_quiz(
+        self,
+        quiz_name: str,
+        difficulty: str = "Medium",
+        quiz_style: str = "Split Page",
+        content: Optional[str] = None,
+        source_file: Optional[Path] = None,
+        progress: Optional[ProgressTracker] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Optional[GenerationResult]:
+        """
+        Write a quiz from an existing one generated from identical inputs
+
+        Inputs match when the source content, difficulty, style, font and word
+        selector (provider, model and prompt version) are the same. The
+        existing quiz's artifact is re-rendered under the new name, so no
+        extraction, LLM call or building is repeated.
+
+        Args:
+            quiz_name: Name for the new quiz
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+            quiz_style: Quiz layout style (Split Page, Full Page)
+            content: Source text, if already known
+            source_file: Source document; recognised by its bytes if it was
+                used for an earlier quiz
+            progress: Tracker for the generation this lookup is part of
+            cancel: Cancel event or CancelToken checked while drawing pages
+
+        Returns:
+            GenerationResult for the new quiz, or None if no identical quiz exists
+        """
+        if self.quiz_cache is None:
+            return None
+
+        tracker = progress or ProgressTracker(quiz_name)
+        with span("cache.lookup") as lookup_span:
+            while True:
+                cached_name, content_hash = self._find_cached_quiz(content, source_file, difficulty, quiz_style)
+                if cached_name is None:
+                    break
+                try:
+                    artifact = load_artifact(artifact_path(self.config.quizzes_dir, cached_name))
+                    break
+                except (FileNotFoundError, ValueError):
+                    # The indexed quiz has been deleted or is from an older
+                    # version; another copy may still be indexed
+                    self.quiz_cache.invalidate(cached_name)
+            lookup_span.set(hit=cached_name is not None)
+        if cached_name is None:
+            return None
+
+        quiz_data = dict(artifact["quizzes"][0], quiz_title=quiz_name)
         output_path = self.config.quizzes_dir / f"{quiz_name}.pdf"
-        if output_path.exists():
-            raise ValueError(f"Quiz '{quiz_name}' already exists")
 
-        # Extract content from source
-        if source_file:
-            content = self.doc_processor.process_document(source_file)
+        with tracker.timed("render"):
+            # The title is printed on every page, so the PDF is redrawn rather than copied
+            self.pdf_generator.create_quiz_pdf(
+                quiz_data=quiz_data,
+                output_path=output_path,
+                quiz_name=quiz_name,
+                quiz_style=quiz_style,
+                cancel=cancel
+            )
+            metadata = self._save_quiz_metadata(
+                quiz_name, quiz_data, difficulty, quiz_style, extra={"reused_from": cached_name}
+            )
+            save_artifact(
+                artifact_path(self.config.quizzes_dir, quiz_name),
+                dict(
+                    artifact,
+                    name=quiz_name,
+                    generated_on=datetime.now().strftime('%Y-%m-%d'),
+                    quizzes=[quiz_data]
+                )
+            )
+
+        # Index the copy too, so the inputs stay cached if the original is deleted
+        self.quiz_cache.record(
+            quiz_name, content_hash, difficulty, quiz_style, self._cache_font(), self.word_selector.selector_id
+        )
+        self.quiz_cache.count(hit=True)
+        tracker.finish(f"♻ Reused identical quiz '{cached_name}' in {tracker.elapsed() * 1000:.0f} ms")
+
+        return self._result(quiz_name, output_path, metadata, tracker, reused_from=cached_name)
+
+    def cache_quiz(
+        self,
+        quiz_name: str,
+        content: str,
+        difficulty: str,
+        quiz_style: str,
+        source_file: Optional[Path] = None,
+        count_miss: bool = True
+    ):
+        """
+        Index a freshly generated quiz so identical requests can reuse it
+
+        Only quizzes built from an unedited LLM selection should be indexed.
+
+        Args:
+            content: Source text the quiz will be looked up by: the caller's
+                text for pasted sources, the extracted text for files
+            count_miss: Count the generation as a cache miss; callers that
+                never looked the quiz up in the cache pass False
+        """
+        if self.quiz_cache is None:
+            return
+        if count_miss:
+            self.quiz_cache.count(hit=False)
+        self.quiz_cache.record(
+            quiz_name,
+            source_hash(content),
+            difficulty,
+            quiz_style,
+            self._cache_font(),
+            self.word_selector.selector_id,
+            Path(source_file) if source_file else None
+        )
+
+    def build_quiz_from_selection(
+        self,
+        quiz_name: str,
+        content: str,
+        word_selection: dict,
+        difficulty: str = "Medium",
+        quiz_style: str = "Split Page"
+    ) -> Path:
+        """
+        Phase 2 and rendering: build the quiz locally and write its PDF
+
+        An existing quiz with the same name is overwritten.
+
+        Args:
+            quiz_name: Name for the quiz
+            content: Extracted source text (from extract_content())
+            word_selection: Phase 1 result (from select_words())
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+            quiz_style: Quiz layout style (Split Page, Full Page)
+
+        Returns:
+            Path to generated PDF quiz
+        """
+        quiz_data = self.build_quiz_data(quiz_name, content, word_selection, difficulty)
+        return self.render_quiz(quiz_name, quiz_data, content, word_selection, difficulty, quiz_style)
+
+    def build_quiz_data(
+        self,
+        quiz_name: str,
+        content: str,
+        word_selection: dict,
+        difficulty: str = "Medium",
+        progress: Optional[ProgressTracker] = None
+    ) -> dict:
+        """
+        Phase 2: build the quiz locally with precise formatting
+
+        Args:
+            quiz_name: Name for the quiz (used as its title)
+            content: Extracted source text
+            word_selection: Phase 1 result
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+            progress: Tracker to report to (default: print progress)
+
+        Returns:
+            Quiz data (paragraphs, answer key, metadata) ready for layout
+        """
+        self._report(progress, f"\n🔧 Phase 2: Building quiz with precise blank formatting...", "build")
+        with self._timed(progress, "build"):
+            quiz_builder = QuizBuilder(difficulty=difficulty)
+            quiz_result = quiz_builder.build_quiz(
+                source_text=content,
+                words_to_blank=word_selection['words_to_blank'],
+                max_occurrences_per_word=2  # Blank each word max 2 times
+            )
+
+        metadata = quiz_result['metadata']
+        self._advance(
+            progress, "build",
+            f"✓ Created {metadata['total_blanks']} blanks ({metadata['coverage_percentage']}% of words)"
+        )
+
+        # Convert to format expected by PDF generator
+        return self._to_quiz_data(quiz_name, quiz_builder, quiz_result)
+
+    def render_quiz(
+        self,
+        quiz_name: str,
+        quiz_data: dict,
+        content: str,
+        word_selection: dict,
+        difficulty: str = "Medium",
+        quiz_style: str = "Split Page"
+    ) -> Path:
+        """
+        Write a built quiz's PDF, metadata and re-render artifact
+
+        Args:
+            quiz_name: Name for the quiz
+            quiz_data: Result of build_quiz_data()
+            content: Extracted source text (hashed into the artifact)
+            word_selection: Phase 1 result (stored in the artifact)
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+            quiz_style: Quiz layout style (Split Page, Full Page)
+
+        Returns:
+            Path to generated PDF quiz
+        """
+        return self._write_quiz(quiz_name, quiz_data, content, word_selection, difficulty, quiz_style)[0]
+
+    def _write_quiz(
+        self,
+        quiz_name: str,
+        quiz_data: dict,
+        content: str,
+        word_selection: dict,
+        difficulty: str,
+        quiz_style: str,
+        cancel: Optional[threading.Event] = None
+    ):
+        """Write the PDF, metadata and artifact; returns (PDF path, metadata)"""
+        output_path = self.config.quizzes_dir / f"{quiz_name}.pdf"
+
+        # Generate PDF
+        self.pdf_generator.create_quiz_pdf(
+            quiz_data=quiz_data,
+            output_path=output_path,
+            quiz_name=quiz_name,
+            quiz_style=quiz_style,
+            cancel=cancel
+        )
+
+        # Save metadata
+        metadata = self._save_quiz_metadata(quiz_name, quiz_data, difficulty, quiz_style)
+
+        # Save everything needed to re-render without extraction or LLM calls
+        save_artifact(
+            artifact_path(self.config.quizzes_dir, quiz_name),
+            build_artifact(quiz_name, content, difficulty, quiz_style, word_selection, [quiz_data])
+        )
+
+        return output_path, metadata
+
+    def generate_quiz_variants(
+        self,
+        quiz_name: str,
+        num_variants: int,
+        source_file: Optional[Path] = None,
+        source_text: Optional[str] = None,
+        difficulty: str = "Medium",
+        quiz_style: str = "Split Page",
+        seed: Optional[int] = None,
+        blank_fraction: float = 0.8,
+        separate_files: bool = False
+    ) -> List[Path]:
+        """
+        Generate several versions of a quiz (e.g. one per student)
+
+        Content is extracted and words are selected once; each variant blanks
+        a different seeded subset of the selected words with different hint
+        lengths. Answer keys are labelled with the variant ID (A, B, C, ...).
+
+        Args:
+            quiz_name: Unique name for the quiz
+            num_variants: Number of versions to generate
+            source_file: Path to source document (PDF, DOCX, image, text)
+            source_text: Raw text content (alternative to source_file)
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+            quiz_style: Quiz layout style (Split Page, Full Page)
+            seed: Random seed (default: random; recorded in the metadata so
+                the same variants can be rebuilt)
+            blank_fraction: Share of the selected blanks each variant uses
+            separate_files: Write one PDF per variant instead of one combined PDF
+
+        Returns:
+            Paths to the generated PDF(s)
+        """
+        if num_variants < 1:
+            raise ValueError("num_variants must be at least 1")
+        if not source_file and not source_text:
+            raise ValueError("Either source_file or source_text must be provided")
+
+        builder = QuizBuilder(difficulty=difficulty)
+        labels = [variant_label(index) for index in range(num_variants)]
+
+        # Check for duplicate names. Metadata and the artifact are saved under
+        # the base name even when each variant gets its own file, so it is
+        # reserved too
+        if separate_files:
+            output_paths = [self.config.quizzes_dir / f"{quiz_name}_{label}.pdf" for label in labels]
+        else:
+            output_paths = [self.config.quizzes_dir / f"{quiz_name}.pdf"]
+        names = list(dict.fromkeys([quiz_name] + [path.stem for path in output_paths]))
+        self._reserve_names(names)
+        try:
+            return self._generate_variants(
+                quiz_name, labels, output_paths, builder, source_file, source_text,
+                difficulty, quiz_style, seed, blank_fraction, separate_files
+            )
+        finally:
+            self._release_names(names)
+
+    def _generate_variants(
+        self,
+        quiz_name: str,
+        labels: List[str],
+        output_paths: List[Path],
+        builder: QuizBuilder,
+        source_file: Optional[Path],
+        source_text: Optional[str],
+        difficulty: str,
+        quiz_style: str,
+        seed: Optional[int],
+        blank_fraction: float,
+        separate_files: bool
+    ) -> List[Path]:
+        """Extract, select, build and render the variants of a reserved quiz name"""
+        num_variants = len(labels)
+        content = self.extract_content(source_file, source_text)
+        word_selection = self.select_words(content, difficulty)
+
+        if seed is None:
+            seed = random.randrange(2 ** 31)
+
+        print(f"\n🔧 Phase 2: Building {num_variants} variants (seed {seed})...")
+        variants = builder.build_variants(
+            source_text=content,
+            words_to_blank=word_selection['words_to_blank'],
+            num_variants=num_variants,
+            seed=seed,
+            blank_fraction=blank_fraction,
+            max_occurrences_per_word=2
+        )
+
+        layouts = []
+        variant_data = []
+        for result in variants:
+            variant_id = result['metadata']['variant_id']
+            quiz_data = self._to_quiz_data(f"{quiz_name} - Variant {variant_id}", builder, result)
+            quiz_data["variant_id"] = variant_id
+            variant_data.append(quiz_data)
+            layouts.append(self.pdf_generator.layout_quiz(quiz_data, quiz_name, quiz_style))
+            print(f"✓ Variant {variant_id}: {result['metadata']['total_blanks']} blanks")
+
+        # Every variant is laid out before anything is written, then drawn in one batch
+        if separate_files:
+            for layout, output_path in zip(layouts, output_paths):
+                self.pdf_generator.render_layout(layout, output_path)
         else:
-            content = source_text
+            with PDFPageWriter(output_paths[0], title=quiz_name) as writer:
+                for layout in layouts:
+                    writer.add_pdf(self.pdf_generator.render_layout_bytes(layout))
+
+        self._save_quiz_metadata(
+            quiz_name,
+            variant_data[0],
+            difficulty,
+            quiz_style,
+            extra={
+                "variant_seed": seed,
+                "blank_fraction": blank_fraction,
+                "variants": [
+                    {
+                        "variant_id": result['metadata']['variant_id'],
+                        "num_blanks": result['metadata']['total_blanks'],
+                        "answers": [answer["answer"] for answer in result['answer_key']]
+                    }
+                    for result in variants
+                ],
+                "files": [path.name for path in output_paths]
+            }
+        )
+
+        save_artifact(
+            artifact_path(self.config.quizzes_dir, quiz_name),
+            build_artifact(
+                quiz_name, content, difficulty, quiz_style, word_selection, variant_data,
+                extra={"variant_seed": seed, "blank_fraction": blank_fraction}
+            )
+        )
+
+        return output_paths
+
+    def rerender_quiz(
+        self,
+        quiz_name: str,
+        quiz_style: Optional[str] = None,
+        output_path: Optional[Path] = None,
+        output_format: Optional[str] = None,
+        font: Optional[str] = None,
+        variant_id: Optional[str] = None
+    ) -> Path:
+        """
+        Render a previously generated quiz again from its saved artifact
+
+        No source extraction or LLM calls are made - only layout and drawing.
+
+        Args:
+            quiz_name: Name of an existing quiz
+            quiz_style: Layout style (default: the style it was generated with)
+            output_path: Where to save (default: data/quizzes/<name>_<style>.<ext>)
+            output_format: "pdf", "html" or "text" (default: from output_path, else PDF)
+            font: Font family (default: the generator's default font)
+            variant_id: Render only this variant of a multi-variant quiz
+
+        Returns:
+            Path to the rendered file
+        """
+        artifact = load_artifact(artifact_path(self.config.quizzes_dir, quiz_name))
+
+        quizzes = artifact["quizzes"]
+        if variant_id:
+            quizzes = [quiz for quiz in quizzes if quiz.get("variant_id") == variant_id]
+            if not quizzes:
+                raise ValueError(f"Quiz '{quiz_name}' has no variant '{variant_id}'")
+
+        quiz_style = quiz_style or artifact["quiz_style"]
+
+        if output_path is None:
+            output_format = output_format or "pdf"
+            if output_format not in RENDERERS:
+                raise ValueError(f"Unsupported output format: {output_format}")
+            stem = f"{quiz_name}_{quiz_style.lower().replace(' ', '_')}"
+            if variant_id:
+                stem += f"_{variant_id}"
+            output_path = self.config.quizzes_dir / f"{stem}{RENDERERS[output_format].extension}"
+
+        layouts = [
+            self.pdf_generator.layout_quiz(
+                quiz, quiz_name, quiz_style, font, generated_on=artifact["generated_on"]
+            )
+            for quiz in quizzes
+        ]
+        layout = layouts[0] if len(layouts) == 1 else QuizLayout.concat(layouts, quiz_name)
+
+        self.pdf_generator.render_layout(layout, output_path, output_format)
+        print(f"✓ Re-rendered '{quiz_name}' as {quiz_style}: {output_path}")
+
+        return output_path
+
+    def extract_content(
+        self,
+        source_file: Optional[Path],
+        source_text: Optional[str],
+        progress: Optional[ProgressTracker] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> str:
+        """Extract and validate the source content"""
+        # Extract content from source
+        with self._timed(progress, "extract"):
+            if source_file:
+                content = self.doc_processor.process_document(
+                    source_file, cancel, progress.reporter("extract") if progress is not None else None
+                )
+            else:
+                content = source_text
 
         # Validate content
         if not content or not content.strip():
@@ -70,56 +686,147 @@ class QuizGenerator:
 
         # Log content length for debugging
         content_length = len(content)
-        print(f"Extracted content length: {content_length} characters")
-        print(f"First 200 chars: {content[:200]}")
-
-        # Phase 1: LLM selects words to blank based on educational value
-        print(f"\n📊 Phase 1: Analyzing content for key terms...")
-        word_selection = self.word_selector.select_words_to_blank(
-            source_content=content,
-            difficulty=difficulty
-        )
+        self._report(progress, f"Extracted content length: {content_length} characters", "extract")
+        self._advance(progress, "extract", f"First 200 chars: {content[:200]}")
+        if progress is not None:
+            progress.set_total_chunks(1)
+
+        return content
+
+    def select_words(
+        self,
+        content: str,
+        difficulty: str,
+        progress: Optional[ProgressTracker] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> dict:
+        """
+        Phase 1: ask the LLM which words to blank
+
+        Concurrent calls for the same content, difficulty and model are
+        coalesced into a single LLM request whose result they all receive.
+        A caller that is cancelled stops waiting without affecting the others.
+        """
+        self._report(progress, f"\n📊 Phase 1: Analyzing content for key terms...", "select")
+        key = (source_hash(content), difficulty, self.word_selector.provider, self.word_selector.model)
+        with self._timed(progress, "select") as select_span:
+            word_selection, shared = self.selection_flight.do(
+                key,
+                lambda: self.word_selector.select_words_to_blank(
+                    source_content=content,
+                    difficulty=difficulty,
+                    cancel=cancel
+                ),
+                cancel=cancel
+            )
+            select_span.set(chars=len(content), shared=shared)
+
+        if shared:
+            # Each caller gets its own copy to annotate; the tokens were
+            # spent by the call it joined
+            word_selection = copy.deepcopy(word_selection)
+            word_selection["usage"] = {"input_tokens": 0, "output_tokens": 0}
+            SELECTIONS_COALESCED.inc()
+            self._report(progress, "✓ Joined an identical word selection already in progress", "select")
+
+        if progress is not None:
+            progress.add_tokens(word_selection.get("usage"))
 
         num_selected = len(word_selection.get('words_to_blank', []))
         coverage = word_selection.get('estimated_coverage', 0)
-        print(f"✓ Selected {num_selected} words to blank (~{coverage*100:.1f}% coverage)")
-
-        # Phase 2: Build quiz locally with precise formatting
-        print(f"\n🔧 Phase 2: Building quiz with precise blank formatting...")
-        quiz_builder = QuizBuilder(difficulty=difficulty)
-        quiz_result = quiz_builder.build_quiz(
-            source_text=content,
-            words_to_blank=word_selection['words_to_blank'],
-            max_occurrences_per_word=2  # Blank each word max 2 times
+        self._advance(
+            progress, "select",
+            f"✓ Selected {num_selected} words to blank (~{coverage*100:.1f}% coverage)"
         )
 
-        metadata = quiz_result['metadata']
-        print(f"✓ Created {metadata['total_blanks']} blanks ({metadata['coverage_percentage']}% of words)")
+        return word_selection
 
-        # Convert to format expected by PDF generator
-        quiz_data = {
-            "quiz_title": quiz_name,
-            "paragraphs": quiz_builder.create_paragraphs_structure(quiz_result['quiz_text']),
-            "answer_key": quiz_result['answer_key'],
-            "metadata": metadata
-        }
+    def _report(self, progress: Optional[ProgressTracker], message: str, stage: str):
+        """Send a status message to the tracker, or print it when there is none"""
+        if progress is not None:
+            progress.message(message, stage)
+        else:
+            print(message)
 
-        # Generate PDF
-        self.pdf_generator.create_quiz_pdf(
-            quiz_data=quiz_data,
-            output_path=output_path,
+    def _advance(self, progress: Optional[ProgressTracker], stage: str, message: str):
+        """Report a finished unit of stage work"""
+        if progress is not None:
+            progress.advance(stage, message)
+        else:
+            print(message)
+
+    def _timed(self, progress: Optional[ProgressTracker], stage: str):
+        """Time a stage on the tracker (if any) and as a trace span"""
+        return progress.timed(stage) if progress is not None else span(stage)
+
+    def _result(
+        self,
+        quiz_name: str,
+        output_path: Path,
+        metadata: dict,
+        tracker: ProgressTracker,
+        reused_from: Optional[str] = None
+    ) -> GenerationResult:
+        return GenerationResult(
             quiz_name=quiz_name,
-            quiz_style=quiz_style
+            pdf_path=output_path,
+            artifact_path=artifact_path(self.config.quizzes_dir, quiz_name),
+            metadata_path=self._metadata_path(quiz_name),
+            metadata=metadata,
+            timings=dict(tracker.timings),
+            total_seconds=tracker.elapsed(),
+            token_usage=dict(tracker.tokens),
+            reused_from=reused_from
         )
 
-        # Save metadata
-        self._save_quiz_metadata(quiz_name, quiz_data, difficulty, quiz_style)
+    def _reserve_names(self, quiz_names: List[str]):
+        """
+        Claim quiz names for a generation
 
-        return output_path
+        Raises:
+            ValueError: If a name already has a PDF or artifact on disk, or is
+                being generated by another thread
+        """
+        with self._names_lock:
+            for name in quiz_names:
+                taken = (
+                    name in self._active_names
+                    or (self.config.quizzes_dir / f"{name}.pdf").exists()
+                    or artifact_path(self.config.quizzes_dir, name).exists()
+                )
+                if taken:
+                    raise ValueError(f"Quiz '{name}' already exists")
+            self._active_names.update(quiz_names)
+
+    def _release_names(self, quiz_names: List[str]):
+        with self._names_lock:
+            self._active_names.difference_update(quiz_names)
+
+    def _metadata_path(self, quiz_name: str) -> Path:
+        return self.config.data_dir / "quiz_metadata" / f"{quiz_name}.json"
 
+    def _cache_font(self) -> str:
+        """Font that quizzes are currently rendered in, as part of the cache key"""
+        return self.pdf_generator.default_font() or ""
 
-    def _save_quiz_metadata(self, quiz_name: str, quiz_data: dict, difficulty: str, quiz_style: str = "Full Page"):
-        """Save metadata about generated quiz"""
+    def _to_quiz_data(self, quiz_title: str, quiz_builder: QuizBuilder, quiz_result: dict) -> dict:
+        """Convert a built quiz to the format expected by the PDF generator"""
+        return {
+            "quiz_title": quiz_title,
+            "paragraphs": quiz_builder.create_paragraphs_structure(quiz_result['quiz_text']),
+            "answer_key": quiz_result['answer_key'],
+            "metadata": quiz_result['metadata']
+        }
+
+    def _save_quiz_metadata(
+        self,
+        quiz_name: str,
+        quiz_data: dict,
+        difficulty: str,
+        quiz_style: str = "Full Page",
+        extra: Optional[dict] = None
+    ):
+        """Save metadata about generated quiz; returns the saved metadata"""
         metadata_dir = self.config.data_dir / "quiz_metadata"
         metadata_dir.mkdir(parents=True, exist_ok=True)
 
@@ -140,8 +847,12 @@ class QuizGenerator:
             "coverage_percentage": quiz_metadata.get("coverage_percentage", 0),
             "original_word_count": quiz_metadata.get("original_word_count", 0)
         }
+        if extra:
+            metadata.update(extra)
 
-        metadata_file = metadata_dir / f"{quiz_name}.json"
+        metadata_file = self._metadata_path(quiz_name)
         with open(metadata_file, 'w') as f:
             json.dump(metadata, f, indent=2)
 
+        return metadata
+
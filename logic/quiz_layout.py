@@ -0,0 +1,641 @@
+"""
+Quiz layout - measure and paginate a quiz once into an immutable page model
+that any output backend (PDF, HTML, plain text) can draw from
+"""
+
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import json
+
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase import pdfmetrics
+except ImportError:
+    pdfmetrics = None
+
+from .font_registry import FontRegistry, get_font_registry
+
+
+# Line widths are sums of cached word widths rather than one measurement of
+# the whole line; allow for the floating point difference when comparing
+_WIDTH_EPSILON = 1e-6
+
+# reportlab's colors.lightgrey, used for the split-page divider
+_LIGHT_GREY = (0.827451, 0.827451, 0.827451)
+_BLACK = (0.0, 0.0, 0.0)
+
+
+@dataclass(frozen=True)
+class TextBox:
+    """A single line of text with its baseline position (PDF points)"""
+
+    x: float
+    y: float
+    text: str
+    font_name: str
+    font_size: float
+    role: str  # title, label, heading, quiz, answer, footer
+
+    kind = "text"
+
+
+@dataclass(frozen=True)
+class RuleBox:
+    """A straight line segment (PDF points)"""
+
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    line_width: float
+    color: Tuple[float, float, float] = _BLACK
+
+    kind = "rule"
+
+
+Box = Union[TextBox, RuleBox]
+
+
+@dataclass(frozen=True)
+class PageLayout:
+    """Everything drawn on one page, in drawing order"""
+
+    boxes: Tuple[Box, ...]
+    # Names of shared page templates drawn before the page's own boxes
+    templates: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class QuizLayout:
+    """A fully paginated quiz, independent of any output format"""
+
+    title: str
+    quiz_style: str
+    page_width: float
+    page_height: float
+    pages: Tuple[PageLayout, ...]
+    # Page furniture shared by many pages: (name, boxes) pairs
+    templates: Tuple[Tuple[str, Tuple[Box, ...]], ...] = ()
+    # TrueType faces the layout uses: (face name, font file) pairs
+    fonts: Tuple[Tuple[str, str], ...] = ()
+
+    def page_boxes(self, page: PageLayout) -> Tuple[Box, ...]:
+        """All boxes drawn on a page, with its templates expanded inline"""
+        if not page.templates:
+            return page.boxes
+
+        templates = dict(self.templates)
+        boxes = []
+        for name in page.templates:
+            boxes.extend(templates[name])
+        boxes.extend(page.boxes)
+        return tuple(boxes)
+
+    def to_dict(self) -> dict:
+        """Convert to a JSON-serializable dict"""
+        return {
+            "title": self.title,
+            "quiz_style": self.quiz_style,
+            "page_width": self.page_width,
+            "page_height": self.page_height,
+            "templates": {
+                name: [_box_to_dict(box) for box in boxes]
+                for name, boxes in self.templates
+            },
+            "pages": [
+                {
+                    "templates": list(page.templates),
+                    "boxes": [_box_to_dict(box) for box in page.boxes]
+                }
+                for page in self.pages
+            ],
+            "fonts": dict(self.fonts)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuizLayout":
+        """Rebuild a layout from to_dict() output"""
+        pages = tuple(
+            PageLayout(
+                boxes=tuple(_box_from_dict(box) for box in page["boxes"]),
+                templates=tuple(page["templates"])
+            )
+            for page in data["pages"]
+        )
+        templates = tuple(
+            (name, tuple(_box_from_dict(box) for box in boxes))
+            for name, boxes in data.get("templates", {}).items()
+        )
+
+        return cls(
+            title=data["title"],
+            quiz_style=data["quiz_style"],
+            page_width=data["page_width"],
+            page_height=data["page_height"],
+            pages=pages,
+            templates=templates,
+            fonts=tuple(data.get("fonts", {}).items())
+        )
+
+    @classmethod
+    def concat(cls, layouts: List["QuizLayout"], title: str) -> "QuizLayout":
+        """
+        Join layouts into one document, e.g. all variants of a quiz
+
+        Args:
+            layouts: Layouts with the same page size, in document order
+            title: Title of the combined document
+
+        Returns:
+            Layout with every page of every input layout
+        """
+        templates: Dict[str, Tuple[Box, ...]] = {}
+        fonts: Dict[str, str] = {}
+        for layout in layouts:
+            if (layout.page_width, layout.page_height) != (layouts[0].page_width, layouts[0].page_height):
+                raise ValueError("Cannot join layouts with different page sizes")
+            for name, boxes in layout.templates:
+                if templates.setdefault(name, boxes) != boxes:
+                    raise ValueError(f"Layouts define different '{name}' templates")
+            fonts.update(layout.fonts)
+
+        return cls(
+            title=title,
+            quiz_style=layouts[0].quiz_style,
+            page_width=layouts[0].page_width,
+            page_height=layouts[0].page_height,
+            pages=tuple(page for layout in layouts for page in layout.pages),
+            templates=tuple(templates.items()),
+            fonts=tuple(sorted(fonts.items()))
+        )
+
+    def to_json(self) -> str:
+        """Serialize to a JSON string"""
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, text: str) -> "QuizLayout":
+        """Rebuild a layout from to_json() output"""
+        return cls.from_dict(json.loads(text))
+
+
+def _box_to_dict(box: Box) -> dict:
+    """Serialize a box, tagged with its kind"""
+    return dict(asdict(box), kind=box.kind)
+
+
+def _box_from_dict(data: dict) -> Box:
+    """Rebuild a box from _box_to_dict() output"""
+    data = dict(data)
+    kind = data.pop("kind")
+    if kind == "rule":
+        data["color"] = tuple(data["color"])
+        return RuleBox(**data)
+    return TextBox(**data)
+
+
+class _PageBuilder:
+    """Collects boxes page by page while a layout is being computed"""
+
+    def __init__(self):
+        self.pages: List[PageLayout] = []
+        self.boxes: List[Box] = []
+        self.page_templates: List[str] = []
+        self.templates: Dict[str, Tuple[Box, ...]] = {}
+
+    def text(self, x: float, y: float, text: str, font_name: str, font_size: float, role: str):
+        self.boxes.append(TextBox(x, y, text, font_name, font_size, role))
+
+    def rule(self, x1: float, y1: float, x2: float, y2: float, line_width: float, color=_BLACK):
+        self.boxes.append(RuleBox(x1, y1, x2, y2, line_width, tuple(color)))
+
+    def define_template(self, name: str, boxes: Tuple[Box, ...]):
+        """Register page furniture that is drawn identically on many pages"""
+        self.templates[name] = tuple(boxes)
+
+    def use_template(self, name: str):
+        """Draw a registered template on the current page"""
+        if name not in self.page_templates:
+            self.page_templates.append(name)
+
+    def new_page(self):
+        self.pages.append(PageLayout(boxes=tuple(self.boxes), templates=tuple(self.page_templates)))
+        self.boxes = []
+        self.page_templates = []
+
+    def finish(self) -> Tuple[PageLayout, ...]:
+        if self.boxes or self.page_templates or not self.pages:
+            self.new_page()
+        return tuple(self.pages)
+
+
+class QuizLayoutEngine:
+    """Turns quiz data into a paginated QuizLayout"""
+
+    def __init__(self, font_registry: Optional[FontRegistry] = None):
+        """
+        Initialize layout engine
+
+        Args:
+            font_registry: Where fonts and word widths are cached
+                (default: the process-wide registry)
+        """
+        if pdfmetrics is None:
+            raise ImportError("reportlab not installed. Install with: pip install reportlab")
+
+        self.fonts = font_registry or get_font_registry()
+
+    def layout_quiz(
+        self,
+        quiz_data: dict,
+        quiz_name: str,
+        quiz_style: str = "Split Page",
+        generated_on: Optional[str] = None,
+        font: Optional[str] = None
+    ) -> QuizLayout:
+        """
+        Measure and paginate a quiz
+
+        Args:
+            quiz_data: Quiz content (paragraphs and answer key)
+            quiz_name: Name of the quiz (title fallback)
+            quiz_style: Layout style ("Split Page" or "Full Page")
+            generated_on: Date printed in the footer (defaults to today)
+            font: Font family, e.g. "Verdana" (default: Helvetica)
+
+        Returns:
+            Immutable page model of the quiz
+        """
+        generated_on = generated_on or datetime.now().strftime('%Y-%m-%d')
+        footer_text = f"Generated by QuizLM on {generated_on}"
+
+        fonts = self.fonts.resolve(font)
+        regular, _ = fonts
+
+        page = _PageBuilder()
+
+        # Footer is page furniture shared by both layouts
+        margin = 0.5 * inch
+        page.define_template("footer", (
+            TextBox(margin, margin - 20, footer_text, regular, 8, "footer"),
+        ))
+
+        if quiz_style == "Full Page":
+            self._layout_full_page(page, quiz_data, quiz_name, fonts)
+        else:
+            self._layout_split_page(page, quiz_data, quiz_name, fonts)
+
+        width, height = letter
+        return QuizLayout(
+            title=quiz_data.get("quiz_title", quiz_name),
+            quiz_style=quiz_style,
+            page_width=width,
+            page_height=height,
+            pages=page.finish(),
+            templates=tuple(page.templates.items()),
+            fonts=self.fonts.font_files(fonts)
+        )
+
+    def layout_contents(
+        self,
+        entries: List[Tuple[str, int]],
+        title: str = "Contents",
+        font: Optional[str] = None
+    ) -> QuizLayout:
+        """
+        Lay out a table of contents for a booklet
+
+        Args:
+            entries: (quiz title, first page number) pairs in booklet order
+            title: Heading printed on the first contents page
+            font: Font family (default: Helvetica)
+
+        Returns:
+            Page model of the contents pages
+        """
+        fonts = self.fonts.resolve(font)
+        regular, bold = fonts
+
+        page = _PageBuilder()
+        width, height = letter
+        margin = 0.5 * inch
+        right = width - margin
+
+        y_pos = height - margin
+        page.text(margin, y_pos, title, bold, 14, "title")
+        y_pos -= 30
+
+        widths = self.fonts.width_cache(regular, 11)
+        dot_width = self._measure(" .", widths, regular, 11)
+
+        for entry_title, page_number in entries:
+            if y_pos < margin + 30:
+                page.new_page()
+                y_pos = height - margin
+
+            number = str(page_number)
+            number_x = right - self._measure(number, widths, regular, 11)
+
+            # Titles that would run into the page number are truncated
+            lines = self.wrap_text(entry_title, number_x - margin - 4 * dot_width, 11, regular)
+            entry_text = lines[0] if lines else ""
+            text_width = pdfmetrics.stringWidth(entry_text, regular, 11)
+            leader = " ." * max(0, int((number_x - margin - text_width) / dot_width) - 1)
+
+            page.text(margin, y_pos, entry_text + leader, regular, 11, "heading")
+            page.text(number_x, y_pos, number, regular, 11, "label")
+            y_pos -= 16
+
+        return QuizLayout(
+            title=title,
+            quiz_style="Contents",
+            page_width=width,
+            page_height=height,
+            pages=page.finish(),
+            fonts=self.fonts.font_files(fonts)
+        )
+
+    def _get_paragraphs(self, quiz_data: dict) -> Tuple[List[dict], List[dict]]:
+        """Paragraphs and answer key (new format) or fallback to questions (old format)"""
+        paragraphs = quiz_data.get("paragraphs", [])
+        answer_key = quiz_data.get("answer_key", [])
+
+        if not paragraphs:  # Fallback to old question format
+            paragraphs = [{"text": q.get("text", ""), "section_heading": None}
+                         for q in quiz_data.get("questions", [])]
+            answer_key = [{"answer": q.get("answer", ""), "context": ""}
+                         for q in quiz_data.get("questions", [])]
+
+        return paragraphs, answer_key
+
+    def _layout_split_page(
+        self,
+        page: _PageBuilder,
+        quiz_data: dict,
+        quiz_name: str,
+        fonts: Tuple[str, str]
+    ):
+        """Lay out a split-page quiz (quiz on left, answers on right)"""
+        width, height = letter
+        regular, bold = fonts
+
+        # Margins
+        margin = 0.5 * inch
+        center_x = width / 2
+
+        # The center divider is identical on every page
+        page.define_template("divider", (
+            RuleBox(center_x, margin, center_x, height - margin, 0.5, _LIGHT_GREY),
+        ))
+
+        def draw_divider():
+            page.use_template("divider")
+
+        # Starting Y position
+        y_pos = height - margin
+
+        # Title
+        title = quiz_data.get("quiz_title", quiz_name)
+        page.text(margin, y_pos, title, bold, 14, "title")
+        y_pos -= 30
+
+        # Draw center line
+        draw_divider()
+
+        # Quiz section label
+        page.text(margin, y_pos, "QUIZ", bold, 10, "label")
+        answers_label = "ANSWERS"
+        if quiz_data.get("variant_id"):
+            answers_label += f" - VARIANT {quiz_data['variant_id']}"
+        page.text(center_x + 10, y_pos, answers_label, bold, 10, "label")
+        y_pos -= 20
+
+        paragraphs, answer_key = self._get_paragraphs(quiz_data)
+        answer_index = 0
+
+        for para in paragraphs:
+            # Section heading if present
+            if para.get("section_heading"):
+                if y_pos < margin + 70:
+                    page.new_page()
+                    y_pos = height - margin
+                    draw_divider()
+
+                page.text(margin, y_pos, para["section_heading"], bold, 12, "heading")
+                y_pos -= 20
+
+            # Word wrap for left side (quiz text)
+            left_width = center_x - margin - 15
+            quiz_text = para["text"]
+            wrapped_quiz = self.wrap_text(quiz_text, left_width, 11, regular)
+
+            # Count blanks in this paragraph
+            blank_count = quiz_text.count("___")
+
+            # Quiz text
+            start_y = y_pos
+            for line in wrapped_quiz:
+                if y_pos < margin + 30:
+                    page.new_page()
+                    y_pos = height - margin
+                    draw_divider()
+                    start_y = y_pos
+
+                page.text(margin, y_pos, line, regular, 11, "quiz")
+                y_pos -= 14
+
+            # Corresponding answers on right side
+            answer_y = start_y
+            for _ in range(blank_count):
+                if answer_index < len(answer_key):
+                    if answer_y < margin + 30:
+                        # Continue on next page
+                        break
+                    answer = answer_key[answer_index]["answer"]
+                    page.text(center_x + 10, answer_y, answer, regular, 11, "answer")
+                    answer_y -= 14
+                    answer_index += 1
+
+            # Extra space between paragraphs
+            y_pos -= 8
+
+        # Footer
+        page.use_template("footer")
+
+    def _layout_full_page(
+        self,
+        page: _PageBuilder,
+        quiz_data: dict,
+        quiz_name: str,
+        fonts: Tuple[str, str]
+    ):
+        """Lay out a full-page quiz with answers on separate pages at the end"""
+        width, height = letter
+        regular, bold = fonts
+
+        # Margins
+        margin = 0.5 * inch
+        full_width = width - (2 * margin)
+
+        # Starting Y position
+        y_pos = height - margin
+
+        # Title
+        title = quiz_data.get("quiz_title", quiz_name)
+        page.text(margin, y_pos, title, bold, 14, "title")
+        y_pos -= 30
+
+        # Quiz section label
+        page.text(margin, y_pos, "QUIZ", bold, 10, "label")
+        y_pos -= 20
+
+        paragraphs, answer_key = self._get_paragraphs(quiz_data)
+
+        # Quiz pages
+        for para in paragraphs:
+            # Section heading if present
+            if para.get("section_heading"):
+                if y_pos < margin + 70:
+                    page.new_page()
+                    y_pos = height - margin
+
+                page.text(margin, y_pos, para["section_heading"], bold, 12, "heading")
+                y_pos -= 20
+
+            # Word wrap for full width
+            wrapped_quiz = self.wrap_text(para["text"], full_width, 11, regular)
+
+            for line in wrapped_quiz:
+                if y_pos < margin + 30:
+                    page.new_page()
+                    y_pos = height - margin
+
+                page.text(margin, y_pos, line, regular, 11, "quiz")
+                y_pos -= 14
+
+            # Extra space between paragraphs
+            y_pos -= 10
+
+        # Footer on quiz pages
+        page.use_template("footer")
+
+        # Start answer key on new page
+        page.new_page()
+        y_pos = height - margin
+
+        # Answer key title
+        answer_key_title = "ANSWER KEY"
+        if quiz_data.get("variant_id"):
+            answer_key_title += f" - VARIANT {quiz_data['variant_id']}"
+        page.text(margin, y_pos, answer_key_title, bold, 14, "title")
+        y_pos -= 30
+
+        # Create answer text as flowing paragraphs with 4 spaces between words
+        # No numbers, no context - just the words
+        answer_words = [ans.get("answer", "") for ans in answer_key]
+        answer_paragraph = "    ".join(answer_words)  # 4 spaces between each word
+
+        # Wrap the paragraph to page width
+        wrapped_answers = self.wrap_text(answer_paragraph, full_width, 11, regular)
+
+        for line in wrapped_answers:
+            if y_pos < margin + 30:
+                page.new_page()
+                y_pos = height - margin
+
+            page.text(margin, y_pos, line, regular, 11, "answer")
+            y_pos -= 14
+
+        # Footer on answer page
+        page.use_template("footer")
+
+    def wrap_text(
+        self,
+        text: str,
+        max_width: float,
+        font_size: float = 11,
+        font_name: str = "Helvetica"
+    ) -> List[str]:
+        """
+        Wrap text to fit within max_width
+
+        Each distinct word is measured once per font and size; line widths
+        are built up incrementally from cached word and space widths, so
+        wrapping is linear in the length of the text. Tokens wider than a
+        whole line are broken across lines instead of overflowing the page.
+        """
+        widths = self._get_width_cache(font_name, font_size)
+        space_width = self._measure(" ", widths, font_name, font_size)
+        limit = max_width + _WIDTH_EPSILON
+
+        lines = []
+        current_line = []
+        current_width = 0.0
+
+        for word in text.split():
+            word_width = self._measure(word, widths, font_name, font_size)
+
+            if current_line:
+                line_width = current_width + space_width + word_width
+                if line_width <= limit:
+                    current_line.append(word)
+                    current_width = line_width
+                    continue
+                lines.append(' '.join(current_line))
+
+            if word_width > limit:
+                pieces = self._split_long_word(word, limit, widths, font_name, font_size)
+                lines.extend(pieces[:-1])
+                word = pieces[-1]
+                word_width = self._measure(word, widths, font_name, font_size)
+
+            current_line = [word]
+            current_width = word_width
+
+        if current_line:
+            lines.append(' '.join(current_line))
+
+        return lines
+
+    def _split_long_word(
+        self,
+        word: str,
+        limit: float,
+        widths: Dict[str, float],
+        font_name: str,
+        font_size: float
+    ) -> List[str]:
+        """Break a token wider than a line into line-sized pieces"""
+        pieces = []
+        piece_start = 0
+        piece_width = 0.0
+
+        for i, char in enumerate(word):
+            char_width = self._measure(char, widths, font_name, font_size)
+            if piece_width + char_width > limit and i > piece_start:
+                pieces.append(word[piece_start:i])
+                piece_start = i
+                piece_width = 0.0
+            piece_width += char_width
+
+        pieces.append(word[piece_start:])
+        return pieces
+
+    def _get_width_cache(self, font_name: str, font_size: float) -> Dict[str, float]:
+        """Get the word width cache for a font and size"""
+        return self.fonts.width_cache(font_name, font_size)
+
+    def _measure(
+        self,
+        word: str,
+        widths: Dict[str, float],
+        font_name: str,
+        font_size: float
+    ) -> float:
+        """Width of a word in points, measured once and cached"""
+        width = widths.get(word)
+        if width is None:
+            width = widths[word] = pdfmetrics.stringWidth(word, font_name, font_size)
+        return width
@@ -0,0 +1,332 @@
+"""
+Staged quiz pipeline - overlaps extraction, LLM word selection and quiz
+building for documents that are split into several chunks
+
+    extract ──(queue)──> select (N workers) ──(queue)──> build
+
+Stages are connected by bounded queues, so a fast stage blocks instead of
+running ahead of a slow one (backpressure), and wall-clock time approaches
+the slowest stage rather than the sum of all of them. Any stage failing, or
+the caller setting the cancel event, stops every stage promptly.
+"""
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import queue
+import re
+import threading
+import time
+
+from .cancellation import CancelToken
+from .generation_progress import ProgressTracker
+from .tracing import propagate, span
+
+
+# Sentinel that tells the next stage a producer has finished
+_DONE = object()
+
+# How often blocked stages wake up to check for cancellation (seconds)
+_POLL_INTERVAL = 0.1
+
+
+class QuizPipeline:
+    """Runs one quiz's extraction, selection and building as overlapped stages"""
+
+    def __init__(
+        self,
+        generator,
+        chunk_chars: int = 20000,
+        queue_size: int = 2,
+        selection_workers: int = 2,
+        cancel_event: Optional[threading.Event] = None,
+        progress: Optional[ProgressTracker] = None
+    ):
+        """
+        Initialize pipeline
+
+        Args:
+            generator: QuizGenerator whose document processor, word selector
+                and builder the stages use
+            chunk_chars: Target chunk size; documents up to this long are a single chunk
+            queue_size: Chunks each queue holds before its producer blocks
+            selection_workers: Concurrent LLM selection calls
+            cancel_event: Set by the caller to stop generation; a CancelToken's
+                deadline also applies
+            progress: Tracker that receives per-chunk progress and stage timings
+        """
+        self.generator = generator
+        self.chunk_chars = max(1, chunk_chars)
+        self.queue_size = max(1, queue_size)
+        self.selection_workers = max(1, selection_workers)
+        # A child token, so a failing stage stops this pipeline without
+        # cancelling the caller's event
+        self.cancel_event = CancelToken(parent=cancel_event)
+        self.progress = progress
+
+        self._error: Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    def run(
+        self,
+        quiz_name: str,
+        source_file: Optional[Path] = None,
+        source_text: Optional[str] = None,
+        difficulty: str = "Medium"
+    ) -> Tuple[str, dict, dict]:
+        """
+        Extract, select and build a quiz
+
+        Args:
+            quiz_name: Name for the quiz (used as its title)
+            source_file: Path to source document
+            source_text: Raw text content (alternative to source_file)
+            difficulty: Quiz difficulty (Easy, Medium, Hard)
+
+        Returns:
+            Tuple of (content, word selection, quiz data), merged across chunks
+
+        Raises:
+            GenerationCancelled: If the cancel event was set (DeadlineExceeded
+                if the token's deadline passed)
+        """
+        extracted: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        selected: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        # Stage threads record spans in the caller's trace
+        guard = propagate(self._guard)
+        threads = [threading.Thread(
+            target=guard, args=(self._extract_stage, source_file, source_text, extracted),
+            name="quiz-extract", daemon=True
+        )]
+        threads.extend(
+            threading.Thread(
+                target=guard, args=(self._select_stage, difficulty, extracted, selected),
+                name=f"quiz-select-{i}", daemon=True
+            )
+            for i in range(self.selection_workers)
+        )
+        for thread in threads:
+            thread.start()
+
+        try:
+            chunks = self._build_stage(quiz_name, difficulty, selected)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Unblock and wait for the other stages whatever happened
+            if self._error is not None:
+                self.cancel_event.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+        if self.cancel_event.is_set():
+            raise self.cancel_event.error(self.progress.stage if self.progress else None)
+
+        if not chunks:
+            raise ValueError(
+                "Failed to extract content from source document. "
+                "The file may be empty, corrupted, or in an unsupported format."
+            )
+
+        return self._merge(chunks, difficulty)
+
+    def _extract_stage(self, source_file: Optional[Path], source_text: Optional[str], out: queue.Queue):
+        """Stream the source in chunks of about chunk_chars"""
+        count = 0
+        try:
+            chunks = self._iter_chunks(source_file, source_text)
+            while True:
+                start = time.perf_counter()
+                with span("extract", chunk=count) as chunk_span:
+                    text = next(chunks, None)
+                    chunk_span.set(chars=len(text) if text is not None else 0)
+                if self.progress is not None:
+                    self.progress.add_time("extract", time.perf_counter() - start)
+                if text is None:
+                    break
+
+                if self.progress is not None:
+                    self.progress.advance("extract", f"Extracted chunk {count + 1} ({len(text)} characters)")
+                self._put(out, (count, text))
+                count += 1
+                if self.cancel_event.is_set():
+                    return
+
+            if self.progress is not None:
+                self.progress.set_total_chunks(count)
+        finally:
+            for _ in range(self.selection_workers):
+                self._put(out, _DONE, force=True)
+
+    def _select_stage(self, difficulty: str, inbox: queue.Queue, out: queue.Queue):
+        """Ask the LLM for each chunk's words to blank"""
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _DONE or item is None:
+                    return
+                index, text = item
+                word_selection = self.generator.select_words(
+                    text, difficulty, progress=self.progress, cancel=self.cancel_event
+                )
+                self._put(out, (index, text, word_selection))
+        finally:
+            self._put(out, _DONE, force=True)
+
+    def _build_stage(self, quiz_name: str, difficulty: str, inbox: queue.Queue) -> List[Dict]:
+        """Build chunks in document order as their selections arrive"""
+        chunks: List[Dict] = []
+        waiting: Dict[int, Tuple[str, dict]] = {}
+        finished_workers = 0
+
+        while finished_workers < self.selection_workers:
+            item = self._get(inbox)
+            if item is None:
+                break
+            if item is _DONE:
+                finished_workers += 1
+                continue
+
+            index, text, word_selection = item
+            waiting[index] = (text, word_selection)
+
+            # Selections can finish out of order; build strictly in sequence
+            while len(chunks) in waiting:
+                text, word_selection = waiting.pop(len(chunks))
+                quiz_data = self.generator.build_quiz_data(
+                    quiz_name, text, word_selection, difficulty, progress=self.progress
+                )
+                chunks.append({"text": text, "word_selection": word_selection, "quiz_data": quiz_data})
+
+        return chunks
+
+    def _iter_chunks(self, source_file: Optional[Path], source_text: Optional[str]) -> Iterator[str]:
+        """Group extracted text units into chunks, joined the way process_document() joins them"""
+        if source_file:
+            # OCR progress and extraction warnings go to this generation's tracker
+            messages = self.progress.reporter("extract") if self.progress is not None else None
+            units = (
+                unit["text"]
+                for unit in self.generator.doc_processor.iter_document(
+                    source_file, cancel=self.cancel_event, progress=messages
+                )
+            )
+        elif len(source_text) <= self.chunk_chars:
+            # Short text is passed through untouched, exactly as given
+            if source_text.strip():
+                yield source_text
+            return
+        else:
+            units = (part for part in re.split(r'\n\s*\n', source_text) if part.strip())
+
+        parts: List[str] = []
+        size = 0
+        for text in units:
+            if parts and size + len(text) > self.chunk_chars:
+                yield "\n\n".join(parts)
+                parts = []
+                size = 0
+            parts.append(text)
+            size += len(text) + 2
+
+        if parts:
+            yield "\n\n".join(parts)
+
+    def _merge(self, chunks: List[Dict], difficulty: str) -> Tuple[str, dict, dict]:
+        """Combine per-chunk results into one quiz"""
+        if len(chunks) == 1:
+            chunk = chunks[0]
+            return chunk["text"], chunk["word_selection"], chunk["quiz_data"]
+
+        content = "\n\n".join(chunk["text"] for chunk in chunks)
+
+        words_to_blank = []
+        seen_words = set()
+        paragraphs = []
+        answer_key = []
+        offset = 0
+        for chunk in chunks:
+            for word_info in chunk["word_selection"].get("words_to_blank", []):
+                key = word_info.get("word", "").lower()
+                if key not in seen_words:
+                    seen_words.add(key)
+                    words_to_blank.append(word_info)
+
+            quiz_data = chunk["quiz_data"]
+            paragraphs.extend(quiz_data["paragraphs"])
+            for answer in quiz_data["answer_key"]:
+                # Positions are relative to the chunk; make them relative to the document
+                answer_key.append(dict(answer, position=answer["position"] + offset))
+            offset += len(chunk["text"]) + 2
+
+        chunk_metadata = [chunk["quiz_data"]["metadata"] for chunk in chunks]
+        original_word_count = sum(m["original_word_count"] for m in chunk_metadata)
+        coverage = len(answer_key) / original_word_count if original_word_count > 0 else 0
+
+        word_selection = {
+            "words_to_blank": words_to_blank,
+            "difficulty": difficulty,
+            "estimated_coverage": sum(
+                chunk["word_selection"].get("estimated_coverage", 0) for chunk in chunks
+            ) / len(chunks),
+            "source_length": len(content),
+            "chunks": len(chunks)
+        }
+
+        quiz_data = dict(chunks[0]["quiz_data"])
+        quiz_data.update({
+            "paragraphs": paragraphs,
+            "answer_key": answer_key,
+            "metadata": {
+                "difficulty": difficulty,
+                "original_length": len(content),
+                "quiz_length": sum(m["quiz_length"] for m in chunk_metadata) + 2 * (len(chunks) - 1),
+                "original_word_count": original_word_count,
+                "blanked_word_count": len(answer_key),
+                "coverage_percentage": round(coverage * 100, 1),
+                "total_blanks": len(answer_key),
+                "chunks": len(chunks)
+            }
+        })
+
+        return content, word_selection, quiz_data
+
+    def _guard(self, stage, *args):
+        """Run a stage thread, turning its exception into a pipeline failure"""
+        try:
+            stage(*args)
+        except BaseException as e:
+            self._fail(e)
+
+    def _fail(self, error: BaseException):
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self.cancel_event.set()
+
+    def _put(self, q: queue.Queue, item, force: bool = False):
+        """Put with backpressure; gives up on cancellation unless forced"""
+        while True:
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                if self.cancel_event.is_set():
+                    if not force:
+                        return
+                    # Make room for the sentinel: the consumer is stopping anyway
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _get(self, q: queue.Queue):
+        """Get, returning None once the pipeline has been cancelled"""
+        while True:
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self.cancel_event.is_set():
+                    return None
@@ -0,0 +1,518 @@
+"""
+Local quiz generation service - a small HTTP API in front of a job queue
+
+    POST   /jobs            submit a quiz job (JSON), returns its id
+    GET    /jobs            list jobs
+    GET    /jobs/<id>       job status and progress
+    GET    /jobs/<id>/pdf   download the finished quiz
+    DELETE /jobs/<id>       cancel a queued or running job
+    GET    /health          worker and queue counts
+    GET    /metrics         OpenMetrics text (see logic/metrics.py)
+
+Submitted jobs wait in a priority queue (higher priority first, then
+submission order) and are generated by a fixed pool of worker threads, so
+at most `workers` quizzes are generated at once however many are submitted.
+Each job runs under a deadline; a job that runs past it fails, and the stage
+it had reached is recorded on the job.
+"""
+
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+import base64
+import itertools
+import json
+import queue
+import threading
+import time
+import uuid
+
+from .cancellation import DeadlineExceeded, GenerationCancelled
+from .document_processor import SUPPORTED_EXTENSIONS
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_metrics
+from .quiz_generator import QuizGenerator
+from config import Config
+
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+QUIZ_STYLES = ("Split Page", "Full Page")
+
+# Largest request body accepted (uploaded documents are base64 encoded in it)
+MAX_REQUEST_BYTES = 50 * 1024 * 1024
+
+# Finished jobs remembered for status and download before the oldest are forgotten
+MAX_FINISHED_JOBS = 1000
+
+
+SERVICE_JOBS = get_metrics().gauge("quizlm_service_jobs", "Service jobs by status", ("status",))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its limit"""
+
+
+class QuizService:
+    """Queues quiz jobs and generates them on a pool of worker threads"""
+
+    def __init__(
+        self,
+        config: Config,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        generator: Optional[QuizGenerator] = None
+    ):
+        """
+        Initialize service
+
+        Args:
+            config: Application configuration
+            workers: Quizzes generated concurrently (default: config.service_workers)
+            max_queue: Jobs allowed to wait before submissions are refused
+                (default: config.service_max_queue)
+            generator: Quiz generator shared by the workers (default: a new one for config)
+        """
+        self.config = config
+        self.workers = max(1, workers or config.service_workers)
+        self.max_queue = max(1, max_queue or config.service_max_queue)
+        self.generator = generator or QuizGenerator(config)
+        self.upload_dir = config.data_dir / "service_uploads"
+
+        self._jobs: Dict[str, Dict] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker threads"""
+        if self._threads:
+            return
+        get_metrics().add_collector(self._collect_metrics)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"quiz-service-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, cancel_running: bool = False):
+        """
+        Stop the workers once their current jobs finish
+
+        Args:
+            cancel_running: Cancel jobs that are generating instead of waiting for them
+        """
+        with self._lock:
+            if cancel_running:
+                for job_id, job in self._jobs.items():
+                    if job["status"] == "running":
+                        self._cancel_events[job_id].set()
+
+        # A stop marker sorts ahead of every job, so idle workers exit at once
+        for _ in self._threads:
+            self._queue.put((float("-inf"), next(self._sequence), None))
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        get_metrics().remove_collector(self._collect_metrics)
+
+    def submit(self, request: dict) -> dict:
+        """
+        Validate a job request and queue it
+
+        Args:
+            request: Dict with:
+                - source_text: Text to build the quiz from, or
+                - document: Base64-encoded source file, with
+                - filename: Its name (the extension selects the extractor)
+                - quiz_name: Name for the quiz (default: derived from the job id)
+                - difficulty: Easy, Medium or Hard (default: Medium)
+                - quiz_style: Split Page or Full Page (default: Split Page)
+                - priority: Higher runs sooner (default: 0)
+                - timeout: Seconds the job may run once started
+                  (default: config.service_job_timeout; 0 or null: none)
+
+        Returns:
+            Public job dict
+
+        Raises:
+            ValueError: If the request is invalid
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        job_id = uuid.uuid4().hex[:12]
+
+        difficulty = request.get("difficulty", "Medium")
+        if difficulty not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+
+        quiz_style = request.get("quiz_style", "Split Page")
+        if quiz_style not in QUIZ_STYLES:
+            raise ValueError(f"quiz_style must be one of {', '.join(QUIZ_STYLES)}")
+
+        priority = request.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError("priority must be an integer")
+
+        timeout = request.get("timeout", self.config.service_job_timeout)
+        if timeout is not None and (not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout < 0):
+            raise ValueError("timeout must be a non-negative number of seconds")
+        timeout = timeout or None
+
+        quiz_name = request.get("quiz_name") or f"quiz_{job_id}"
+        if not isinstance(quiz_name, str) or any(c in quiz_name for c in '/\\') or quiz_name.startswith("."):
+            raise ValueError("quiz_name must be a plain file name")
+
+        source_text = request.get("source_text")
+        document = request.get("document")
+        if bool(source_text) == bool(document):
+            raise ValueError("Provide exactly one of source_text or document")
+        if source_text is not None and not isinstance(source_text, str):
+            raise ValueError("source_text must be a string")
+
+        filename = None
+        data = None
+        if document:
+            filename = Path(request.get("filename") or "").name
+            if Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                raise ValueError(
+                    f"filename must end in one of {', '.join(SUPPORTED_EXTENSIONS)}"
+                )
+            try:
+                data = base64.b64decode(document, validate=True)
+            except (ValueError, TypeError):
+                raise ValueError("document must be base64 encoded")
+
+        job = {
+            "id": job_id,
+            "quiz_name": quiz_name,
+            "difficulty": difficulty,
+            "quiz_style": quiz_style,
+            "priority": priority,
+            "timeout": timeout,
+            "source": filename or "text",
+            "status": "queued",
+            "progress": {"stage": "queued", "percent": 0},
+            "submitted_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "seconds": None,
+            "output_path": None,
+            "reused_from": None,
+            "timings": {},
+            "token_usage": {},
+            "error": None,
+            "stopped_in": None,
+            "_source_text": source_text,
+            "_source_file": None,
+            "_sequence": None
+        }
+
+        with self._lock:
+            waiting = sum(1 for j in self._jobs.values() if j["status"] == "queued")
+            if waiting >= self.max_queue:
+                raise QueueFullError(f"Queue is full ({self.max_queue} jobs waiting)")
+            if any(
+                j["quiz_name"] == quiz_name and j["status"] in ("queued", "running")
+                for j in self._jobs.values()
+            ):
+                raise ValueError(f"A job for quiz '{quiz_name}' is already queued or running")
+
+            if data is not None:
+                self.upload_dir.mkdir(parents=True, exist_ok=True)
+                source_file = self.upload_dir / f"{job_id}_{filename}"
+                source_file.write_bytes(data)
+                job["_source_file"] = source_file
+
+            self._jobs[job_id] = job
+            self._cancel_events[job_id] = threading.Event()
+            job["_sequence"] = next(self._sequence)
+            self._queue.put((-priority, job["_sequence"], job_id))
+            self._forget_finished()
+
+            return self._public(job)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Public dict for a job, or None if it is unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def list_jobs(self) -> List[dict]:
+        """Public dicts for all known jobs, in submission order"""
+        with self._lock:
+            return [self._public(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancel a job
+
+        Queued jobs are dropped. Running jobs stop waiting on an LLM request
+        at once and stop OCR and rendering at the next page; a page already
+        being OCRed or rasterized is waited for, for at most
+        QUIZLM_OCR_TIMEOUT. Finished jobs are left as they are.
+
+        Returns:
+            Public job dict, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued":
+                self._finish(job, "cancelled")
+            elif job["status"] == "running":
+                self._cancel_events[job_id].set()
+            return self._public(job)
+
+    def stats(self) -> dict:
+        """Worker count and jobs per status"""
+        with self._lock:
+            counts = {status: 0 for status in ("queued", "running", "done", "failed", "cancelled")}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "jobs": counts,
+            "selections": self.generator.selection_flight.stats(),
+            "quiz_cache": self.generator.quiz_cache.stats() if self.generator.quiz_cache else None
+        }
+
+    def _collect_metrics(self):
+        """Refresh the job gauges before metrics are exported"""
+        for status, count in self.stats()["jobs"].items():
+            SERVICE_JOBS.set(count, status=status)
+
+    def _worker(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            if job_id is None:
+                return
+
+            with self._lock:
+                job = self._jobs.get(job_id)
+                # Cancelled (or forgotten) while it was waiting
+                if job is None or job["status"] != "queued":
+                    continue
+                job["status"] = "running"
+                job["started_at"] = datetime.now().isoformat()
+                cancel_event = self._cancel_events[job_id]
+
+            start = time.perf_counter()
+            try:
+                output_path = self._run_job(job, cancel_event)
+                status, error = "done", None
+                job["output_path"] = str(output_path)
+            except DeadlineExceeded as e:
+                status, error = "failed", f"Timed out after {job['timeout']:g}s during {e.stage}"
+                job["stopped_in"] = e.stage
+                print(f"  Job {job_id} ({job['quiz_name']}) {error.lower()}")
+            except GenerationCancelled as e:
+                status, error = "cancelled", None
+                job["stopped_in"] = e.stage
+            except Exception as e:
+                status, error = "failed", str(e)
+                print(f"  Job {job_id} ({job['quiz_name']}) failed: {e}")
+
+            with self._lock:
+                job["seconds"] = round(time.perf_counter() - start, 3)
+                job["error"] = error
+                self._finish(job, status)
+
+    def _run_job(self, job: dict, cancel_event: threading.Event) -> Path:
+        """Generate one job's quiz, recording its progress events on the job"""
+        def on_progress(event: dict):
+            with self._lock:
+                job["progress"] = {
+                    "stage": event["stage"],
+                    "percent": event["percent"],
+                    "message": (event["message"] or "").strip() or job["progress"].get("message")
+                }
+                job["timings"] = event["timings"]
+                job["token_usage"] = event["tokens"]
+
+        result = self.generator.generate_quiz(
+            job["quiz_name"],
+            source_file=job["_source_file"],
+            source_text=job["_source_text"],
+            difficulty=job["difficulty"],
+            quiz_style=job["quiz_style"],
+            cancel_event=cancel_event,
+            progress=on_progress,
+            timeout=job["timeout"]
+        )
+
+        with self._lock:
+            job["reused_from"] = result.reused_from
+            job["timings"] = result.timings
+            job["token_usage"] = result.token_usage
+        return result.pdf_path
+
+    def _finish(self, job: dict, status: str):
+        """Record a job's final status (caller holds the lock)"""
+        job["status"] = status
+        job["finished_at"] = datetime.now().isoformat()
+        if status == "done":
+            job["progress"] = {"stage": "done", "percent": 100}
+        else:
+            job["progress"] = dict(job["progress"], stage=status)
+
+        # The source is no longer needed once the job is over
+        job["_source_text"] = None
+        if job["_source_file"] is not None:
+            try:
+                job["_source_file"].unlink()
+            except OSError:
+                pass
+            job["_source_file"] = None
+
+    def _forget_finished(self):
+        """Drop the oldest finished jobs beyond MAX_FINISHED_JOBS (caller holds the lock)"""
+        finished = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in ("done", "failed", "cancelled")
+        ]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+            del self._cancel_events[job_id]
+
+    def _public(self, job: dict) -> dict:
+        """Copy of a job without its internal fields (caller holds the lock)"""
+        public = {key: value for key, value in job.items() if not key.startswith("_")}
+        public["progress"] = dict(job["progress"])
+        if job["status"] == "queued":
+            ahead = sum(
+                1 for other in self._jobs.values()
+                if other["status"] == "queued"
+                and (-other["priority"], other["_sequence"]) < (-job["priority"], job["_sequence"])
+            )
+            public["queue_position"] = ahead + 1
+        return public
+
+
+class QuizServiceHandler(BaseHTTPRequestHandler):
+    """JSON request handler; the QuizService is taken from the server"""
+
+    server_version = "QuizLM"
+
+    def do_GET(self):
+        parts = self._path_parts()
+        service = self.server.service
+
+        if parts == ["health"]:
+            self._send_json(200, dict(service.stats(), status="ok"))
+        elif parts == ["metrics"]:
+            body = get_metrics().render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif parts == ["jobs"]:
+            self._send_json(200, {"jobs": service.list_jobs()})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = service.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": "Job not found"})
+            else:
+                self._send_json(200, job)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "pdf":
+            self._send_pdf(parts[1])
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self._path_parts() != ["jobs"]:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length <= 0:
+            self._send_json(411, {"error": "Content-Length required"})
+            return
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {"error": f"Request larger than {MAX_REQUEST_BYTES} bytes"})
+            return
+
+        try:
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            job = self.server.service.submit(request)
+        except QueueFullError as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        self._send_json(202, job, location=f"/jobs/{job['id']}")
+
+    def do_DELETE(self):
+        parts = self._path_parts()
+        if len(parts) != 2 or parts[0] != "jobs":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        job = self.server.service.cancel(parts[1])
+        if job is None:
+            self._send_json(404, {"error": "Job not found"})
+        else:
+            self._send_json(200, job)
+
+    def _send_pdf(self, job_id: str):
+        job = self.server.service.get(job_id)
+        if job is None:
+            self._send_json(404, {"error": "Job not found"})
+            return
+        if job["status"] != "done":
+            self._send_json(409, {"error": f"Job is {job['status']}", "status": job["status"]})
+            return
+
+        path = Path(job["output_path"])
+        try:
+            data = path.read_bytes()
+        except OSError:
+            self._send_json(410, {"error": "Quiz file no longer exists"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Disposition", f'attachment; filename="{path.name}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _path_parts(self) -> List[str]:
+        return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+    def _send_json(self, status: int, payload: dict, location: Optional[str] = None):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(service: QuizService, host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    """
+    Create the HTTP server for a service (call serve_forever() to run it)
+
+    Args:
+        service: Quiz service the endpoints submit to
+        host: Address to listen on
+        port: Port to listen on (0 picks a free one)
+
+    Returns:
+        Server with the service attached
+    """
+    server = ThreadingHTTPServer((host, port), QuizServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
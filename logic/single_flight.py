@@ -0,0 +1,113 @@
+"""
+Single-flight coalescing - concurrent calls for the same key share one computation
+
+The first caller for a key runs the work; callers that arrive with the same
+key while it is still running wait for it and receive the same result (or
+exception) instead of repeating it. Nothing is cached once the call finishes.
+
+A waiting caller stops waiting when its own cancel event is set, and a
+leader that was cancelled does not fail its followers: the first follower
+still waiting takes over and runs the work itself.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import threading
+
+from .cancellation import GenerationCancelled, check_cancelled
+
+
+class _Call:
+    """One in-flight computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Any],
+        cancel: Optional[threading.Event] = None
+    ) -> Tuple[Any, bool]:
+        """
+        Run fn, or join the in-flight call with the same key
+
+        Args:
+            key: Identifies equivalent calls
+            fn: Computes the result
+            cancel: This caller's cancel event or CancelToken, honoured while
+                waiting on another caller's computation
+
+        Returns:
+            Tuple of (result, shared) where shared is True if the result came
+            from another caller's computation
+
+        Raises:
+            Whatever fn raised, in the leader and every waiting caller
+            (except the leader's own cancellation), or GenerationCancelled
+            if this caller is cancelled while waiting
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _Call()
+                    self._calls[key] = call
+                    self._executed += 1
+                else:
+                    self._coalesced += 1
+
+            if leader:
+                break
+
+            if cancel is None:
+                call.done.wait()
+            else:
+                while not call.done.wait(0.1):
+                    check_cancelled(cancel)
+
+            if isinstance(call.error, GenerationCancelled):
+                # The leader gave up, not the work: try again, possibly as leader
+                check_cancelled(cancel)
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict:
+        """Counts of computations run and callers that joined one instead"""
+        with self._lock:
+            return {
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,227 @@
+"""
+Tracing - timed spans for each stage and sub-step of quiz generation
+
+Code marks work with `with span("name", key=value):`. While a Trace is
+active (see activate()), each span records its start, duration, thread and
+arguments; otherwise span() returns a shared no-op context manager, so
+tracing costs one context-variable lookup when it is disabled.
+
+A finished Trace exports as Chrome trace-event JSON (open it in
+chrome://tracing or https://ui.perfetto.dev) and as a per-span summary.
+The active trace follows the code into worker threads started through
+propagate().
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("quizlm_trace", default=None)
+
+
+class _NullSpan:
+    """Stands in for a span when no trace is active"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """One timed region of a trace"""
+
+    __slots__ = ("trace", "name", "category", "args", "start")
+
+    def __init__(self, trace: "Trace", name: str, category: str, args: dict):
+        self.trace = trace
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.trace._record(self, end)
+        return False
+
+    def set(self, **args):
+        """Add arguments learned while the span runs (e.g. token counts)"""
+        self.args.update(args)
+
+
+class Trace:
+    """Spans recorded for one quiz generation"""
+
+    def __init__(self, name: str):
+        """
+        Start a trace
+
+        Args:
+            name: What is being traced (the quiz name)
+        """
+        self.name = name
+        self.start = time.perf_counter_ns()
+        self.wall_start = time.time()
+        self.events: List[dict] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, category: Optional[str] = None, **args) -> _Span:
+        """Context manager timing a region; category defaults to the name's prefix"""
+        return _Span(self, name, category or name.split(".", 1)[0], args)
+
+    def _record(self, span: _Span, end: int):
+        thread = threading.current_thread()
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": (span.start - self.start) / 1000,
+            "dur": (end - span.start) / 1000,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": span.args
+        }
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_chrome(self) -> dict:
+        """Chrome trace-event JSON (the "JSON Object Format")"""
+        with self._lock:
+            events = sorted(self.events, key=lambda event: event["ts"])
+            threads = dict(self._threads)
+
+        pid = os.getpid()
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"QuizLM: {self.name}"}}]
+        metadata.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        )
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"quiz_name": self.name, "started_at": self.wall_start}
+        }
+
+    def summary(self) -> dict:
+        """
+        Per-span totals
+
+        Returns:
+            Dictionary with:
+                - quiz_name: Trace name
+                - wall_ms: Time from the trace's start to the end of its last span
+                - spans: {name: {count, total_ms, max_ms}}, slowest total first
+                - tokens: LLM input/output tokens summed over llm.request spans
+        """
+        with self._lock:
+            events = list(self.events)
+
+        spans: Dict[str, dict] = {}
+        tokens = {"input_tokens": 0, "output_tokens": 0}
+        wall = 0.0
+        for event in events:
+            entry = spans.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = event["dur"] / 1000
+            entry["count"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            wall = max(wall, (event["ts"] + event["dur"]) / 1000)
+            if event["name"] == "llm.request":
+                for key in tokens:
+                    tokens[key] += int(event["args"].get(key, 0) or 0)
+
+        for entry in spans.values():
+            entry["total_ms"] = round(entry["total_ms"], 3)
+            entry["max_ms"] = round(entry["max_ms"], 3)
+
+        return {
+            "quiz_name": self.name,
+            "wall_ms": round(wall, 3),
+            "spans": dict(sorted(spans.items(), key=lambda item: -item[1]["total_ms"])),
+            "tokens": tokens
+        }
+
+    def save(self, directory: Path) -> Path:
+        """
+        Write <name>.trace.json (Chrome format) and <name>.summary.json
+
+        Returns:
+            Path of the Chrome trace file
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        trace_path = directory / f"{self.name}.trace.json"
+        with open(trace_path, "w") as f:
+            json.dump(self.to_chrome(), f)
+        with open(directory / f"{self.name}.summary.json", "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        return trace_path
+
+
+@contextmanager
+def activate(trace: Optional[Trace]):
+    """Make a trace the active one for the enclosed block (None: tracing off)"""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+def span(name: str, category: Optional[str] = None, **args):
+    """
+    Time a region in the active trace
+
+    Args:
+        name: Span name, dotted by stage (e.g. "extract.page", "llm.request")
+        category: Chrome trace category (default: the name's first part)
+        **args: Values shown with the span
+
+    Returns:
+        Context manager whose set(**args) adds arguments while it runs
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return trace.span(name, category, **args)
+
+
+def current_trace() -> Optional[Trace]:
+    """The active trace, if any"""
+    return _current.get()
+
+
+def propagate(fn: Callable) -> Callable:
+    """Wrap fn so that it runs with the caller's active trace (for new threads)"""
+    trace = _current.get()
+    if trace is None:
+        return fn
+
+    def run(*args, **kwargs):
+        with activate(trace):
+            return fn(*args, **kwargs)
+
+    return run
@@ -5,6 +5,9 @@ Asks LLM to identify which words should be blanked based on semantic importance
 
 from typing import List, Dict, Optional
 import json
+import re
+import threading
+import time
 
 try:
     from anthropic import Anthropic
@@ -22,6 +25,21 @@ except ImportError:
     httpx = None
 
 from config import Config
+from .cancellation import call_cancellable, check_cancelled, timeout_for
+from .metrics import record_llm_request
+from .tracing import span
+
+
+# Bump when the selection prompt changes, so quizzes cached from the old
+# prompt are not reused
+PROMPT_VERSION = 1
+
+# Model used for word selection by each provider
+MODELS = {
+    "claude": "claude-3-haiku-20240307",
+    "openai": "gpt-4o",
+    "stub": "stub",
+}
 
 
 class WordSelector:
@@ -30,6 +48,8 @@ class WordSelector:
     def __init__(self, config: Config, proxies: Optional[Dict] = None):
         self.config = config
         self.provider = config.llm_provider
+        self.model = MODELS.get(self.provider)
+        self.selector_id = f"{self.provider}:{self.model}:v{PROMPT_VERSION}"
         self.proxies = proxies
 
         # Create http_client with proxies if needed
@@ -43,24 +63,28 @@ class WordSelector:
         if self.provider == "claude":
             if Anthropic is None:
                 raise ImportError("anthropic not installed. Install with: pip install anthropic")
-            client_kwargs = {"api_key": config.anthropic_api_key}
+            client_kwargs = {"api_key": config.anthropic_api_key, "timeout": config.llm_timeout or None}
             if http_client:
                 client_kwargs["http_client"] = http_client
             self.client = Anthropic(**client_kwargs)
         elif self.provider == "openai":
             if OpenAI is None:
                 raise ImportError("openai not installed. Install with: pip install openai")
-            client_kwargs = {"api_key": config.openai_api_key}
+            client_kwargs = {"api_key": config.openai_api_key, "timeout": config.llm_timeout or None}
             if http_client:
                 client_kwargs["http_client"] = http_client
             self.client = OpenAI(**client_kwargs)
+        elif self.provider == "stub":
+            # Offline provider for local testing; no API key or network needed
+            self.client = None
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
 
     def select_words_to_blank(
         self,
         source_content: str,
-        difficulty: str
+        difficulty: str,
+        cancel: Optional[threading.Event] = None
     ) -> Dict:
         """
         Ask LLM to identify educationally valuable words to blank
@@ -68,12 +92,14 @@ class WordSelector:
         Args:
             source_content: The text to analyze
             difficulty: Easy, Medium, or Hard
+            cancel: Cancel event or CancelToken; its deadline bounds the request
 
         Returns:
             Dictionary with:
                 - words_to_blank: List of word objects with word, importance, context
                 - difficulty: The difficulty level
                 - estimated_coverage: Approximate % of content words selected
+                - usage: LLM tokens used (input_tokens, output_tokens)
         """
         # Validate source content
         if not source_content or not source_content.strip():
@@ -86,6 +112,9 @@ class WordSelector:
             "Hard": "40-50% of meaningful content words"
         }
 
+        if self.provider == "stub":
+            return self._stub_selection(source_content, difficulty, cancel)
+
         prompt = f"""You are an educational content analyzer. Your task is to identify which words in the following text should be tested in a fill-in-the-blank quiz for maximum educational value.
 
 DIFFICULTY LEVEL: {difficulty}
@@ -151,43 +180,140 @@ TEXT TO ANALYZE:
 Return ONLY the JSON object, with no explanatory text before or after."""
 
         # Call LLM
+        client, timeout = self._client_for(cancel)
+        with span("llm.request", provider=self.provider, model=self.model, prompt_chars=len(prompt)) as request_span:
+            start = time.perf_counter()
+            try:
+                # Awaited on a helper thread so a cancelled caller is not held
+                # until the request's timeout
+                content, usage, retries = call_cancellable(
+                    lambda: self._request_selection(client, timeout, prompt), cancel, "select"
+                )
+            except Exception:
+                record_llm_request(self.provider, time.perf_counter() - start, ok=False)
+                # A request abandoned at the deadline is reported as cancellation
+                check_cancelled(cancel, "select")
+                raise
+            record_llm_request(self.provider, time.perf_counter() - start, usage, retries)
+            request_span.set(response_chars=len(content or ""), retries=retries, **usage)
+
+        # Parse JSON response
+        try:
+            with span("llm.parse"):
+                result = self._extract_json_from_response(content)
+
+            # Validate result structure
+            if "words_to_blank" not in result:
+                raise ValueError("LLM response missing 'words_to_blank' field")
+
+            # Add metadata
+            result["raw_response"] = content
+            result["source_length"] = len(source_content)
+            result["usage"] = usage
+
+            return result
+
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Failed to parse LLM response as JSON: {e}\nResponse: {content[:500]}")
+
+    def _request_selection(self, client, timeout: Optional[float], prompt: str):
+        """Send the selection prompt and return (response text, token usage, client retries)"""
         if self.provider == "claude":
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
+            # The raw response also reports how often the client retried
+            raw = client.messages.with_raw_response.create(
+                timeout=timeout,
+                model=self.model,
                 max_tokens=4000,
                 messages=[{
                     "role": "user",
                     "content": prompt
                 }]
             )
+            response = raw.parse()
             content = response.content[0].text
+            usage = {
+                "input_tokens": response.usage.input_tokens,
+                "output_tokens": response.usage.output_tokens
+            }
         elif self.provider == "openai":
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
+            raw = client.chat.completions.with_raw_response.create(
+                timeout=timeout,
+                model=self.model,
                 messages=[{
                     "role": "user",
                     "content": prompt
                 }],
                 max_tokens=3000
             )
+            response = raw.parse()
             content = response.choices[0].message.content
+            usage = {
+                "input_tokens": response.usage.prompt_tokens,
+                "output_tokens": response.usage.completion_tokens
+            }
 
-        # Parse JSON response
-        try:
-            result = self._extract_json_from_response(content)
+        return content, usage, getattr(raw, "retries_taken", 0)
 
-            # Validate result structure
-            if "words_to_blank" not in result:
-                raise ValueError("LLM response missing 'words_to_blank' field")
+    def _stub_selection(self, source_content: str, difficulty: str, cancel: Optional[threading.Event] = None) -> Dict:
+        """
+        Deterministic stand-in for the LLM: blanks the longest distinct words
 
-            # Add metadata
-            result["raw_response"] = content
-            result["source_length"] = len(source_content)
+        Used by the "stub" provider so the service and batch tools can be
+        exercised without an API key. QUIZLM_STUB_DELAY simulates LLM latency.
+        """
+        start = time.perf_counter()
+        with span("llm.request", provider="stub", model=self.model, input_tokens=0, output_tokens=0):
+            if self.config.stub_llm_delay > 0:
+                if cancel is None:
+                    time.sleep(self.config.stub_llm_delay)
+                elif cancel.wait(self.config.stub_llm_delay):
+                    record_llm_request("stub", time.perf_counter() - start, ok=False)
+                    check_cancelled(cancel, "select")
+        record_llm_request("stub", time.perf_counter() - start)
+
+        fraction = {"Easy": 0.15, "Medium": 0.25, "Hard": 0.4}.get(difficulty, 0.25)
+
+        # First appearance of each distinct word long enough to be worth testing
+        first_seen = {}
+        for match in re.finditer(r"[A-Za-z][A-Za-z'-]*[A-Za-z]", source_content):
+            word = match.group()
+            if len(word) >= 5 and word.lower() not in first_seen:
+                first_seen[word.lower()] = (match.start(), word)
+
+        count = max(1, round(len(first_seen) * fraction)) if first_seen else 0
+        longest = sorted(first_seen.values(), key=lambda item: (-len(item[1]), item[0]))[:count]
+
+        words_to_blank = [
+            {
+                "word": word,
+                "importance": round(min(1.0, len(word) / 12), 2),
+                "word_type": "vocabulary",
+                "reason": "stub provider: long word"
+            }
+            for _, word in sorted(longest)
+        ]
+
+        return {
+            "words_to_blank": words_to_blank,
+            "difficulty": difficulty,
+            "estimated_coverage": fraction,
+            "raw_response": "",
+            "source_length": len(source_content),
+            "usage": {"input_tokens": 0, "output_tokens": 0}
+        }
 
-            return result
+    def _client_for(self, cancel: Optional[threading.Event]):
+        """
+        Client and request timeout for a call made on behalf of cancel
 
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse LLM response as JSON: {e}\nResponse: {content[:500]}")
+        Raises:
+            GenerationCancelled: If cancel is already set or past its deadline
+        """
+        timeout = timeout_for(cancel, self.config.llm_timeout or None, "select")
+        if getattr(cancel, "deadline", None) is not None:
+            # A retried request would run past the deadline
+            return self.client.with_options(max_retries=0), timeout
+        return self.client, timeout
 
     def _extract_json_from_response(self, text: str) -> dict:
         """Extract and parse JSON from LLM response text"""
@@ -6,12 +6,17 @@ Main application entry point
 
 import sys
 from pathlib import Path
+from config import Config
+from logic.metrics import serve_metrics
 from ui.main_window import MainWindow
 
 
 def main() -> int:
     """Main application entry point"""
     try:
+        config = Config()
+        if config.metrics_port:
+            serve_metrics(config.metrics_port, config.metrics_host)
         app = MainWindow()
         app.run()
         return 0
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+QuizLM - local quiz generation service
+
+Serves an HTTP API for submitting quiz jobs, polling their progress and
+downloading the finished PDFs. Jobs are queued by priority and generated by
+a fixed pool of workers. Binds to localhost by default.
+
+Examples:
+    python serve.py
+    python serve.py --port 9000 --workers 4
+
+    curl -X POST localhost:8765/jobs -d '{"quiz_name": "cells", "source_text": "..."}'
+    curl localhost:8765/jobs/<id>
+    curl -o cells.pdf localhost:8765/jobs/<id>/pdf
+
+Set QUIZLM_LLM_PROVIDER=stub to try the service without an API key.
+"""
+
+import argparse
+import sys
+
+from config import Config
+from logic.quiz_service import QuizService, create_server
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the local quiz generation service")
+    parser.add_argument("--host", help="Address to listen on (default: QUIZLM_SERVICE_HOST or 127.0.0.1)")
+    parser.add_argument("--port", type=int, help="Port to listen on (default: QUIZLM_SERVICE_PORT or 8765)")
+    parser.add_argument("--workers", type=int, help="Quizzes generated concurrently (default: QUIZLM_SERVICE_WORKERS or 2)")
+    parser.add_argument("--max-queue", type=int, help="Jobs allowed to wait (default: QUIZLM_SERVICE_MAX_QUEUE or 100)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    try:
+        config = Config()
+        service = QuizService(config, workers=args.workers, max_queue=args.max_queue)
+        host = args.host or config.service_host
+        port = args.port if args.port is not None else config.service_port
+        server = create_server(service, host, port)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    service.start()
+    print(f"QuizLM service listening on http://{host}:{server.server_address[1]} "
+          f"({service.workers} workers, LLM provider: {config.llm_provider})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        service.stop(cancel_running=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
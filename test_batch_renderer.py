@@ -0,0 +1,89 @@
+"""
+Tests for parallel quiz rendering and booklet assembly
+"""
+
+import pytest
+from PyPDF2 import PdfReader
+
+from conftest import SAMPLE_TEXT
+from logic.batch_renderer import BatchRenderer
+from logic.quiz_artifact import artifact_path, load_artifact
+from logic.quiz_generator import QuizGenerator
+
+
+@pytest.fixture
+def jobs(stub_config, tmp_path):
+    """Render jobs for a short and a longer quiz"""
+    generator = QuizGenerator(stub_config)
+    jobs = []
+    for name, repeat in (("short", 1), ("long", 4)):
+        generator.generate_quiz(name, source_text=SAMPLE_TEXT * repeat, progress=lambda event: None)
+        quiz_data = load_artifact(artifact_path(stub_config.quizzes_dir, name))["quizzes"][0]
+        jobs.append({"quiz_data": quiz_data, "quiz_name": name, "output_path": tmp_path / "out" / f"{name}.pdf"})
+    return jobs
+
+
+def page_count(path):
+    return len(PdfReader(str(path)).pages)
+
+
+def test_render_quizzes_across_processes(jobs):
+    results = BatchRenderer(max_workers=2).render_quizzes(jobs)
+
+    assert [result["quiz_name"] for result in results] == ["short", "long"]
+    for result in results:
+        assert result["error"] is None
+        assert page_count(result["output_path"]) == result["pages"] > 0
+    assert results[1]["pages"] > results[0]["pages"]
+
+
+def test_failed_quiz_is_reported_and_left_out_of_booklet(jobs, tmp_path):
+    # Its output folder cannot be created
+    (tmp_path / "taken").write_text("not a folder")
+    broken = dict(jobs[1], quiz_name="broken", output_path=tmp_path / "taken" / "broken.pdf")
+    renderer = BatchRenderer(max_workers=1)
+    results = renderer.render_quizzes([jobs[0], broken])
+    assert results[0]["error"] is None
+    assert results[1]["error"]
+
+    booklet = renderer.assemble_booklet(results, tmp_path / "booklet.pdf")
+    contents = PdfReader(str(booklet)).pages[0].extract_text()
+    assert "short" in contents
+    assert "broken" not in contents and "long" not in contents
+
+
+def test_booklet_pages_are_contents_plus_quizzes(jobs, tmp_path):
+    renderer = BatchRenderer(max_workers=1)
+    booklet = tmp_path / "booklet.pdf"
+    results = renderer.render_booklet(jobs, booklet, title="Term 1")
+
+    reader = PdfReader(str(booklet))
+    quiz_pages = sum(result["pages"] for result in results)
+    contents_pages = len(reader.pages) - quiz_pages
+    assert contents_pages >= 1
+    assert reader.metadata.title == "Term 1"
+
+    # The contents lists each quiz at the page it starts on
+    contents = reader.pages[0].extract_text()
+    assert "Term 1" in contents
+    first_short = contents_pages
+    first_long = first_short + results[0]["pages"]
+    assert reader.pages[first_short].extract_text() == PdfReader(str(results[0]["output_path"])).pages[0].extract_text()
+    assert reader.pages[first_long].extract_text() == PdfReader(str(results[1]["output_path"])).pages[0].extract_text()
+    assert str(first_long + 1) in contents
+
+
+def test_duplex_booklet_starts_quizzes_on_odd_pages(jobs, tmp_path):
+    renderer = BatchRenderer(max_workers=1)
+    booklet = tmp_path / "duplex.pdf"
+    results = renderer.render_booklet(jobs, booklet, duplex=True)
+
+    reader = PdfReader(str(booklet))
+    first_pages = [PdfReader(str(result["output_path"])).pages[0].extract_text() for result in results]
+    starts = [
+        number for number, page in enumerate(reader.pages, start=1)
+        if page.extract_text() in first_pages
+    ]
+    assert len(starts) == 2
+    assert all(start % 2 == 1 for start in starts)
+    assert len(reader.pages) >= page_count(results[0]["output_path"]) + page_count(results[1]["output_path"]) + 1
@@ -0,0 +1,136 @@
+"""
+Tests for batch generation resuming from its journal
+"""
+
+import pytest
+
+from conftest import SAMPLE_TEXT
+from logic.batch_journal import BatchJournal
+from logic.batch_runner import BatchRunner
+from logic.metrics import GENERATIONS, STAGE_SECONDS
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "cells.txt"
+    path.write_text(SAMPLE_TEXT)
+    return path
+
+
+def run_batch(config, journal_path, source, **kwargs):
+    """Run a one-quiz batch with a freshly opened journal, as a restarted process would"""
+    with BatchJournal(journal_path) as journal:
+        runner = BatchRunner(config, journal=journal, **kwargs)
+        summary = runner.run([source], ["Medium"], ["Split Page"])
+    return runner, summary["quizzes"][0]
+
+
+def crash_render(*args, **kwargs):
+    raise KeyboardInterrupt("process killed while rendering")
+
+
+def test_resume_after_crash_repeats_no_finished_stage(stub_config, tmp_path, source, monkeypatch):
+    journal_path = tmp_path / "journal.sqlite"
+
+    with BatchJournal(journal_path) as journal:
+        runner = BatchRunner(stub_config, journal=journal)
+        monkeypatch.setattr(runner.generator, "render_quiz", crash_render)
+        with pytest.raises(KeyboardInterrupt):
+            runner.run([source], ["Medium"], ["Split Page"])
+    assert not (stub_config.quizzes_dir / "cells.pdf").exists()
+
+    # The restarted batch must not call the LLM (or rebuild) again
+    def no_llm(*args, **kwargs):
+        raise AssertionError("word selection was repeated")
+
+    monkeypatch.setattr("logic.quiz_generator.QuizGenerator.select_words", no_llm)
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["status"] == "ok", job["error"]
+    assert job["resumed"] == ["extract", "select", "build"]
+    assert (stub_config.quizzes_dir / "cells.pdf").exists()
+
+    # A third run finds everything done
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["status"] == "ok"
+    assert job["resumed"] == ["extract", "select", "build", "render"]
+
+
+def test_resume_after_crash_once_pdf_is_written(stub_config, tmp_path, source, monkeypatch):
+    journal_path = tmp_path / "journal.sqlite"
+    pdf = stub_config.quizzes_dir / "cells.pdf"
+
+    with BatchJournal(journal_path) as journal:
+        runner = BatchRunner(stub_config, journal=journal)
+        render_quiz = runner.generator.render_quiz
+
+        def render_then_crash(*args, **kwargs):
+            # Killed after the PDF is on disk but before the render is journaled
+            path = render_quiz(*args, **kwargs)
+            path.write_bytes(path.read_bytes()[:100])
+            raise KeyboardInterrupt("process killed after rendering")
+
+        monkeypatch.setattr(runner.generator, "render_quiz", render_then_crash)
+        with pytest.raises(KeyboardInterrupt):
+            runner.run([source], ["Medium"], ["Split Page"])
+    assert pdf.exists()
+
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["status"] == "ok", job["error"]
+    assert job["resumed"] == ["extract", "select", "build"]
+    # The partial file was rendered over
+    assert pdf.read_bytes().rstrip().endswith(b"%%EOF")
+
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["resumed"] == ["extract", "select", "build", "render"]
+
+
+def test_edited_source_does_not_overwrite_journaled_pdf(stub_config, tmp_path, source):
+    journal_path = tmp_path / "journal.sqlite"
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["status"] == "ok"
+    pdf = stub_config.quizzes_dir / "cells.pdf"
+    before = pdf.read_bytes()
+
+    source.write_text("Enzymes lower the activation energy of reactions.\n" * 20)
+    _, job = run_batch(stub_config, journal_path, source)
+    assert job["status"] == "failed"
+    assert "already exists" in job["error"]
+    assert pdf.read_bytes() == before
+
+    _, job = run_batch(stub_config, journal_path, source, skip_existing=True)
+    assert job["status"] == "skipped"
+    assert pdf.read_bytes() == before
+
+
+def test_selection_is_not_reused_across_selectors(stub_config, tmp_path, source):
+    journal_path = tmp_path / "journal.sqlite"
+    runner, _ = run_batch(stub_config, journal_path, source)
+
+    with BatchJournal(journal_path) as journal:
+        _, content_hash = journal.get_extraction(source)
+        selector = runner.generator.word_selector.selector_id
+        assert journal.get_selection(content_hash, "Medium", selector) is not None
+        assert journal.get_selection(content_hash, "Medium", "openai:gpt-4o:v1") is None
+
+
+def test_batch_indexes_quizzes_without_counting_misses(stub_config, tmp_path, source):
+    runner, job = run_batch(stub_config, tmp_path / "journal.sqlite", source)
+    assert job["status"] == "ok"
+
+    stats = runner.generator.quiz_cache.stats()
+    assert stats["entries"] == 1
+    assert stats["misses"] == 0
+
+
+def test_batch_updates_generation_metrics(stub_config, tmp_path, source):
+    journal_path = tmp_path / "journal.sqlite"
+    done = GENERATIONS.value(outcome="done")
+    resumed = GENERATIONS.value(outcome="resumed")
+    renders = STAGE_SECONDS.count(stage="render")
+
+    run_batch(stub_config, journal_path, source)
+    assert GENERATIONS.value(outcome="done") == done + 1
+    assert STAGE_SECONDS.count(stage="render") == renders + 1
+
+    run_batch(stub_config, journal_path, source)
+    assert GENERATIONS.value(outcome="resumed") == resumed + 1
@@ -0,0 +1,172 @@
+"""
+Tests for cancel tokens, deadlines and how the generation pipeline uses them
+"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import SAMPLE_TEXT
+from logic.cancellation import (
+    CancelToken, DeadlineExceeded, GenerationCancelled, call_cancellable, check_cancelled, timeout_for
+)
+from logic.quiz_generator import QuizGenerator
+from logic.quiz_pipeline import QuizPipeline
+
+
+def test_token_without_deadline():
+    token = CancelToken()
+    assert not token.is_set()
+    assert token.remaining() is None
+    assert token.timeout(30) == 30
+    token.check("select")
+
+    token.cancel()
+    assert token.is_set()
+    with pytest.raises(GenerationCancelled) as raised:
+        token.check("select")
+    assert raised.value.stage == "select"
+    assert not isinstance(raised.value, DeadlineExceeded)
+
+
+def test_deadline_expires():
+    token = CancelToken(timeout=0.1)
+    assert not token.is_set()
+    assert 0 < token.timeout(30) <= 0.1
+    assert token.timeout(None) <= 0.1
+
+    assert token.wait(5)
+    assert token.expired
+    with pytest.raises(DeadlineExceeded) as raised:
+        token.check("render")
+    assert raised.value.stage == "render"
+    with pytest.raises(DeadlineExceeded):
+        token.timeout(30, "render")
+
+
+def test_wait_times_out_before_deadline():
+    token = CancelToken(timeout=10)
+    start = time.monotonic()
+    assert not token.wait(0.1)
+    assert time.monotonic() - start < 1
+
+
+def test_parent_cancellation_reaches_child_but_not_back():
+    parent = threading.Event()
+    child = CancelToken(parent=parent)
+    parent.set()
+    assert child.is_set()
+
+    parent = CancelToken()
+    child = CancelToken(parent=parent)
+    child.cancel()
+    assert child.is_set()
+    assert not parent.is_set()
+
+
+def test_child_inherits_earlier_parent_deadline():
+    parent = CancelToken(timeout=1)
+    assert CancelToken(timeout=60, parent=parent).deadline == parent.deadline
+    assert CancelToken(parent=parent).deadline == parent.deadline
+
+    shorter = CancelToken(timeout=0.5, parent=parent)
+    assert shorter.deadline < parent.deadline
+
+
+def test_expired_parent_deadline_is_reported_as_deadline():
+    parent = CancelToken(timeout=0.05)
+    child = CancelToken(parent=parent)
+    time.sleep(0.1)
+    with pytest.raises(DeadlineExceeded):
+        child.check("extract")
+
+
+def test_plain_events_are_supported():
+    event = threading.Event()
+    check_cancelled(None)
+    check_cancelled(event)
+    assert timeout_for(event, 5) == 5
+    assert timeout_for(None, None) is None
+
+    event.set()
+    with pytest.raises(GenerationCancelled):
+        check_cancelled(event, "select")
+    with pytest.raises(GenerationCancelled):
+        timeout_for(event, 5)
+
+
+def test_call_cancellable_returns_result_or_error():
+    assert call_cancellable(lambda: 42, CancelToken()) == 42
+    assert call_cancellable(lambda: 7, None) == 7
+    with pytest.raises(ZeroDivisionError):
+        call_cancellable(lambda: 1 / 0, CancelToken())
+
+
+def test_call_cancellable_stops_waiting_on_cancel():
+    cancel = threading.Event()
+    release = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(GenerationCancelled) as raised:
+        call_cancellable(lambda: release.wait(10), cancel, "select")
+    assert time.monotonic() - start < 1
+    assert raised.value.stage == "select"
+    release.set()
+
+
+@pytest.fixture
+def generator(stub_config):
+    stub_config.pipeline_chunk_chars = 300
+    return QuizGenerator(stub_config)
+
+
+def test_failing_stage_does_not_cancel_callers_event(generator, monkeypatch):
+    calls = []
+
+    def select_words(text, difficulty, progress=None, cancel=None):
+        calls.append(text)
+        if len(calls) == 2:
+            raise ValueError("LLM refused chunk")
+        cancel.wait(5)
+        cancel.check("select")
+
+    monkeypatch.setattr(generator, "select_words", select_words)
+    caller = CancelToken()
+    pipeline = QuizPipeline(generator, chunk_chars=300, selection_workers=2, cancel_event=caller)
+
+    start = time.monotonic()
+    with pytest.raises(ValueError, match="LLM refused chunk"):
+        pipeline.run("quiz", source_text=SAMPLE_TEXT)
+
+    # The failure stopped the pipeline's own token, and the other worker with it
+    assert pipeline.cancel_event.is_set()
+    assert not caller.is_set()
+    assert time.monotonic() - start < 5
+
+
+def test_caller_cancel_stops_pipeline(generator, monkeypatch):
+    def select_words(text, difficulty, progress=None, cancel=None):
+        cancel.wait(5)
+        cancel.check("select")
+
+    monkeypatch.setattr(generator, "select_words", select_words)
+    caller = threading.Event()
+    pipeline = QuizPipeline(generator, chunk_chars=300, cancel_event=caller)
+    threading.Timer(0.2, caller.set).start()
+
+    with pytest.raises(GenerationCancelled) as raised:
+        pipeline.run("quiz", source_text=SAMPLE_TEXT)
+    assert not isinstance(raised.value, DeadlineExceeded)
+
+
+def test_generation_deadline(generator):
+    generator.config.stub_llm_delay = 10
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as raised:
+        generator.generate_quiz("late", source_text=SAMPLE_TEXT, progress=lambda event: None, timeout=0.3)
+
+    assert time.monotonic() - start < 3
+    assert raised.value.stage == "select"
+    assert not (generator.config.quizzes_dir / "late.pdf").exists()
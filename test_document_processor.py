@@ -0,0 +1,150 @@
+"""
+Tests for extracting text from documents
+"""
+
+import zipfile
+
+import pytest
+from PIL import Image
+from reportlab.pdfgen import canvas
+
+from conftest import SAMPLE_TEXT
+from logic.document_processor import DocumentProcessor
+from logic.ocr_engine import OCREngine
+from logic.quiz_generator import QuizGenerator
+
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def write_docx(path, body):
+    """Write a minimal DOCX whose word/document.xml has the given body XML"""
+    document = f'<?xml version="1.0"?><w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>'
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("word/document.xml", document)
+    return path
+
+
+def paragraph(*runs, properties=""):
+    return f"<w:p>{properties}{''.join(runs)}</w:p>"
+
+
+def run(content):
+    return f"<w:r>{content}</w:r>"
+
+
+def text(value):
+    return f'<w:t xml:space="preserve">{value}</w:t>'
+
+
+def table(*rows):
+    return "<w:tbl>" + "".join(
+        "<w:tr>" + "".join(f"<w:tc>{cell}</w:tc>" for cell in row) + "</w:tr>" for row in rows
+    ) + "</w:tbl>"
+
+
+@pytest.fixture
+def processor(stub_config):
+    return DocumentProcessor(stub_config)
+
+
+def units(processor, path):
+    return list(processor.iter_document(path))
+
+
+def test_tab_stop_definitions_are_not_text(processor, tmp_path):
+    tab_stops = (
+        '<w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/>'
+        '<w:tab w:val="right" w:pos="9000"/></w:tabs></w:pPr>'
+    )
+    path = write_docx(tmp_path / "tabs.docx", paragraph(
+        run(text("Hello")), run("<w:tab/>" + text("world")), properties=tab_stops
+    ))
+
+    assert [unit["text"] for unit in units(processor, path)] == ["Hello\tworld"]
+
+
+def test_line_breaks_inside_runs(processor, tmp_path):
+    path = write_docx(tmp_path / "breaks.docx", paragraph(
+        run(text("First line") + "<w:br/>" + text("Second line") + "<w:cr/>" + text("Third"))
+    ))
+
+    assert units(processor, path)[0]["text"] == "First line\nSecond line\nThird"
+
+
+def test_paragraphs_and_cells_in_document_order(processor, tmp_path):
+    path = write_docx(tmp_path / "table.docx", "".join([
+        paragraph(run(text("Intro"))),
+        paragraph(),
+        table(
+            [paragraph(run(text("A1"))), paragraph(run(text("B1")))],
+            [paragraph(run(text("A2"))), paragraph(run(text("B2a"))) + paragraph(run(text("B2b")))]
+        ),
+        paragraph(run(text("Outro")))
+    ]))
+
+    extracted = units(processor, path)
+    assert [unit["text"] for unit in extracted] == ["Intro", "A1", "B1", "A2", "B2a\nB2b", "Outro"]
+    assert extracted[0]["paragraph"] == 1
+    assert extracted[-1]["paragraph"] == 2
+    assert [unit["cell"] for unit in extracted[1:5]] == [(1, 1, 1), (1, 1, 2), (1, 2, 1), (1, 2, 2)]
+
+
+def test_nested_table_reads_as_part_of_its_cell(processor, tmp_path):
+    nested = table([paragraph(run(text("Inner text")))])
+    path = write_docx(tmp_path / "nested.docx", table([
+        paragraph(run(text("Outer before"))) + nested + paragraph(run(text("Outer after"))),
+        paragraph(run(text("Next cell")))
+    ]))
+
+    extracted = units(processor, path)
+    assert [unit["text"] for unit in extracted] == ["Outer before\nInner text\nOuter after", "Next cell"]
+    assert [unit["cell"] for unit in extracted] == [(1, 1, 1), (1, 1, 2)]
+
+
+def test_corrupt_docx_is_a_value_error(processor, tmp_path):
+    path = tmp_path / "broken.docx"
+    path.write_bytes(b"not a zip file")
+    with pytest.raises(ValueError, match="Failed to extract text from DOCX"):
+        units(processor, path)
+
+
+class FixedTextEngine(OCREngine):
+    """OCR engine that recognizes the same text on every page"""
+
+    name = "fixed"
+
+    def recognize(self, image, timeout=None):
+        return SAMPLE_TEXT, 91.0
+
+
+def test_ocr_messages_go_to_progress_callback(processor, tmp_path, capsys):
+    processor.ocr_engine = FixedTextEngine()
+    path = tmp_path / "scan.png"
+    Image.new("L", (850, 1100), "white").save(path)
+
+    messages = []
+    extracted = list(processor.iter_document(path, progress=messages.append))
+
+    assert extracted[0]["text"] == SAMPLE_TEXT
+    assert extracted[0]["ocr"]["engine"] == "fixed"
+    assert len(messages) == 1
+    assert messages[0].startswith("OCR scan.png:") and "confidence 91.0" in messages[0]
+    assert capsys.readouterr().out == ""
+
+
+def test_extraction_warnings_reach_generation_events(stub_config, tmp_path, capsys):
+    path = tmp_path / "notes.pdf"
+    pdf = canvas.Canvas(str(path))
+    pdf.drawString(72, 720, SAMPLE_TEXT[:90])
+    pdf.showPage()
+    pdf.showPage()  # Blank second page
+    pdf.save()
+
+    events = []
+    QuizGenerator(stub_config).generate_quiz("notes", source_file=path, progress=events.append)
+
+    warnings = [event for event in events if event["message"] and "no extractable text" in event["message"]]
+    assert [event["stage"] for event in warnings] == ["extract"]
+    assert warnings[0]["quiz_name"] == "notes"
+    assert "no extractable text" not in capsys.readouterr().out
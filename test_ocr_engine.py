@@ -0,0 +1,90 @@
+"""
+Tests for the in-process tesserocr engine's recognizer pool
+"""
+
+import threading
+
+import pytest
+
+from logic import ocr_engine
+from logic.ocr_engine import TesserocrEngine
+
+
+class FakeTessBaseAPI:
+    """Records how many recognizers (language models) are loaded"""
+
+    created = []
+
+    def __init__(self, lang):
+        self.ended = False
+        FakeTessBaseAPI.created.append(self)
+
+    def SetImage(self, image):
+        self.image = image
+
+    def Recognize(self, timeout_ms):
+        return True
+
+    def GetUTF8Text(self):
+        return f"text of {self.image}"
+
+    def MeanTextConf(self):
+        return 90
+
+    def Clear(self):
+        self.image = None
+
+    def End(self):
+        self.ended = True
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    FakeTessBaseAPI.created = []
+    monkeypatch.setattr(ocr_engine, "tesserocr", type("tesserocr", (), {"PyTessBaseAPI": FakeTessBaseAPI}))
+    return FakeTessBaseAPI
+
+
+def test_short_lived_threads_reuse_recognizers(fake_tesserocr):
+    engine = TesserocrEngine(max_apis=2)
+    results = []
+
+    # Each generation extracts on a new thread
+    for i in range(10):
+        thread = threading.Thread(target=lambda i=i: results.append(engine.recognize(f"page {i}")))
+        thread.start()
+        thread.join()
+
+    assert len(results) == 10
+    assert results[0] == ("text of page 0", 90.0)
+    assert len(fake_tesserocr.created) == 1
+
+    engine.close()
+    assert all(api.ended for api in fake_tesserocr.created)
+
+
+def test_pool_never_exceeds_max_apis(fake_tesserocr, monkeypatch):
+    engine = TesserocrEngine(max_apis=2)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def slow_text(self):
+        started.release()
+        release.wait(5)
+        return "text"
+
+    monkeypatch.setattr(FakeTessBaseAPI, "GetUTF8Text", slow_text)
+    threads = [threading.Thread(target=engine.recognize, args=("page",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    assert started.acquire(timeout=5) and started.acquire(timeout=5)
+
+    # Both recognizers are busy, so a caller with a deadline gives up
+    with pytest.raises(TimeoutError):
+        engine.recognize("page", timeout=0.1)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(fake_tesserocr.created) == 2
+    engine.close()
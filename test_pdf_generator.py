@@ -0,0 +1,59 @@
+"""
+Tests for rendering quizzes in memory
+"""
+
+from io import BytesIO
+import os
+
+import pytest
+from PyPDF2 import PdfReader
+
+from conftest import SAMPLE_TEXT
+from logic.quiz_artifact import artifact_path, load_artifact
+from logic.quiz_generator import QuizGenerator
+
+
+@pytest.fixture
+def generator(stub_config):
+    return QuizGenerator(stub_config)
+
+
+@pytest.fixture
+def quiz_data(generator):
+    generator.generate_quiz("cells", source_text=SAMPLE_TEXT, progress=lambda event: None)
+    return load_artifact(artifact_path(generator.config.quizzes_dir, "cells"))["quizzes"][0]
+
+
+def page_contents(data):
+    return [page.get_contents().get_data() for page in PdfReader(BytesIO(data)).pages]
+
+
+def test_pdf_bytes_match_file_output(generator, quiz_data, tmp_path):
+    path = tmp_path / "out" / "cells.pdf"
+    generator.pdf_generator.create_quiz_pdf(quiz_data, path, "cells", "Full Page")
+
+    data = generator.pdf_generator.create_quiz_bytes(quiz_data, "cells", "Full Page")
+    assert data.startswith(b"%PDF")
+    assert page_contents(data) == page_contents(path.read_bytes())
+
+
+def test_stream_is_rewound_and_touches_no_files(generator, quiz_data):
+    before = sorted(os.listdir(generator.config.quizzes_dir))
+    stream = generator.pdf_generator.create_quiz_stream(quiz_data, "cells")
+
+    assert stream.tell() == 0
+    assert stream.read(4) == b"%PDF"
+    assert sorted(os.listdir(generator.config.quizzes_dir)) == before
+
+
+def test_other_formats_in_memory(generator, quiz_data):
+    html = generator.pdf_generator.create_quiz_bytes(quiz_data, "cells", output_format="html")
+    text = generator.pdf_generator.create_quiz_bytes(quiz_data, "cells", output_format="text")
+
+    answer = quiz_data["answer_key"][0]["answer"]
+    assert html.startswith(b"<!DOCTYPE html>")
+    assert answer.encode("utf-8") in html
+    assert answer.encode("utf-8") in text
+
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        generator.pdf_generator.create_quiz_bytes(quiz_data, "cells", output_format="docx")
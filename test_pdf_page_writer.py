@@ -0,0 +1,79 @@
+"""
+Tests for streaming long quizzes to PDF in batches of pages
+"""
+
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader
+
+from conftest import SAMPLE_TEXT
+from logic.pdf_page_writer import PDFPageWriter
+from logic.quiz_artifact import artifact_path, load_artifact
+from logic.quiz_generator import QuizGenerator
+
+
+@pytest.fixture
+def generator(stub_config):
+    return QuizGenerator(stub_config)
+
+
+@pytest.fixture
+def layout(generator):
+    """Layout of a quiz several pages long"""
+    generator.generate_quiz("long", source_text=SAMPLE_TEXT * 6, progress=lambda event: None)
+    quiz_data = load_artifact(artifact_path(generator.config.quizzes_dir, "long"))["quizzes"][0]
+    layout = generator.pdf_generator.layout_quiz(quiz_data, "long", "Split Page")
+    assert len(layout.pages) > 4
+    return layout
+
+
+def render(generator, layout, pages_per_part):
+    buffer = BytesIO()
+    generator.pdf_generator.render_layout(layout, buffer, pages_per_part=pages_per_part)
+    return buffer.getvalue()
+
+
+def resource_ids(reader, kind):
+    """Object ids of every resource of one kind (/Font, /XObject) used by the pages"""
+    ids = set()
+    for page in reader.pages:
+        entries = page["/Resources"].get(kind)
+        if entries is not None:
+            ids.update(ref.idnum for ref in dict.values(entries.get_object()))
+    return ids
+
+
+def test_streamed_pdf_matches_one_shot_render(generator, layout):
+    one_shot = PdfReader(BytesIO(render(generator, layout, 0)))
+    data = render(generator, layout, 2)
+    streamed = PdfReader(BytesIO(data))
+
+    assert len(streamed.pages) == len(layout.pages) == len(one_shot.pages)
+    for streamed_page, page in zip(streamed.pages, one_shot.pages):
+        assert streamed_page.get_contents().get_data() == page.get_contents().get_data()
+        assert streamed_page.mediabox == page.mediabox
+        assert streamed_page.extract_text() == page.extract_text()
+    assert streamed.metadata.title == "long"
+
+    # Every part embeds the same fonts and furniture form; each is written once
+    assert len(resource_ids(streamed, "/Font")) == len(resource_ids(one_shot, "/Font"))
+    assert len(resource_ids(streamed, "/XObject")) == len(resource_ids(one_shot, "/XObject")) > 0
+    assert data.count(b"/BaseFont") == len(resource_ids(one_shot, "/Font"))
+
+
+def test_stream_to_file_and_blank_pages(generator, layout, tmp_path):
+    part = render(generator, layout, 0)
+    path = tmp_path / "booklet.pdf"
+
+    with PDFPageWriter(path, title="Booklet (1)") as writer:
+        writer.add_pdf(part)
+        writer.add_blank_page(612, 792)
+        writer.add_pdf(part)
+        assert writer.page_count == 2 * len(layout.pages) + 1
+
+    reader = PdfReader(str(path))
+    assert len(reader.pages) == 2 * len(layout.pages) + 1
+    assert reader.metadata.title == "Booklet (1)"
+    assert reader.pages[len(layout.pages)].extract_text() == ""
+    assert reader.pages[0].extract_text() == reader.pages[len(layout.pages) + 1].extract_text()
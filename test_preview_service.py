@@ -0,0 +1,92 @@
+"""
+Tests for quiz page previews cached by page content
+"""
+
+from copy import deepcopy
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from conftest import SAMPLE_TEXT
+from logic.preview_service import PreviewService
+from logic.quiz_artifact import artifact_path, load_artifact
+from logic.quiz_generator import QuizGenerator
+
+
+class CountingRasterizer:
+    """Stands in for pdf2image: one blank image per PDF page, counting pages drawn"""
+
+    def __init__(self):
+        self.pages = 0
+
+    def __call__(self, data, dpi):
+        count = len(PdfReader(BytesIO(data)).pages)
+        self.pages += count
+        return [Image.new("RGB", (85, 110), "white") for _ in range(count)]
+
+
+@pytest.fixture
+def quiz_data(stub_config):
+    """A quiz several pages long"""
+    generator = QuizGenerator(stub_config)
+    generator.generate_quiz("long", source_text=SAMPLE_TEXT * 4, progress=lambda event: None)
+    return load_artifact(artifact_path(stub_config.quizzes_dir, "long"))["quizzes"][0]
+
+
+@pytest.fixture
+def rasterize():
+    return CountingRasterizer()
+
+
+@pytest.fixture
+def service(stub_config, rasterize):
+    return PreviewService(stub_config, rasterize=rasterize)
+
+
+def test_unchanged_quiz_is_served_from_cache(service, rasterize, quiz_data):
+    first = service.preview(quiz_data, "long")
+    pages = len(first["pages"])
+    assert pages > 2
+    assert first["rendered"] == rasterize.pages == pages
+    assert all(path.exists() for path in first["pages"])
+
+    again = service.preview(quiz_data, "long")
+    assert again["pages"] == first["pages"]
+    assert again["cached"] == pages
+    assert again["rendered"] == 0
+    assert rasterize.pages == pages
+
+
+def test_edit_rerenders_only_changed_pages(service, quiz_data):
+    first = service.preview(quiz_data, "long")
+
+    edited = deepcopy(quiz_data)
+    edited["paragraphs"][-1]["text"] += " Edited."
+    result = service.preview(edited, "long")
+
+    changed = [old != new for old, new in zip(first["pages"], result["pages"])]
+    assert len(result["pages"]) == len(first["pages"])
+    assert 0 < result["rendered"] == sum(changed) < len(first["pages"])
+    assert not changed[0]
+
+    # Another style draws every page differently
+    restyled = service.preview(quiz_data, "long", quiz_style="Full Page")
+    assert restyled["rendered"] == len(restyled["pages"])
+
+
+def test_cleared_cache_is_rendered_again(service, quiz_data):
+    first = service.preview(quiz_data, "long")
+    service.clear()
+    assert not any(path.exists() for path in first["pages"])
+
+    assert service.preview(quiz_data, "long")["rendered"] == len(first["pages"])
+
+
+def test_cache_is_pruned_to_its_limit(stub_config, rasterize, quiz_data):
+    service = PreviewService(stub_config, rasterize=rasterize, max_cached_pages=2)
+    result = service.preview(quiz_data, "long")
+
+    assert len(result["pages"]) > 2
+    assert len(list(service.cache_dir.glob("*.png"))) == 2
@@ -0,0 +1,79 @@
+"""
+Tests for reusing quizzes generated from identical inputs
+"""
+
+import sqlite3
+
+from conftest import SAMPLE_TEXT
+from logic.quiz_artifact import artifact_path
+from logic.quiz_cache import QuizCache
+from logic.quiz_generator import QuizGenerator
+
+
+def generate(generator, quiz_name):
+    return generator.generate_quiz(quiz_name, source_text=SAMPLE_TEXT, progress=lambda event: None)
+
+
+def delete_quiz(config, quiz_name):
+    (config.quizzes_dir / f"{quiz_name}.pdf").unlink()
+    artifact_path(config.quizzes_dir, quiz_name).unlink()
+
+
+def test_identical_inputs_reuse_quiz(stub_config):
+    generator = QuizGenerator(stub_config)
+    assert generate(generator, "first").reused_from is None
+
+    result = generate(generator, "second")
+    assert result.reused_from == "first"
+    assert result.pdf_path.exists()
+    assert generator.quiz_cache.stats()["hits"] == 1
+
+
+def test_copies_stay_cached_after_original_is_deleted(stub_config):
+    generator = QuizGenerator(stub_config)
+    generate(generator, "original")
+    generate(generator, "copy")
+    delete_quiz(stub_config, "original")
+
+    assert generate(generator, "third").reused_from == "copy"
+
+    delete_quiz(stub_config, "copy")
+    delete_quiz(stub_config, "third")
+    assert generate(generator, "fresh").reused_from is None
+
+
+def test_index_from_before_copies_were_indexed_is_migrated(tmp_path):
+    path = tmp_path / "quiz_cache.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE quizzes (content_hash TEXT NOT NULL, difficulty TEXT NOT NULL, "
+        "quiz_style TEXT NOT NULL, font TEXT NOT NULL, selector TEXT NOT NULL, "
+        "quiz_name TEXT NOT NULL, created_at TEXT NOT NULL, "
+        "PRIMARY KEY (content_hash, difficulty, quiz_style, font, selector))"
+    )
+    conn.execute("INSERT INTO quizzes VALUES ('h', 'Medium', 'Split Page', '', 's', 'old', '2026-01-01')")
+    conn.commit()
+    conn.close()
+
+    cache = QuizCache(path)
+    assert cache.lookup("h", "Medium", "Split Page", "", "s") == "old"
+    cache.record("new", "h", "Medium", "Split Page", "", "s")
+    assert cache.lookup("h", "Medium", "Split Page", "", "s") == "new"
+    cache.invalidate("new")
+    assert cache.lookup("h", "Medium", "Split Page", "", "s") == "old"
+    cache.close()
+
+
+def test_pasted_text_is_reused_when_the_pipeline_rechunks_it(stub_config):
+    # CRLF line endings and runs of blank lines are normalised when the
+    # pipeline splits text into chunks; the lookup must still match
+    stub_config.pipeline_chunk_chars = 300
+    text = SAMPLE_TEXT.replace("\n\n", "\r\n\r\n\r\n")
+    assert len(text) > stub_config.pipeline_chunk_chars
+
+    generator = QuizGenerator(stub_config)
+    first = generator.generate_quiz("crlf", source_text=text, progress=lambda event: None)
+    assert first.reused_from is None
+
+    result = generator.generate_quiz("crlf_again", source_text=text, progress=lambda event: None)
+    assert result.reused_from == "crlf"
@@ -0,0 +1,146 @@
+"""
+Tests for the local quiz service, run over HTTP on localhost with the stub LLM provider
+"""
+
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import json
+import threading
+import time
+
+import pytest
+
+from conftest import SAMPLE_TEXT
+from logic.quiz_service import QuizService, create_server
+
+
+@pytest.fixture
+def service(stub_config):
+    """Service with one worker (not started) behind an HTTP server on a free port"""
+    service = QuizService(stub_config, workers=1, max_queue=4)
+    server = create_server(service, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield service
+    server.shutdown()
+    server.server_close()
+    service.stop(cancel_running=True)
+
+
+def call(service, method, path, payload=None):
+    """Send a request; returns (status, parsed JSON or raw bytes)"""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = Request(service.base_url + path, data=data, method=method)
+    try:
+        with urlopen(request, timeout=10) as response:
+            status, body, content_type = response.status, response.read(), response.headers["Content-Type"]
+    except HTTPError as e:
+        status, body, content_type = e.code, e.read(), e.headers["Content-Type"]
+    if content_type == "application/json":
+        return status, json.loads(body)
+    return status, body
+
+
+def wait_for(service, job_id, statuses, timeout=30):
+    """Poll a job until it reaches one of statuses"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _, job = call(service, "GET", f"/jobs/{job_id}")
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not reach {statuses}: {job}")
+
+
+def test_submit_poll_and_download(service):
+    service.start()
+    status, job = call(service, "POST", "/jobs", {"quiz_name": "cells", "source_text": SAMPLE_TEXT})
+    assert status == 202
+    assert job["status"] in ("queued", "running")
+
+    job = wait_for(service, job["id"], ("done", "failed"))
+    assert job["status"] == "done", job["error"]
+    assert job["progress"] == {"stage": "done", "percent": 100}
+
+    status, pdf = call(service, "GET", f"/jobs/{job['id']}/pdf")
+    assert status == 200
+    assert pdf.startswith(b"%PDF")
+
+
+def test_invalid_and_unknown_jobs(service):
+    status, body = call(service, "POST", "/jobs", {"quiz_name": "x", "source_text": SAMPLE_TEXT, "difficulty": "Extreme"})
+    assert status == 400
+    assert "difficulty" in body["error"]
+
+    assert call(service, "GET", "/jobs/missing")[0] == 404
+    assert call(service, "DELETE", "/jobs/missing")[0] == 404
+
+
+def test_pdf_of_unfinished_job_is_conflict(service):
+    _, job = call(service, "POST", "/jobs", {"quiz_name": "later", "source_text": SAMPLE_TEXT})
+    status, body = call(service, "GET", f"/jobs/{job['id']}/pdf")
+    assert status == 409
+    assert body["status"] == "queued"
+
+
+def test_cancel_queued_job(service):
+    _, job = call(service, "POST", "/jobs", {"quiz_name": "dropped", "source_text": SAMPLE_TEXT})
+    status, job = call(service, "DELETE", f"/jobs/{job['id']}")
+    assert status == 200
+    assert job["status"] == "cancelled"
+
+    # A worker started afterwards never runs it
+    service.start()
+    time.sleep(0.2)
+    assert service.get(job["id"])["status"] == "cancelled"
+    assert not (service.config.quizzes_dir / "dropped.pdf").exists()
+
+
+def test_cancel_running_job(service):
+    # The stub waits on the job's cancel token, standing in for a slow LLM call
+    service.config.stub_llm_delay = 30
+    service.start()
+    _, job = call(service, "POST", "/jobs", {"quiz_name": "slow", "source_text": SAMPLE_TEXT})
+    wait_for(service, job["id"], ("running",))
+
+    start = time.monotonic()
+    call(service, "DELETE", f"/jobs/{job['id']}")
+    job = wait_for(service, job["id"], ("cancelled", "failed", "done"), timeout=5)
+
+    assert job["status"] == "cancelled"
+    assert time.monotonic() - start < 2
+    assert not (service.config.quizzes_dir / "slow.pdf").exists()
+
+
+def test_priority_order(service):
+    ids = {}
+    for name, priority in (("low", 0), ("high", 10), ("mid", 5), ("also_high", 10)):
+        _, job = call(service, "POST", "/jobs", {"quiz_name": name, "source_text": SAMPLE_TEXT, "priority": priority})
+        ids[name] = job["id"]
+
+    positions = {name: service.get(job_id)["queue_position"] for name, job_id in ids.items()}
+    assert positions == {"high": 1, "also_high": 2, "mid": 3, "low": 4}
+
+    # One worker runs them one at a time, highest priority (then oldest) first
+    service.start()
+    jobs = {name: wait_for(service, job_id, ("done", "failed")) for name, job_id in ids.items()}
+    order = sorted(jobs, key=lambda name: jobs[name]["started_at"])
+    assert order == ["high", "also_high", "mid", "low"]
+
+
+def test_queue_full(service):
+    for i in range(service.max_queue):
+        status, _ = call(service, "POST", "/jobs", {"quiz_name": f"q{i}", "source_text": SAMPLE_TEXT})
+        assert status == 202
+
+    status, body = call(service, "POST", "/jobs", {"quiz_name": "overflow", "source_text": SAMPLE_TEXT})
+    assert status == 503
+    assert "Queue is full" in body["error"]
+
+
+def test_duplicate_quiz_name_is_refused(service):
+    call(service, "POST", "/jobs", {"quiz_name": "twice", "source_text": SAMPLE_TEXT})
+    status, body = call(service, "POST", "/jobs", {"quiz_name": "twice", "source_text": SAMPLE_TEXT})
+    assert status == 400
+    assert "already queued or running" in body["error"]
@@ -0,0 +1,67 @@
+"""
+Tests for generating seeded per-student quiz variants
+"""
+
+import json
+
+import pytest
+from PyPDF2 import PdfReader
+
+from conftest import SAMPLE_TEXT
+from logic.quiz_artifact import artifact_path, load_artifact
+from logic.quiz_generator import QuizGenerator
+
+
+@pytest.fixture
+def generator(stub_config):
+    return QuizGenerator(stub_config)
+
+
+def answer_keys(generator, quiz_name):
+    """Each variant's answer key (answers with their hints), by variant ID"""
+    artifact = load_artifact(artifact_path(generator.config.quizzes_dir, quiz_name))
+    return {quiz["variant_id"]: quiz["answer_key"] for quiz in artifact["quizzes"]}
+
+
+def test_same_seed_reproduces_variants(generator):
+    generator.generate_quiz_variants("first", 3, source_text=SAMPLE_TEXT, seed=7)
+    generator.generate_quiz_variants("again", 3, source_text=SAMPLE_TEXT, seed=7)
+    generator.generate_quiz_variants("other", 3, source_text=SAMPLE_TEXT, seed=8)
+
+    first = answer_keys(generator, "first")
+    assert list(first) == ["A", "B", "C"]
+    assert first == answer_keys(generator, "again")
+    assert first != answer_keys(generator, "other")
+    # Versions handed to different students differ from each other
+    assert len({json.dumps(key) for key in first.values()}) == 3
+
+
+def test_combined_pdf_has_every_variant(generator):
+    paths = generator.generate_quiz_variants("exam", 2, source_text=SAMPLE_TEXT, seed=1)
+    assert paths == [generator.config.quizzes_dir / "exam.pdf"]
+
+    text = "".join(page.extract_text() for page in PdfReader(str(paths[0])).pages)
+    assert "Variant A" in text and "Variant B" in text
+
+    metadata = json.loads(generator._metadata_path("exam").read_text())
+    assert metadata["variant_seed"] == 1
+    assert [variant["variant_id"] for variant in metadata["variants"]] == ["A", "B"]
+    assert metadata["files"] == ["exam.pdf"]
+
+
+def test_separate_files_reserve_the_base_name(generator):
+    paths = generator.generate_quiz_variants("exam", 2, source_text=SAMPLE_TEXT, separate_files=True)
+    assert [path.name for path in paths] == ["exam_A.pdf", "exam_B.pdf"]
+    assert all(path.exists() for path in paths)
+    assert not (generator.config.quizzes_dir / "exam.pdf").exists()
+
+    # The artifact saved under the base name would be overwritten
+    with pytest.raises(ValueError, match="already exists"):
+        generator.generate_quiz("exam", source_text=SAMPLE_TEXT, progress=lambda event: None)
+    with pytest.raises(ValueError, match="already exists"):
+        generator.generate_quiz_variants("exam", 2, source_text=SAMPLE_TEXT)
+
+
+def test_invalid_variant_count(generator):
+    with pytest.raises(ValueError, match="at least 1"):
+        generator.generate_quiz_variants("none", 0, source_text=SAMPLE_TEXT)
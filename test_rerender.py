@@ -0,0 +1,65 @@
+"""
+Tests for re-rendering saved quizzes from their artifacts
+"""
+
+from PyPDF2 import PdfReader
+import pytest
+
+from conftest import SAMPLE_TEXT
+from logic.quiz_generator import QuizGenerator
+
+
+@pytest.fixture
+def generator(stub_config):
+    generator = QuizGenerator(stub_config)
+    generator.generate_quiz("cells", source_text=SAMPLE_TEXT, progress=lambda event: None)
+    generator.generate_quiz_variants("exam", 2, source_text=SAMPLE_TEXT, seed=3)
+    return generator
+
+
+def page_contents(path):
+    return [page.get_contents().get_data() for page in PdfReader(str(path)).pages]
+
+
+def no_extraction_or_llm(*args, **kwargs):
+    raise AssertionError("re-rendering must not extract or call the LLM")
+
+
+@pytest.fixture(autouse=True)
+def offline(generator, monkeypatch):
+    # Installed after the generator fixture has generated the quizzes
+    monkeypatch.setattr(generator, "extract_content", no_extraction_or_llm)
+    monkeypatch.setattr(generator, "select_words", no_extraction_or_llm)
+
+
+def test_rerender_matches_original_pages(generator, tmp_path):
+    original = generator.config.quizzes_dir / "cells.pdf"
+    path = generator.rerender_quiz("cells", output_path=tmp_path / "again.pdf")
+
+    assert page_contents(path) == page_contents(original)
+
+
+def test_rerender_in_another_style_and_format(generator):
+    path = generator.rerender_quiz("cells", quiz_style="Full Page")
+    assert path == generator.config.quizzes_dir / "cells_full_page.pdf"
+    assert page_contents(path) != page_contents(generator.config.quizzes_dir / "cells.pdf")
+
+    text = generator.rerender_quiz("cells", output_format="text")
+    assert text.name == "cells_split_page.txt"
+    assert "Mitochondria" in text.read_text()
+
+
+def test_rerender_one_variant(generator):
+    both = generator.rerender_quiz("exam")
+    only_b = generator.rerender_quiz("exam", variant_id="B")
+    assert only_b.name == "exam_split_page_B.pdf"
+    assert len(PdfReader(str(only_b)).pages) < len(PdfReader(str(both)).pages)
+    assert "Variant B" in PdfReader(str(only_b)).pages[0].extract_text()
+
+    with pytest.raises(ValueError, match="no variant 'Z'"):
+        generator.rerender_quiz("exam", variant_id="Z")
+
+
+def test_missing_artifact(generator):
+    with pytest.raises(FileNotFoundError):
+        generator.rerender_quiz("never_generated")
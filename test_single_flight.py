@@ -0,0 +1,154 @@
+"""
+Tests for single-flight coalescing of identical in-flight calls
+"""
+
+import threading
+import time
+
+import pytest
+
+from logic.cancellation import CancelToken, GenerationCancelled
+from logic.single_flight import SingleFlight
+
+
+def start(target, *args):
+    """Run target on a thread, keeping its return value or exception"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = target(*args)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.outcome = outcome
+    return thread
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not reached")
+        time.sleep(0.01)
+
+
+def test_concurrent_callers_share_one_computation():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "selection"
+
+    leader = start(flight.do, "key", work)
+    wait_until(lambda: flight.in_flight() == 1)
+    followers = [start(flight.do, "key", work) for _ in range(3)]
+    wait_until(lambda: flight.stats()["coalesced"] == 3)
+    release.set()
+
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert len(calls) == 1
+    assert leader.outcome["result"] == ("selection", False)
+    assert all(thread.outcome["result"] == ("selection", True) for thread in followers)
+    assert flight.stats() == {"executed": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    # Nothing is cached once a call finishes
+    assert flight.do("a", lambda: 3) == (3, False)
+
+
+def test_leader_error_reaches_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ValueError("LLM refused")
+
+    leader = start(flight.do, "key", work)
+    wait_until(lambda: flight.in_flight() == 1)
+    follower = start(flight.do, "key", work)
+    wait_until(lambda: flight.stats()["coalesced"] == 1)
+    release.set()
+
+    leader.join(5)
+    follower.join(5)
+    assert isinstance(leader.outcome["error"], ValueError)
+    assert isinstance(follower.outcome["error"], ValueError)
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+    leader_cancel = CancelToken()
+    runs = []
+
+    def leader_work():
+        runs.append("leader")
+        leader_cancel.wait(5)
+        leader_cancel.check("select")
+
+    def follower_work():
+        runs.append("follower")
+        return "follower result"
+
+    leader = start(flight.do, "key", leader_work, leader_cancel)
+    wait_until(lambda: flight.in_flight() == 1)
+    follower = start(flight.do, "key", follower_work, CancelToken())
+    wait_until(lambda: flight.stats()["coalesced"] == 1)
+
+    leader_cancel.cancel()
+    leader.join(5)
+    follower.join(5)
+
+    assert isinstance(leader.outcome["error"], GenerationCancelled)
+    # The follower did not inherit the leader's cancellation; it ran the work itself
+    assert follower.outcome["result"] == ("follower result", False)
+    assert runs == ["leader", "follower"]
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_follower_stops_waiting_without_affecting_leader():
+    flight = SingleFlight()
+    release = threading.Event()
+    follower_cancel = CancelToken()
+
+    def work():
+        release.wait(5)
+        return "done"
+
+    leader = start(flight.do, "key", work)
+    wait_until(lambda: flight.in_flight() == 1)
+    follower = start(flight.do, "key", work, follower_cancel)
+    wait_until(lambda: flight.stats()["coalesced"] == 1)
+
+    follower_cancel.cancel()
+    follower.join(5)
+    assert not follower.is_alive()
+    assert isinstance(follower.outcome["error"], GenerationCancelled)
+
+    release.set()
+    leader.join(5)
+    assert leader.outcome["result"] == ("done", False)
+
+
+def test_follower_deadline_while_waiting():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    leader = start(flight.do, "key", lambda: release.wait(5))
+    wait_until(lambda: flight.in_flight() == 1)
+    with pytest.raises(GenerationCancelled):
+        flight.do("key", lambda: None, CancelToken(timeout=0.2))
+
+    release.set()
+    leader.join(5)
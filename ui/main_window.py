@@ -7,6 +7,8 @@ import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from pathlib import Path
 from typing import Dict, Optional
+import queue
+import threading
 from logic.quiz_generator import QuizGenerator
 from logic.model_trainer import ModelTrainer
 from logic.document_processor import DocumentProcessor
@@ -515,32 +517,66 @@ class MainWindow:
         # Update status
         self.status_label.configure(text=f"Generating quiz from {source_description}...")
         self.generate_btn.configure(state="disabled")
-        self.root.update()
 
-        try:
-            # Generate quiz
-            output_path = self.quiz_generator.generate_quiz(
-                quiz_name=quiz_name,
-                source_file=use_file,
-                source_text=use_text,
-                difficulty=difficulty,
-                quiz_style=quiz_style
-            )
+        # Generate on a worker thread so the window stays responsive; progress
+        # events are handed back through a queue that the Tk loop polls
+        events = queue.Queue()
 
-            self.status_label.configure(text=f"✓ Quiz generated: {output_path.name}")
-            messagebox.showinfo(
-                "Success",
-                f"Quiz generated successfully!\n\nSaved to: {output_path}"
-            )
-            self.unsaved_changes = False
+        def generate():
+            try:
+                result = self.quiz_generator.generate_quiz(
+                    quiz_name=quiz_name,
+                    source_file=use_file,
+                    source_text=use_text,
+                    difficulty=difficulty,
+                    quiz_style=quiz_style,
+                    progress=events.put
+                )
+                events.put({"type": "result", "result": result})
+            except Exception as e:
+                events.put({"type": "error", "error": e})
 
-        except Exception as e:
-            error_message = f"Failed to generate quiz:\n\n{str(e)}"
-            self.status_label.configure(text=f"Error: {str(e)[:50]}...")
-            ErrorDialog(self.root, "Quiz Generation Error", error_message)
+        threading.Thread(target=generate, name="quiz-generate", daemon=True).start()
+        self.root.after(100, self._poll_generation, events)
+
+    def _poll_generation(self, events: queue.Queue):
+        """Apply progress events from the generation thread until it finishes"""
+        stage_labels = {
+            "extract": "Extracting text",
+            "select": "Selecting words",
+            "build": "Building quiz",
+            "render": "Rendering PDF"
+        }
+
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                self.root.after(100, self._poll_generation, events)
+                return
+
+            if event["type"] == "result":
+                result = event["result"]
+                self.status_label.configure(text=f"✓ Quiz generated: {result.pdf_path.name}")
+                messagebox.showinfo(
+                    "Success",
+                    f"Quiz generated successfully in {result.total_seconds:.1f}s!\n\n"
+                    f"Saved to: {result.pdf_path}"
+                )
+                self.unsaved_changes = False
+                self.generate_btn.configure(state="normal")
+                return
+
+            if event["type"] == "error":
+                error = event["error"]
+                error_message = f"Failed to generate quiz:\n\n{str(error)}"
+                self.status_label.configure(text=f"Error: {str(error)[:50]}...")
+                ErrorDialog(self.root, "Quiz Generation Error", error_message)
+                self.generate_btn.configure(state="normal")
+                return
 
-        finally:
-            self.generate_btn.configure(state="normal")
+            label = stage_labels.get(event["stage"], "Generating")
+            self.status_label.configure(text=f"{label}... {event['percent']}%")
 
     def _view_existing_quizzes(self):
         """Open folder with existing quizzes"""